@@ -9,14 +9,69 @@ from flask import (
     session,
     g,
     make_response,
+    Response,
+    send_file,
+    send_from_directory,
+    before_render_template,
+    template_rendered,
 )
 from flask_cors import CORS
 import requests
 import os
 import json
 import re
+import hashlib
+import hmac
+import ipaddress
+import mimetypes
+import time
+import zipfile
 from dotenv import load_dotenv
+from utils.alert_images import alert_image_store
 from utils.api_client import APIClient
+from utils.backend_health import BackendHealthMonitor
+from utils.compression import accepts_encoding, compress_for, should_compress, stats as compression_stats, weak_etag
+from utils.empresa_stats import empresa_stats_cache
+from utils.fragment_cache import FragmentCache, FragmentCacheExtension
+from utils.http_pool import get_backend_session, get_pool_stats
+from utils.image_folder_cache import folder_files_cache, folder_index_cache
+from utils.media_proxy import (
+    PASSTHROUGH_HEADERS,
+    is_allowed_media_source,
+    is_relayable_media_type,
+    media_cache,
+    open_passthrough,
+)
+from utils.metrics import (
+    http_in_flight,
+    http_request_duration,
+    http_requests,
+    metrics_available,
+    proxy_errors,
+    render_latest,
+    template_render_duration,
+    timed,
+)
+from utils.proxy_stream import (
+    PUBLIC_PROXY_ENDPOINTS,
+    body_consumed,
+    build_request_body,
+    decoded_headers,
+    is_json_content_type,
+    iter_upstream,
+    passthrough_headers,
+    should_buffer_response,
+)
+from utils.request_coalescer import request_coalescer
+from utils.response_cache import CachedResponse, ResponseCache, cache_scope, resource_prefix
+from utils.token_cache import TokenValidationCache
+from utils.static_compression import PrecompressedStatic
+from utils.static_manifest import StaticManifest
+from utils.structured_log import get_logger
+from utils.template_cache import build_bytecode_cache, precompile_templates
+from utils.thumbnails import THUMBNAIL_MIMETYPES, pick_format, pick_size, thumbnail_cache, thumbnails_available
+from utils.token_refresh import refresh_coordinator
+from utils.upload_stream import UPLOAD_ID_PATTERN, is_zip_upload, upload_progress, zip_members
 
 # Importar configuración centralizada
 from utils.config import (
@@ -27,14 +82,48 @@ from utils.config import (
     SESSION_LIFETIME,
     DEBUG_MODE,
     CORS_ORIGINS,
+    PROXY_STREAMING_ENABLED,
+    PROXY_STREAM_CHUNK_SIZE,
+    PROXY_BUFFER_LIMIT,
+    PROXY_CACHE_ENABLED,
+    PROXY_CACHE_MAX_BYTES,
+    PROXY_CACHE_MAX_ENTRY_BYTES,
+    TOKEN_CACHE_TTL,
+    TOKEN_CACHE_MAX_ENTRIES,
+    TOKEN_LOCAL_DECODE,
+    TOKEN_VALIDATION_ENDPOINT,
+    BACKEND_HEALTH_INTERVAL,
+    BACKEND_HEALTH_TIMEOUT,
+    BACKEND_HEALTH_DEGRADED_LATENCY,
+    BACKEND_HEALTH_MAX_BACKOFF,
+    IMAGE_FILES_PAGE_MAX,
+    IMAGES_BATCH_MAX_FILES,
+    IMAGE_THUMBNAIL_MAX_AGE,
+    MEDIA_CLIENT_MAX_AGE,
+    MEDIA_PROXY_ALLOWED_PREFIXES,
+    METRICS_TOKEN,
+    STATIC_IMMUTABLE_MAX_AGE,
+    STATIC_PRECOMPRESS_ENABLED,
+    STATIC_PRECOMPRESS_DIR,
+    STATIC_PRECOMPRESS_MIN_BYTES,
+    STATIC_BROTLI_QUALITY,
+    STATIC_GZIP_LEVEL,
+    JINJA_BYTECODE_CACHE_DIR,
+    TEMPLATE_PRECOMPILE,
+    FRAGMENT_CACHE_ENABLED,
+    FRAGMENT_CACHE_MAX_BYTES,
+    FRAGMENT_CACHE_MAX_ENTRY_BYTES,
     validate_config,
     print_config
 )
 from utils.images_service import (
+    build_image_file_url,
+    fetch_image_thumbnail,
     fetch_image_folders,
-    fetch_folder_files,
+    fetch_folder_files_page,
     create_image_folder,
     delete_image_folder,
+    upload_image_batch,
     upload_image_file,
 )
 
@@ -46,6 +135,13 @@ print_config()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = SECRET_KEY
 
+# Bytecode de plantillas en disco y etiqueta {% cache %} (antes de que Flask cree el entorno de Jinja)
+app.jinja_options = {
+    **app.jinja_options,
+    'bytecode_cache': build_bytecode_cache(JINJA_BYTECODE_CACHE_DIR),
+    'extensions': [*app.jinja_options.get('extensions', ()), FragmentCacheExtension],
+}
+
 # Configurar sesiones temporales (no persistentes)
 app.config['PERMANENT_SESSION_LIFETIME'] = SESSION_LIFETIME
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -58,6 +154,135 @@ CORS(app, supports_credentials=True, origins=CORS_ORIGINS)
 FOLDER_SLUG_PATTERN = re.compile(r'^[\w-]{1,50}$')
 FILE_BASENAME_PATTERN = re.compile(r'^[\w-]{1,120}$')
 
+auth_logger = get_logger('auth')
+
+# Cliente compartido: no guarda estado por petición y reutiliza el pool keep-alive
+backend_client = APIClient(BACKEND_API_URL)
+
+# Un 2xx de un endpoint que no mira el token no prueba nada: no se cachea
+TOKEN_VALIDATION_CACHEABLE = TOKEN_VALIDATION_ENDPOINT.strip().rstrip('/') not in ('', '/health')
+
+# Tokens ya validados por el backend (por worker)
+token_validation_cache = TokenValidationCache(
+    ttl=TOKEN_CACHE_TTL,
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    local_decode=TOKEN_LOCAL_DECODE
+)
+
+# Estado de salud del backend sondeado en segundo plano (un hilo por worker)
+backend_health = BackendHealthMonitor(
+    BACKEND_API_URL,
+    interval=BACKEND_HEALTH_INTERVAL,
+    timeout=BACKEND_HEALTH_TIMEOUT,
+    degraded_latency=BACKEND_HEALTH_DEGRADED_LATENCY,
+    max_backoff=BACKEND_HEALTH_MAX_BACKOFF
+)
+
+# Respuestas GET del proxy revalidadas con ETag/Last-Modified (por worker)
+response_cache = ResponseCache(
+    max_bytes=PROXY_CACHE_MAX_BYTES,
+    max_entry_bytes=PROXY_CACHE_MAX_ENTRY_BYTES
+)
+
+# Huellas de contenido de static/ (se calculan una vez; en debug se revisan al editar)
+static_manifest = StaticManifest(app.static_folder, check_mtime=DEBUG_MODE)
+static_manifest.build()
+
+# Variantes .br/.gz de static/ (en debug no: los archivos cambian mientras se edita)
+precompressed_static = PrecompressedStatic(
+    app.static_folder,
+    STATIC_PRECOMPRESS_DIR,
+    min_bytes=STATIC_PRECOMPRESS_MIN_BYTES,
+    brotli_quality=STATIC_BROTLI_QUALITY,
+    gzip_level=STATIC_GZIP_LEVEL
+)
+if STATIC_PRECOMPRESS_ENABLED and not DEBUG_MODE:
+    precompressed_static.build(static_manifest.items())
+
+# Fragmentos de las vistas SPA: se separan por rol; lo propio de cada usuario queda fuera de {% cache %}
+fragment_cache = FragmentCache(max_bytes=FRAGMENT_CACHE_MAX_BYTES, max_entry_bytes=FRAGMENT_CACHE_MAX_ENTRY_BYTES)
+if FRAGMENT_CACHE_ENABLED and not DEBUG_MODE:
+    app.jinja_env.fragment_cache = fragment_cache
+app.jinja_env.fragment_cache_scope = lambda: (session.get('user') or {}).get('role', '')
+
+VALID_ROLES = ['empresa', 'super_admin']
+
+
+def _redirect_for_role(user_role):
+    """Redirige al área permitida para el rol indicado"""
+    if user_role == 'empresa':
+        return redirect(url_for('empresa_dashboard'))
+    elif user_role == 'super_admin':
+        return redirect(url_for('admin_dashboard'))
+    # Unknown role, redirect to login
+    return redirect(url_for('login'))
+
+def _check_role_access(allowed_roles):
+    """Respuesta de redirección si la petición no tiene acceso; `None` si puede continuar"""
+    # Check if user is logged in - prioritize cookie over session
+    auth_token = request.cookies.get('auth_token')
+    user_data = session.get('user')
+    
+    # If no cookie token and no session, redirect to login
+    if not auth_token and not user_data:
+        ##print(f"❌ No auth token or session found for route {request.endpoint}")
+        return redirect(url_for('login'))
+    
+    # If we have cookie but no session, we need to validate the cookie
+    if auth_token and not user_data:
+        # Primero la caché local: solo se consulta al backend si no hay entrada
+        token_state, token_role = token_validation_cache.lookup(auth_token)
+        if token_state == 'expired':
+            if not request.cookies.get('refresh_token'):
+                return redirect(url_for('login'))
+            # Con refresh_token la validación contra el backend renueva el token en el primer 401
+            token_state = 'unknown'
+        if token_role in VALID_ROLES and token_role not in allowed_roles:
+            return _redirect_for_role(token_role)
+        if token_state == 'valid':
+            return None
+
+        try:
+            # Validate token with backend
+            client = getattr(g, 'api_client', backend_client)
+            response = client.get(TOKEN_VALIDATION_ENDPOINT)
+            if not response.ok:
+                #print(f"❌ Invalid auth token for route {request.endpoint}")
+                return redirect(url_for('login'))
+
+            if TOKEN_VALIDATION_CACHEABLE:
+                token_validation_cache.store(auth_token)
+            
+            # Token is valid but we don't have user data in session
+            # This is OK - the backend will handle authorization
+            #print(f"✅ Valid auth token found for route {request.endpoint}")
+            # Continue with the request - backend will validate role
+            return None
+        except Exception as e:
+            #print(f"❌ Error validating auth token: {e}")
+            return redirect(url_for('login'))
+    
+    # If we have session data, validate role
+    if user_data:
+        user_role = user_data.get('role')
+        #print(f"🔍 User role: {user_role}, Required roles: {allowed_roles}, Route: {request.endpoint}")
+        
+        # Validate that user role is one of the valid roles in our system
+        if user_role not in VALID_ROLES:
+            #print(f"❌ Invalid role {user_role} for user")
+            session.clear()  # Clear invalid session
+            return redirect(url_for('login'))
+        
+        # Check if user has required role
+        if user_role not in allowed_roles:
+            #print(f"❌ Access denied. User role {user_role} not in {allowed_roles}")
+            # Redirect based on role - users can only access their allowed areas
+            return _redirect_for_role(user_role)
+        
+        #print(f"✅ Access granted for {user_role} to {request.endpoint}")
+    
+    return None
+
 # Helper function to check roles
 def require_role(allowed_roles):
     """Decorator to require specific roles for routes"""
@@ -65,74 +290,49 @@ def require_role(allowed_roles):
         from functools import wraps
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Check if user is logged in - prioritize cookie over session
-            auth_token = request.cookies.get('auth_token')
-            user_data = session.get('user')
-            
-            # If no cookie token and no session, redirect to login
-            if not auth_token and not user_data:
-                ##print(f"❌ No auth token or session found for route {request.endpoint}")
-                return redirect(url_for('login'))
-            
-            # If we have cookie but no session, we need to validate the cookie
-            if auth_token and not user_data:
-                try:
-                    # Validate token with backend
-                    client = getattr(g, 'api_client', APIClient(BACKEND_API_URL))
-                    response = client.get('/health')
-                    if not response.ok:
-                        #print(f"❌ Invalid auth token for route {request.endpoint}")
-                        return redirect(url_for('login'))
-                    
-                    # Token is valid but we don't have user data in session
-                    # This is OK - the backend will handle authorization
-                    #print(f"✅ Valid auth token found for route {request.endpoint}")
-                    # Continue with the request - backend will validate role
-                    return f(*args, **kwargs)
-                except Exception as e:
-                    #print(f"❌ Error validating auth token: {e}")
-                    return redirect(url_for('login'))
-            
-            # If we have session data, validate role
-            if user_data:
-                user_role = user_data.get('role')
-                #print(f"🔍 User role: {user_role}, Required roles: {allowed_roles}, Route: {request.endpoint}")
-                
-                # Validate that user role is one of the valid roles in our system
-                valid_roles = ['empresa', 'super_admin']
-                if user_role not in valid_roles:
-                    #print(f"❌ Invalid role {user_role} for user")
-                    session.clear()  # Clear invalid session
-                    return redirect(url_for('login'))
-                
-                # Check if user has required role
-                if user_role not in allowed_roles:
-                    #print(f"❌ Access denied. User role {user_role} not in {allowed_roles}")
-                    # Redirect based on role - users can only access their allowed areas
-                    if user_role == 'empresa':
-                        return redirect(url_for('empresa_dashboard'))
-                    elif user_role == 'super_admin':
-                        return redirect(url_for('admin_dashboard'))
-                    else:
-                        # Unknown role, redirect to login
-                        return redirect(url_for('login'))
-                
-                #print(f"✅ Access granted for {user_role} to {request.endpoint}")
-            
+            # Solo se mide la autorización, no la vista
+            with timed('require_role'):
+                denied = _check_role_access(allowed_roles)
+            if denied is not None:
+                return denied
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
 # Validar conectividad con backend
 def validate_backend_connection():
-    """Valida si el backend está disponible"""
-    try:
-        client = APIClient(BACKEND_API_URL)
-        response = client.get('/health')
-        return response.ok
-    except Exception as e:
-        #print(f"❌ Backend no disponible: {e}")
-        return False
+    """Valida si el backend está disponible según el último sondeo en segundo plano"""
+    with timed('validate_backend_connection'):
+        return backend_health.is_available()
+
+# ========== MÉTRICAS ==========
+# Se registra antes que el resto de hooks para medir también sus redirecciones
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    http_in_flight.labels(server='flask').inc()
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    http_in_flight.labels(server='flask').dec()
+    # Plantilla de la ruta (no la URL) para acotar la cardinalidad
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    status = '500' if error is not None else str(g.pop('metrics_status', 500))
+    http_request_duration.labels(endpoint=endpoint, method=request.method).observe(time.perf_counter() - started)
+    http_requests.labels(endpoint=endpoint, method=request.method, status=status).inc()
+
+@before_render_template.connect_via(app)
+def start_template_metrics(sender, template, context, **extra):
+    g.setdefault('metrics_template_started', []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def finish_template_metrics(sender, template, context, **extra):
+    stack = g.get('metrics_template_started')
+    if stack:
+        template_render_duration.labels(template=template.name or 'inline').observe(time.perf_counter() - stack.pop())
 
 # Inicializar cliente de API antes de cada request
 @app.before_request
@@ -154,7 +354,7 @@ def attach_api_client():
             return redirect(url_for('login', error='backend_unavailable'))
     
     # Inicializar cliente API simplificado
-    g.api_client = APIClient(BACKEND_API_URL)
+    g.api_client = backend_client
 
 # ========== RUTAS PÚBLICAS ==========
 @app.route('/')
@@ -184,16 +384,15 @@ def login():
         password = request.form.get('password')
         
         # Hacer la petición al backend Y transferir cookies
-        res = requests.post(f"{BACKEND_API_URL}/auth/login", 
-                           json={"usuario": usuario, "password": password})
+        res = get_backend_session().post(
+            f"{BACKEND_API_URL}/auth/login",
+            json={"usuario": usuario, "password": password}
+        )
         
         if res.ok:
             data = res.json()
-            print("=== LOGIN DEBUG ===")
-            print(f"Backend cookies found: {len(list(res.cookies))}")
-            for cookie in res.cookies:
-                print(f"Cookie: {cookie.name} = {cookie.value[:50]}...")
-            print("=" * 20)
+            # Solo nombres de cookies: nunca sus valores
+            auth_logger.debug('login_cookies', cookie_names=[cookie.name for cookie in res.cookies])
             
             session['user'] = data.get('user')
             session.permanent = True  # Hacer que la sesión dure tanto como el refresh token
@@ -231,6 +430,7 @@ def login():
 @app.route('/logout')
 def logout():
     """Cerrar sesión - Redirect para limpiar estados"""
+    token_validation_cache.invalidate(request.cookies.get('auth_token'))
     session.clear()
     return redirect(url_for('login'))
 
@@ -238,7 +438,7 @@ def logout():
 def health_check():
     """Health check endpoint para Docker y monitoreo"""
     try:
-        # Verificar conectividad con backend
+        # Verificar conectividad con backend (estado cacheado, sin llamada de red)
         backend_status = validate_backend_connection()
         
         return jsonify({
@@ -246,7 +446,25 @@ def health_check():
             'frontend': 'running',
             'backend_connection': 'connected' if backend_status else 'disconnected',
             'timestamp': os.environ.get('HOSTNAME', 'unknown'),
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'backend_health': backend_health.snapshot(),
+            'connection_pool': get_pool_stats(),
+            'token_validation': token_validation_cache.stats(),
+            'token_refresh': refresh_coordinator.stats(),
+            'proxy_cache': response_cache.stats(),
+            'request_coalescing': request_coalescer.stats(),
+            'empresa_statistics': empresa_stats_cache.stats(),
+            'image_folders': folder_index_cache.stats(),
+            'image_folder_files': folder_files_cache.stats(),
+            'image_thumbnails': thumbnail_cache.stats(),
+            'media_cache': media_cache.stats(),
+            'alert_images': alert_image_store.stats(),
+            'metrics': {'available': metrics_available()},
+            'static_manifest': static_manifest.stats(),
+            'static_precompressed': precompressed_static.stats(),
+            'compression': compression_stats(),
+            'templates': template_warmup,
+            'fragment_cache': fragment_cache.stats()
         }), 200 if backend_status else 503
     except Exception as e:
         return jsonify({
@@ -254,6 +472,33 @@ def health_check():
             'error': str(e),
             'timestamp': os.environ.get('HOSTNAME', 'unknown')
         }), 503
+
+def _metrics_request_allowed():
+    """Con METRICS_TOKEN exige Bearer; sin él, solo conexiones directas desde la red interna"""
+    if METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        return hmac.compare_digest(authorization.encode(), f'Bearer {METRICS_TOKEN}'.encode())
+    # Una petición reenviada por un proxy inverso llega con IP interna: no basta la dirección
+    if request.headers.get('X-Forwarded-For'):
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
+@app.route('/internal/metrics')
+def internal_metrics():
+    """Métricas de todos los workers en formato de texto de Prometheus"""
+    if not _metrics_request_allowed():
+        return jsonify({'error': 'No autorizado'}), 403
+    if not metrics_available():
+        return jsonify({'error': 'Métricas no disponibles'}), 503
+    body, content_type = render_latest()
+    response = Response(body, content_type=content_type)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/api/sync-session', methods=['POST'])
 def sync_session():
     """Sincroniza la cookie JWT con la sesión Flask"""
@@ -295,11 +540,39 @@ def sync_session():
             'error': f'Error interno: {str(e)}'
         }), 500
 
+def _transfer_backend_cookies(flask_response, backend_response):
+    """Copia al navegador las cookies emitidas por el backend."""
+    for cookie in backend_response.cookies:
+        flask_response.set_cookie(
+            cookie.name,
+            cookie.value,
+            httponly=True,
+            secure=False,
+            samesite='Lax',
+            path='/'
+        )
+
+
+def _cache_scope() -> str:
+    """Ámbito de caché del usuario actual: id de sesión o hash del token."""
+    return cache_scope(session.get('user'), request.cookies.get('auth_token', ''))
+
+
+def _should_stream_request_body() -> bool:
+    """Cuerpos no JSON o mayores al límite se reenvían sin pasar por get_json."""
+    if not PROXY_STREAMING_ENABLED:
+        return False
+    if not is_json_content_type(request.content_type):
+        is_chunked = 'chunked' in request.headers.get('Transfer-Encoding', '').lower()
+        return bool(request.content_length) or is_chunked
+    return request.content_length is None or request.content_length > PROXY_BUFFER_LIMIT
+
+
 # Proxy de todas las peticiones hacia el backend
 @app.route(f'{PROXY_PREFIX}/<path:endpoint>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
 def proxy_api(endpoint):
     # Endpoints públicos que no requieren autenticación
-    public_endpoints = ['auth/login', 'api/contact/send']
+    public_endpoints = PUBLIC_PROXY_ENDPOINTS
     
     if endpoint not in public_endpoints:
         # Verificar que tengamos token de autenticación para endpoints protegidos
@@ -320,12 +593,23 @@ def proxy_api(endpoint):
     #     #print(f"  - Usuario: {session.get('user', {}).get('username', 'NO USER')}")
     
     data = None
+    body_kwargs = {}
+    headers = {'Content-Type': 'application/json'}
     if request.method in ['POST', 'PUT', 'PATCH']:
-        data = request.get_json(silent=True)
-        #print(f"PROXY DATA: PROXY: Datos enviados - {data}")
+        if _should_stream_request_body():
+            headers['Content-Type'] = request.content_type or 'application/octet-stream'
+            body_kwargs['data'] = build_request_body(
+                request.stream,
+                request.content_length,
+                PROXY_STREAM_CHUNK_SIZE
+            )
+            # Un cuerpo en streaming no se puede reenviar tras un refresh de token
+            body_kwargs['_retry_attempted'] = True
+        else:
+            data = request.get_json(silent=True)
+            #print(f"PROXY DATA: PROXY: Datos enviados - {data}")
 
     try:
-        headers = {'Content-Type': 'application/json'}
         extra_cookies = dict(request.cookies)
 
         # Agregar User-Agent específico para endpoint de contacto
@@ -333,15 +617,75 @@ def proxy_api(endpoint):
             headers['User-Agent'] = 'RESCUE-Frontend/1.0'
 
         backend_endpoint = f"/{endpoint}" if not endpoint.startswith('/') else endpoint
+
+        # GET cacheables: se revalida la copia local con el backend
+        cache_key = None
+        cached_entry = None
+        if request.method == 'GET' and PROXY_CACHE_ENABLED and endpoint not in public_endpoints:
+            cache_key = response_cache.make_key(
+                _cache_scope(),
+                backend_endpoint,
+                request.args.items(multi=True)
+            )
+            cached_entry = response_cache.get(cache_key)
+            if cached_entry is not None:
+                headers.update(cached_entry.conditional_headers())
+
         resp = g.api_client.request(
             request.method,
             backend_endpoint,
             params=request.args,
             json=data,
             headers=headers,
-            cookies=extra_cookies
+            cookies=extra_cookies,
+            stream=PROXY_STREAMING_ENABLED,
+            **body_kwargs
+        )
+
+        # Cualquier escritura invalida la colección afectada
+        if request.method in ['POST', 'PUT', 'PATCH', 'DELETE'] and resp.status_code < 400:
+            response_cache.invalidate_prefix(resource_prefix(backend_endpoint))
+
+        if cached_entry is not None:
+            if resp.status_code == 304:
+                # El backend confirmó que la copia local sigue vigente
+                resp.close()
+                response_cache.record_revalidated()
+                flask_response = Response(cached_entry.body, status=200, headers=cached_entry.headers)
+                _transfer_backend_cookies(flask_response, resp)
+                return flask_response.make_conditional(request)
+            response_cache.discard(cache_key)
+
+        # Lo que el backend ya comprimió se relaya sin decodificar si el navegador lo acepta
+        # (salvo GET cacheables: la caché guarda el cuerpo decodificado)
+        relay_encoded = cache_key is None and accepts_encoding(
+            request.accept_encodings,
+            resp.headers.get('Content-Encoding')
         )
+
+        # Respuestas binarias o JSON grandes se relayan por bloques sin cargarlas en memoria
+        # (si el cuerpo ya se cargó, p. ej. en un GET coalescido, `raw` está vacío: se usa `content`)
+        if (
+            PROXY_STREAMING_ENABLED
+            and not body_consumed(resp)
+            and (relay_encoded or not should_buffer_response(resp, PROXY_BUFFER_LIMIT))
+        ):
+            flask_response = Response(
+                iter_upstream(resp, PROXY_STREAM_CHUNK_SIZE),
+                status=resp.status_code,
+                headers=passthrough_headers(resp),
+                direct_passthrough=True
+            )
+            flask_response.call_on_close(resp.close)
+            _transfer_backend_cookies(flask_response, resp)
+            return flask_response
+
         #print(f"PROXY RESPONSE: PROXY: Respuesta del backend - Status: {resp.status_code}, Content-Length: {len(resp.content) if resp.content else 0}")
+
+        if cache_key is not None and resp.status_code == 200 and not resp.cookies:
+            new_entry = CachedResponse.from_backend(resp)
+            if new_entry is not None:
+                response_cache.put(cache_key, new_entry)
         
         # Log del contenido para endpoints críticos
         if endpoint in ['api/hardware', 'api/empresas', 'api/hardware-types'] or 'toggle-status' in endpoint:
@@ -367,28 +711,24 @@ def proxy_api(endpoint):
             # Crear respuesta Flask para transferir cookies del backend al navegador
             flask_response = make_response(resp.content, resp.status_code)
             
-            # Transferir headers (excepto Set-Cookie que se maneja separadamente)
-            for name, value in resp.headers.items():
-                if name.lower() not in ['set-cookie', 'content-length']:
-                    flask_response.headers[name] = value
+            # Transferir headers (el cuerpo ya viene decodificado; Set-Cookie se maneja separadamente)
+            for name, value in decoded_headers(resp):
+                flask_response.headers[name] = value
             
             # TRANSFERIR COOKIES del backend al navegador
-            for cookie in resp.cookies:
-                flask_response.set_cookie(
-                    cookie.name,
-                    cookie.value,
-                    httponly=True,
-                    secure=False,
-                    samesite='Lax',
-                    path='/'
-                )
+            _transfer_backend_cookies(flask_response, resp)
             
             return flask_response
         else:
             # Sin cookies, devolver respuesta normal
-            return (resp.content, resp.status_code, resp.headers.items())
+            flask_response = make_response((resp.content, resp.status_code, decoded_headers(resp)))
+            if request.method == 'GET' and resp.status_code == 200:
+                # 304 sin cuerpo si el navegador ya tiene esta versión
+                flask_response.make_conditional(request)
+            return flask_response
     except Exception as e:
         #print(f"PROXY ERROR: PROXY ERROR en /{endpoint}: {e}")
+        proxy_errors.labels(kind='exception').inc()
         return jsonify({'error': 'Error del servidor'}), 500
 
 # ========== RUTAS DEL DASHBOARD - PROTEGIDAS POR SESION Y ROL ==========
@@ -411,8 +751,26 @@ def super_admin_dashboard():
         if not auth_token:
             raise RuntimeError('Missing auth token for dashboard data')
 
-        dashboard_stats_response = g.api_client.get('/api/dashboard/stats')
-        performance_response = g.api_client.get('/api/dashboard/system-performance')
+        def _wrapped_data(response):
+            if response.ok:
+                payload = response.json()
+                if payload.get('success') and 'data' in payload:
+                    return payload['data']
+            return None
+
+        # Las seis llamadas se cargan en paralelo: latencia = max(latencias)
+        responses = g.api_client.get_many({
+            'stats': '/api/dashboard/stats',
+            'performance': '/api/dashboard/system-performance',
+            'recent_companies': {'endpoint': '/api/dashboard/recent-companies', 'transform': _wrapped_data},
+            'recent_users': {'endpoint': '/api/dashboard/recent-users', 'transform': _wrapped_data},
+            'activity_chart': {'endpoint': '/api/dashboard/activity-chart', 'transform': _wrapped_data},
+            'distribution_chart': {'endpoint': '/api/dashboard/distribution-chart', 'transform': _wrapped_data},
+        })
+        dashboard_stats_response = responses['stats']
+        performance_response = responses['performance']
+        if dashboard_stats_response is None or performance_response is None:
+            raise RuntimeError('Dashboard stats unavailable')
         
         # Inicializar datos con estructura básica
         dashboard_data = {
@@ -461,47 +819,10 @@ def super_admin_dashboard():
         else:
             print(f"❌ Failed to load performance metrics: {performance_response.status_code}")
         
-        # Obtener companies y users recientes usando el cliente autenticado
-        try:
-            companies_response = g.api_client.get('/api/dashboard/recent-companies')
-            if companies_response.ok:
-                companies_data = companies_response.json()
-                if companies_data.get('success') and 'data' in companies_data:
-                    dashboard_data['recent_companies'] = companies_data['data']
-                    #print(f"✅ Recent companies loaded: {len(dashboard_data['recent_companies'])} items")
-        except Exception as e:
-            print(f"⚠️ Error loading recent companies: {e}")
-        
-        try:
-            users_response = g.api_client.get('/api/dashboard/recent-users')
-            if users_response.ok:
-                users_data = users_response.json()
-                if users_data.get('success') and 'data' in users_data:
-                    dashboard_data['recent_users'] = users_data['data']
-                    #print(f"✅ Recent users loaded: {len(dashboard_data['recent_users'])} items")
-        except Exception as e:
-            print(f"⚠️ Error loading recent users: {e}")
-        
-        # Obtener gráficos usando el cliente autenticado
-        try:
-            activity_response = g.api_client.get('/api/dashboard/activity-chart')
-            if activity_response.ok:
-                activity_data = activity_response.json()
-                if activity_data.get('success') and 'data' in activity_data:
-                    dashboard_data['activity_chart'] = activity_data['data']
-                    #print(f"✅ Activity chart loaded")
-        except Exception as e:
-            print(f"⚠️ Error loading activity chart: {e}")
-        
-        try:
-            distribution_response = g.api_client.get('/api/dashboard/distribution-chart')
-            if distribution_response.ok:
-                distribution_data = distribution_response.json()
-                if distribution_data.get('success') and 'data' in distribution_data:
-                    dashboard_data['distribution_chart'] = distribution_data['data']
-                    #print(f"✅ Distribution chart loaded")
-        except Exception as e:
-            print(f"⚠️ Error loading distribution chart: {e}")
+        # Companies, users y gráficos recientes (None si la llamada falló)
+        for key in ('recent_companies', 'recent_users', 'activity_chart', 'distribution_chart'):
+            if responses[key] is not None:
+                dashboard_data[key] = responses[key]
         
         #print(f"🔥 SUPER ADMIN DASHBOARD: Datos finales para renderizar:")
         #print(f"  - Summary Stats: {dashboard_data.get('summary_stats', {})}")
@@ -1015,20 +1336,94 @@ def admin_imagenes():
         active_page='imagenes'
     )
 
+# Campos del servicio de imágenes que cambian cuando se vuelve a subir un archivo
+THUMBNAIL_VERSION_FIELDS = ('etag', 'hash', 'checksum', 'sha256', 'md5', 'updated_at', 'modified', 'mtime', 'last_modified', 'size')
+
+
+def _thumbnail_version(file_entry) -> str:
+    """Versión de contenido de un archivo para la URL de su miniatura ('' si el servicio no da metadatos)."""
+    metadata = file_entry.get('metadata') or {}
+    values = [str(metadata[field]) for field in THUMBNAIL_VERSION_FIELDS if metadata.get(field) not in (None, '')]
+    if not values:
+        return ''
+    return hashlib.sha1('|'.join(values).encode('utf-8')).hexdigest()[:12]
+
+
+def _folder_files_response(folder_name: str):
+    """Página de archivos de una carpeta según `offset`, `limit` y `prefix` del query string.
+
+    Sin `limit` se devuelve el listado completo (compatibilidad con clientes previos).
+    """
+    offset = max(request.args.get('offset', default=0, type=int) or 0, 0)
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), IMAGE_FILES_PAGE_MAX)
+    prefix = (request.args.get('prefix') or '').strip()
+
+    page, error_message, service_url = fetch_folder_files_page(folder_name, offset, limit, prefix)
+    if FOLDER_SLUG_PATTERN.fullmatch(folder_name):
+        for file_entry in page['files']:
+            if (mimetypes.guess_type(file_entry['name'])[0] or '').startswith('image/'):
+                file_entry['thumbnail_url'] = url_for(
+                    'admin_imagenes_thumbnail',
+                    folder_name=folder_name,
+                    file_name=file_entry['name'],
+                    v=_thumbnail_version(file_entry) or None
+                )
+    response_data = {
+        'success': error_message == '',
+        'folder': folder_name,
+        'files': page['files'],
+        'pagination': {
+            'offset': page['offset'],
+            'limit': page['limit'],
+            'total': page['total'],
+            'next_offset': page['next_offset'],
+            'has_more': page['next_offset'] is not None,
+            'prefix': prefix or None
+        },
+        'service_url': service_url,
+        'error': error_message or None
+    }
+    status_code = 200 if error_message == '' else 502
+    return jsonify(response_data), status_code
+
+
 @app.route('/admin/imagenes/<path:folder_name>/files')
 @require_role(['super_admin'])
 def admin_imagenes_folder_files(folder_name):
-    """Devuelve los archivos de una carpeta en formato JSON."""
-    files, error_message, endpoint = fetch_folder_files(folder_name)
-    success = error_message == ''
-    status_code = 200 if success else 502
-    return jsonify({
-        'success': success,
-        'folder': folder_name,
-        'files': files,
-        'error': error_message or None,
-        'service_url': endpoint
-    }), status_code
+    """Devuelve los archivos de una carpeta en formato JSON (paginado)."""
+    return _folder_files_response(folder_name)
+
+
+@app.route('/admin/imagenes/thumbnails/<folder_name>/<file_name>')
+@require_role(['super_admin'])
+def admin_imagenes_thumbnail(folder_name, file_name):
+    """Miniatura de una imagen (`?s=` tamaño en píxeles) con caché en disco.
+
+    Sin Pillow, o si el original no puede reducirse, redirige al original.
+    """
+    if not FOLDER_SLUG_PATTERN.fullmatch(folder_name) or file_name in ('.', '..'):
+        return jsonify({'success': False, 'error': 'Ruta de archivo inválida.'}), 400
+
+    if not thumbnails_available():
+        return redirect(build_image_file_url(folder_name, file_name))
+
+    size = pick_size(request.args.get('s', type=int))
+    fmt = pick_format('image/webp' in request.headers.get('Accept', ''))
+    data, _ = fetch_image_thumbnail(folder_name, file_name, size, fmt)
+    if data is None:
+        return redirect(build_image_file_url(folder_name, file_name))
+
+    response = Response(data, mimetype=THUMBNAIL_MIMETYPES[fmt])
+    response.set_etag(hashlib.sha1(data).hexdigest()[:24])
+    if request.args.get('v'):
+        response.headers['Cache-Control'] = f'private, max-age={IMAGE_THUMBNAIL_MAX_AGE}'
+    else:
+        # Sin versión en la URL un archivo resubido conserva la URL: se revalida con el ETag
+        response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept')
+    return response.make_conditional(request)
 
 
 @app.route('/admin/imagenes/upload', methods=['POST'])
@@ -1038,6 +1433,13 @@ def admin_upload_image_file():
     folder = (request.form.get('folder') or '').strip()
     filename = (request.form.get('filename') or '').strip()
     file_storage = request.files.get('file')
+    upload_id = (request.form.get('upload_id') or request.headers.get('X-Upload-Id') or '').strip()
+
+    if upload_id and not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+        return jsonify({
+            'success': False,
+            'error': 'Identificador de subida inválido.'
+        }), 400
 
     if not folder or not FOLDER_SLUG_PATTERN.fullmatch(folder):
         return jsonify({
@@ -1057,7 +1459,7 @@ def admin_upload_image_file():
             'error': 'Selecciona un archivo válido para cargar.'
         }), 400
 
-    success, error_message = upload_image_file(folder, filename, file_storage)
+    success, error_message = upload_image_file(folder, filename, file_storage, upload_id)
     status_code = 201 if success else 502
     response_data = {
         'success': success,
@@ -1073,6 +1475,128 @@ def admin_upload_image_file():
     return jsonify(response_data), status_code
 
 
+@app.route('/admin/imagenes/upload/batch', methods=['POST'])
+@require_role(['super_admin'])
+def admin_upload_image_batch():
+    """Carga varios archivos (o un .zip) en paralelo en la carpeta indicada.
+
+    El nombre base de cada archivo es su nombre original sin extensión. La
+    respuesta incluye el resultado por archivo: 201 si todos se cargaron, 207
+    si solo algunos y 502 si ninguno.
+    """
+    folder = (request.form.get('folder') or '').strip()
+    if not folder or not FOLDER_SLUG_PATTERN.fullmatch(folder):
+        return jsonify({
+            'success': False,
+            'error': 'La carpeta es obligatoria y solo admite letras, números o guiones.'
+        }), 400
+
+    uploads = [
+        storage for storage in request.files.getlist('files')
+        if getattr(storage, 'filename', '').strip()
+    ]
+    if not uploads:
+        return jsonify({
+            'success': False,
+            'error': 'Selecciona al menos un archivo válido para cargar.'
+        }), 400
+
+    archives = []
+    items = []
+    rejected = []
+    try:
+        for storage in uploads:
+            if not is_zip_upload(storage):
+                items.append(storage)
+                continue
+            try:
+                archive = zipfile.ZipFile(storage.stream)
+            except (zipfile.BadZipFile, OSError):
+                rejected.append({
+                    'source': storage.filename,
+                    'filename': None,
+                    'success': False,
+                    'error': 'El archivo comprimido no es un .zip válido.'
+                })
+                continue
+            archives.append(archive)
+            items.extend(zip_members(archive))
+
+        if len(items) > IMAGES_BATCH_MAX_FILES:
+            return jsonify({
+                'success': False,
+                'error': f'El lote supera el máximo de {IMAGES_BATCH_MAX_FILES} archivos.'
+            }), 400
+
+        valid_items = []
+        for item in items:
+            source = os.path.basename(item.filename.replace('\\', '/'))
+            basename = os.path.splitext(source)[0]
+            if FILE_BASENAME_PATTERN.fullmatch(basename):
+                valid_items.append((basename, item))
+            else:
+                rejected.append({
+                    'source': source,
+                    'filename': None,
+                    'success': False,
+                    'error': 'El nombre base solo admite letras, números o guiones.'
+                })
+
+        results = upload_image_batch(folder, valid_items) if valid_items else []
+    finally:
+        for archive in archives:
+            archive.close()
+
+    results.extend(rejected)
+    uploaded = sum(1 for result in results if result['success'])
+    if not results:
+        return jsonify({
+            'success': False,
+            'error': 'El lote no contiene archivos para cargar.'
+        }), 400
+
+    if uploaded == len(results):
+        status_code = 201
+    elif uploaded:
+        status_code = 207
+    else:
+        status_code = 502
+
+    response_data = {
+        'success': uploaded == len(results),
+        'folder': folder,
+        'uploaded': uploaded,
+        'failed': len(results) - uploaded,
+        'results': results
+    }
+
+    if uploaded:
+        # Un único refresco del índice para todo el lote
+        updated_folders, _, _ = fetch_image_folders()
+        response_data['folders'] = updated_folders
+
+    return jsonify(response_data), status_code
+
+
+@app.route('/admin/imagenes/upload/<upload_id>/progress')
+@require_role(['super_admin'])
+def admin_upload_image_progress(upload_id):
+    """Progreso del envío de una subida hacia el servicio de imágenes."""
+    progress = upload_progress.get(upload_id)
+    if progress is None:
+        return jsonify({
+            'success': False,
+            'upload_id': upload_id,
+            'error': 'No hay información de progreso para esta subida.'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'progress': progress
+    })
+
+
 def _format_folder_display(folder_name: str) -> str:
     cleaned = (folder_name or '').replace('_', ' ').replace('-', ' ').strip()
     if not cleaned:
@@ -1106,16 +1630,7 @@ def admin_image_assets_folders():
 @app.route('/admin/image-assets/folders/<path:folder_name>/files')
 @require_role(['super_admin'])
 def admin_image_assets_folder_files(folder_name):
-    files, error_message, service_url = fetch_folder_files(folder_name)
-    response_data = {
-        'success': error_message == '',
-        'folder': folder_name,
-        'files': files,
-        'service_url': service_url,
-        'error': error_message or None
-    }
-    status_code = 200 if error_message == '' else 502
-    return jsonify(response_data), status_code
+    return _folder_files_response(folder_name)
 
 
 @app.route('/admin/imagenes/folders', methods=['POST'])
@@ -1164,6 +1679,85 @@ def admin_delete_image_folder(folder_name):
     return jsonify(response_data), status_code
 
 
+def _unsupported_media_response():
+    return jsonify({'success': False, 'error': 'Tipo de medio no permitido.'}), 415
+
+
+def _sandbox_media(response):
+    """Contenido de terceros servido desde el origen de la app: sin scripts ni recursos."""
+    response.headers['Content-Security-Policy'] = "default-src 'none'; sandbox"
+    return response
+
+
+@app.route('/media')
+def media_proxy():
+    """Relevo de imágenes, sonidos y videos (`?src=`) con caché en disco, Range y peticiones condicionales."""
+    source_url = (request.args.get('src') or '').strip()
+    if not is_allowed_media_source(source_url):
+        return jsonify({'success': False, 'error': 'Origen de medio no permitido.'}), 403
+
+    kind, meta = media_cache.resolve(source_url)
+    if kind == 'cached':
+        if not is_relayable_media_type(meta.get('content_type')):
+            return _unsupported_media_response()
+        response = send_file(
+            meta['path'],
+            mimetype=meta['content_type'],
+            conditional=True,
+            etag=meta['etag'],
+            last_modified=meta.get('last_modified'),
+            max_age=MEDIA_CLIENT_MAX_AGE
+        )
+        response.accept_ranges = 'bytes'
+        return _sandbox_media(response)
+
+    if kind == 'error':
+        if meta['status'] == 415:
+            return _unsupported_media_response()
+        status_code = 404 if meta['status'] == 404 else 502
+        return jsonify({'success': False, 'error': 'No fue posible obtener el medio.'}), status_code
+
+    try:
+        upstream = open_passthrough(source_url, request.headers.get('Range'))
+    except requests.RequestException as exc:
+        print(f"⚠️ Error retransmitiendo medio {source_url}: {exc}")
+        return jsonify({'success': False, 'error': 'No fue posible obtener el medio.'}), 502
+
+    if upstream.is_redirect:
+        upstream.close()
+        return jsonify({'success': False, 'error': 'No fue posible obtener el medio.'}), 502
+    if upstream.status_code in (200, 206) and not is_relayable_media_type(upstream.headers.get('Content-Type')):
+        upstream.close()
+        return _unsupported_media_response()
+
+    response = Response(
+        iter_upstream(upstream, PROXY_STREAM_CHUNK_SIZE),
+        status=upstream.status_code,
+        direct_passthrough=True
+    )
+    for header in PASSTHROUGH_HEADERS:
+        if header in upstream.headers:
+            response.headers[header] = upstream.headers[header]
+    if upstream.status_code in (200, 206):
+        response.headers['Cache-Control'] = f'public, max-age={MEDIA_CLIENT_MAX_AGE}'
+    return _sandbox_media(response)
+
+
+@app.route('/media/alert-images/<image_hash>')
+def alert_type_image(image_hash):
+    """Imagen de un tipo de alerta por hash de contenido (inmutable)."""
+    stored = alert_image_store.open(image_hash)
+    if stored is None:
+        return jsonify({'success': False, 'error': 'Imagen no encontrada.'}), 404
+
+    path, mimetype = stored
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=image_hash, max_age=31536000)
+    response.cache_control.immutable = True
+    # Evita que un SVG abierto directamente ejecute scripts en el origen de la app
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    return response
+
+
 @app.route('/empresa/hardware')
 @require_role(['empresa'])
 def empresa_hardware():
@@ -1269,25 +1863,17 @@ def empresa_dashboard():
     empresa_id = session.get('user', {}).get('id')
     empresa_username = session.get('user', {}).get('username')
     
-    # Get real empresa name from backend like in stats
+    # Snapshot cacheado (stale-while-revalidate) con nombre, KPIs y estructura mapeada
     empresa_nombre = 'Mi Empresa'
-    backend_data = {}
+    snapshot = None
     try:
         if empresa_id:
             auth_token = request.cookies.get('auth_token')
             if not auth_token:
                 raise RuntimeError('No auth token found in cookies')
 
-            response = g.api_client.get(f"/api/empresas/{empresa_id}/statistics")
-            if response.ok:
-                data = response.json()
-                if data.get('success'):
-                    backend_data = data.get('data', {})
-                    empresa_nombre = backend_data.get('empresa', {}).get('nombre', 'Mi Empresa')
-                else:
-                    raise Exception(f"Backend error: {data.get('errors', [])}")
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
+            snapshot = g.api_client.get_empresa_statistics_snapshot(empresa_id)
+            empresa_nombre = snapshot['empresa_nombre']
     except Exception as e:
         print(f"Error getting empresa statistics: {e}")
 
@@ -1310,18 +1896,8 @@ def empresa_dashboard():
         ]
     }
     
-    if backend_data:
-        empresa_data = backend_data.get('empresa', {})
-        usuarios_data = backend_data.get('usuarios', {})
-        hardware_info = backend_data.get('hardware', {})
-        alertas_info = backend_data.get('alertas', {})
-
-        dashboard_summary['kpis'].update({
-            'usuarios_total': usuarios_data.get('total_usuarios', 0),
-            'usuarios_activos': usuarios_data.get('usuarios_activos', 0),
-            'hardware_total': hardware_info.get('total_hardware', 0),
-            'alertas_activas': alertas_info.get('alertas_activas', 0)
-        })
+    if snapshot:
+        dashboard_summary['kpis'].update(snapshot['kpis'])
     else:
         print(f"⚠️ Dashboard KPIs fallback in use for empresa {empresa_id}")
 
@@ -1363,46 +1939,8 @@ def empresa_dashboard():
         }
     }
 
-    if backend_data:
-        empresa_statistics = {
-            'empresa': {
-                'id': backend_data.get('empresa', {}).get('id', empresa_id),
-                'nombre': backend_data.get('empresa', {}).get('nombre', empresa_nombre),
-                'activa': backend_data.get('empresa', {}).get('activa', True),
-                'fecha_creacion': backend_data.get('empresa', {}).get('fecha_creacion', '2024-01-01')
-            },
-            'usuarios': {
-                'total': backend_data.get('usuarios', {}).get('total_usuarios', 0),
-                'activos': backend_data.get('usuarios', {}).get('usuarios_activos', 0),
-                'inactivos': backend_data.get('usuarios', {}).get('usuarios_inactivos', 0)
-            },
-            'hardware': {
-                'total': backend_data.get('hardware', {}).get('total_hardware', 0),
-                'activos': backend_data.get('hardware', {}).get('hardware_activo', 0),
-                'inactivos': backend_data.get('hardware', {}).get('hardware_inactivo', 0),
-                'por_tipo': backend_data.get('hardware', {}).get('por_tipo', {
-                    'botonera': 0,
-                    'semaforo': 0,
-                    'televisor': 0,
-                    'pantalla': 0
-                })
-            },
-            'alertas': {
-                'total': backend_data.get('alertas', {}).get('total_alertas', 0),
-                'activas': backend_data.get('alertas', {}).get('alertas_activas', 0),
-                'resueltas': backend_data.get('alertas', {}).get('alertas_inactivas', 0),
-                'por_prioridad': {
-                    'critica': backend_data.get('alertas', {}).get('alertas_por_prioridad', {}).get('critica', 0),
-                    'alta': backend_data.get('alertas', {}).get('alertas_por_prioridad', {}).get('alta', 0),
-                    'media': backend_data.get('alertas', {}).get('alertas_por_prioridad', {}).get('media', 0),
-                    'baja': backend_data.get('alertas', {}).get('alertas_por_prioridad', {}).get('baja', 0)
-                }
-            },
-            'actividad_reciente': {
-                'logs_ultimos_30_dias': backend_data.get('alertas', {}).get('alertas_recientes_30d', 0),
-                'ultima_actividad': backend_data.get('empresa', {}).get('ultima_actividad', '2024-07-20T10:30:00Z')
-            }
-        }
+    if snapshot:
+        empresa_statistics = snapshot['empresa_statistics']
 
     default_view = request.args.get('view') or 'dashboard'
     allowed_views = {'dashboard', 'usuarios', 'hardware', 'stats', 'alertas', 'alertas-inactivas'}
@@ -1616,18 +2154,52 @@ def empresa_perfil():
     """Perfil de empresa - Redirige a stats por ahora"""
     return redirect(url_for('empresa_stats'))
 
+# ========== ARCHIVOS ESTÁTICOS ==========
+def serve_static(filename):
+    """Archivos de static/; los pedidos por su huella de contenido se cachean como inmutables"""
+    original = static_manifest.original(filename)
+    name = original or filename
+    max_age = STATIC_IMMUTABLE_MAX_AGE if original is not None else None
+
+    # Variante precomprimida según Accept-Encoding (sin comprimir en la petición)
+    variant = precompressed_static.negotiate(name, request.accept_encodings)
+    if variant is not None:
+        encoding, variant_path = variant
+        response = send_file(
+            variant_path,
+            mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            max_age=max_age,
+            conditional=True
+        )
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(app.static_folder, name, max_age=max_age)
+
+    if precompressed_static.has_variants(name):
+        response.vary.add('Accept-Encoding')
+    if original is not None:
+        response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+@app.template_global()
+def static_url(filename):
+    """URL con huella de contenido de un archivo estático"""
+    return url_for('static', filename=static_manifest.fingerprinted(filename) or filename)
+
 # ========== CONTEXTO GLOBAL ==========
 @app.context_processor
 def inject_config():
     """Inyectar configuración en todas las plantillas"""
-    import time
     return dict(
         api_url=PROXY_PREFIX,
         websocket_url=WEBSOCKET_URL,
         app_name="Rescue Dashboard",
         version="1.0.0",
         current_user=session.get('user'),
-        cache_version=f"v{int(time.time())}"
+        media_proxy_url=url_for('media_proxy'),
+        media_sources=list(MEDIA_PROXY_ALLOWED_PREFIXES)
     )
 
 
@@ -1635,6 +2207,7 @@ def inject_config():
 @app.after_request
 def after_request(response):
     """Headers de seguridad"""
+    g.metrics_status = response.status_code
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
     response.headers['X-XSS-Protection'] = '1; mode=block'
@@ -1663,6 +2236,33 @@ def after_request(response):
     
     return response
 
+@app.after_request
+def compress_response(response):
+    """Comprime HTML/JSON generados en la petición (los streams y archivos se envían tal cual)"""
+    if request.method == 'HEAD' or response.direct_passthrough or response.is_streamed:
+        return response
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return response
+    if not should_compress(
+        response.status_code,
+        response.content_type,
+        response.headers.get('Content-Encoding'),
+        response.calculate_content_length() or 0
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    compressed = compress_for(request.accept_encodings, response.get_data())
+    if compressed is None:
+        return response
+    encoding, body = compressed
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag = response.headers.get('ETag')
+    if etag:
+        response.headers['ETag'] = weak_etag(etag)
+    return response
+
 # ========== ENDPOINTS DE CONFIGURACIÓN DE CONTACTO SEGUROS ==========
 from utils.config import get_public_config, validate_contact_config
 import json
@@ -1781,6 +2381,10 @@ def test_login():
     import os
     return send_file(os.path.join(os.path.dirname(__file__), 'test_login_flow.html'))
 
+# ========== PRECOMPILACIÓN DE PLANTILLAS ==========
+# Al final del módulo: los filtros deben estar registrados para compilar
+template_warmup = precompile_templates(app.jinja_env) if TEMPLATE_PRECOMPILE else {'precompiled': 0}
+
 # ========== CONFIGURACIÓN DE DEBUG ==========
 if __name__ == '__main__':
     #print("🚀 Iniciando Rescue Frontend...")
@@ -0,0 +1,6 @@
+# asgi.py - Punto de entrada del modo de servicio asíncrono (SERVER_MODE=async)
+from app import app, backend_client, response_cache
+from utils.async_gateway import AsyncProxyGateway
+
+# Proxy asíncrono nativo; el resto de rutas Flask corre tras el puente WSGI
+application = AsyncProxyGateway(app, backend_client=backend_client, response_cache=response_cache)
@@ -0,0 +1,35 @@
+# gunicorn.conf.py - Configuración de Gunicorn para producción
+#
+# SERVER_MODE=sync  -> workers sync con la app Flask (app:app)
+# SERVER_MODE=async -> workers uvicorn con el gateway ASGI (asgi:application)
+from utils.config import SERVER_MODE
+from utils.metrics import mark_process_dead, reset_multiprocess_dir
+
+bind = '0.0.0.0:5000'
+workers = 4
+timeout = 60
+keepalive = 2
+max_requests = 1000
+max_requests_jitter = 50
+preload_app = True
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+
+if SERVER_MODE == 'async':
+    # Miles de peticiones de proxy concurrentes por worker sobre un event loop
+    wsgi_app = 'asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app:app'
+    worker_class = 'sync'
+
+
+def on_starting(server):
+    # Los contadores de una ejecución anterior no deben sumarse a los nuevos workers
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    # Los gauges de peticiones en curso solo suman workers vivos
+    mark_process_dead(worker.pid)
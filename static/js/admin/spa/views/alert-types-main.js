@@ -594,7 +594,7 @@
       const imageMarkup = item.image
         ? `
         <figure class="alert-type-card__media">
-          <img src="${this.escapeAttribute(item.image)}" alt="Imagen de ${this.escapeAttribute(item.name)}" loading="lazy">
+          <img src="${this.escapeAttribute(this.mediaUrl(item.image))}" alt="Imagen de ${this.escapeAttribute(item.name)}" loading="lazy">
         </figure>
         `
         : '';
@@ -638,7 +638,7 @@
           </div>
           <div class="alert-type-card__sound-player">
             <p class="alert-type-card__section-title">Sonido asignado</p>
-            <audio controls preload="metadata" src="${this.escapeAttribute(item.sound)}" class="alert-type-card__audio"></audio>
+            <audio controls preload="metadata" src="${this.escapeAttribute(this.mediaUrl(item.sound))}" class="alert-type-card__audio"></audio>
           </div>
         </div>
         `
@@ -1192,7 +1192,7 @@
         this.elements.viewAudioContainer.innerHTML = hasSound
           ? `
             <p class="alert-type-card__section-title">Sonido asignado</p>
-            <audio controls preload="metadata" src="${this.escapeAttribute(detail.sound)}"></audio>
+            <audio controls preload="metadata" src="${this.escapeAttribute(this.mediaUrl(detail.sound))}"></audio>
           `
           : '';
       }
@@ -1635,7 +1635,7 @@
       }
 
       this.elements.soundPreview.innerHTML = `
-        <audio controls preload="metadata" src="${this.escapeAttribute(url)}"></audio>
+        <audio controls preload="metadata" src="${this.escapeAttribute(this.mediaUrl(url))}"></audio>
       `;
     }
 
@@ -1754,6 +1754,10 @@
         .replace(/'/g, '&#39;');
     }
 
+    mediaUrl(url) {
+      return typeof window.__buildMediaUrl === 'function' ? window.__buildMediaUrl(url) : url;
+    }
+
     escapeAttribute(value) {
       return String(value)
         .replace(/&/g, '&amp;')
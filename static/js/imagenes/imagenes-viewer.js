@@ -15,6 +15,9 @@
   const VIDEO_EXTENSIONS = ['.mp4', '.webm', '.ogg', '.mov'];
   const AUDIO_EXTENSIONS = ['.mp3', '.wav', '.ogg', '.aac'];
   const PDF_EXTENSIONS = ['.pdf'];
+  const FILES_PAGE_SIZE = 60;
+  const THUMBNAIL_SIZE = 320;
+  const UPLOAD_PROGRESS_INTERVAL = 1000;
 
 
   document.addEventListener('DOMContentLoaded', () => {
@@ -49,6 +52,8 @@
     let deleteSubmitting = false;
     let uploadSubmitting = false;
     let pendingDelete = null;
+    let activeFilesEndpoint = null;
+    let loadMoreButton = null;
 
     if (!modalElement) {
       return;
@@ -207,8 +212,10 @@
         titleElement.textContent = folderDisplay || 'Carpeta seleccionada';
       }
 
+      activeFilesEndpoint = endpoint;
       updateCounter();
       renderFiles([]);
+      updateLoadMore(endpoint, null);
       setStatus('loading', `Cargando archivos de ${folderDisplay || folderName}...`);
 
       if (window.modalManager && typeof window.modalManager.openModal === 'function') {
@@ -220,16 +227,18 @@
       button.disabled = true;
       button.setAttribute('aria-busy', 'true');
 
-      fetch(endpoint, { headers: { Accept: 'application/json' } })
-        .then(async (response) => {
-          const payload = await response.json().catch(() => ({}));
-          if (!response.ok || payload.success === false) {
-            const message = (payload && payload.error) || 'No se pudieron cargar los archivos de la carpeta.';
-            throw new Error(message);
+      fetchFilesPage(endpoint, 0)
+        .then((payload) => {
+          if (endpoint !== activeFilesEndpoint) {
+            return;
           }
           const files = Array.isArray(payload.files) ? payload.files : [];
+          const total = payload.pagination && typeof payload.pagination.total === 'number'
+            ? payload.pagination.total
+            : files.length;
           renderFiles(files);
-          updateCounter(files.length);
+          updateCounter(total);
+          updateLoadMore(endpoint, payload.pagination);
 
           if (files.length === 0) {
             setStatus('empty', 'Esta carpeta no tiene archivos sincronizados todavía.');
@@ -457,13 +466,16 @@
         return;
       }
 
+      const uploadId = createUploadId();
       const formData = new FormData();
       formData.append('folder', folderValue);
       formData.append('filename', filenameValue);
+      formData.append('upload_id', uploadId);
       formData.append('file', file);
 
       setUploadSubmitting(true);
       showUploadFeedback('Cargando archivo...', 'info');
+      const stopProgress = pollUploadProgress(uploadId);
 
       try {
         const response = await fetch(uploadEndpoint, {
@@ -492,10 +504,47 @@
       } catch (error) {
         showUploadFeedback(error.message || 'No se pudo cargar el archivo.', 'error');
       } finally {
+        stopProgress();
         setUploadSubmitting(false);
       }
     }
 
+    function createUploadId() {
+      if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+        return window.crypto.randomUUID();
+      }
+      return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+    }
+
+    function pollUploadProgress(uploadId) {
+      let active = true;
+      let timer = null;
+
+      const poll = async () => {
+        try {
+          const response = await fetch(`${uploadEndpoint}/${encodeURIComponent(uploadId)}/progress`, {
+            headers: { Accept: 'application/json' }
+          });
+          const payload = await response.json().catch(() => ({}));
+          const progress = payload && payload.progress;
+          if (active && progress && progress.state === 'uploading' && typeof progress.percent === 'number') {
+            showUploadFeedback(`Enviando al servicio de imágenes... ${Math.round(progress.percent)}%`, 'info');
+          }
+        } catch (error) {
+          // El progreso es informativo: los errores de consulta se ignoran
+        }
+        if (active) {
+          timer = setTimeout(poll, UPLOAD_PROGRESS_INTERVAL);
+        }
+      };
+
+      timer = setTimeout(poll, UPLOAD_PROGRESS_INTERVAL);
+      return () => {
+        active = false;
+        clearTimeout(timer);
+      };
+    }
+
     async function submitCreateFolder() {
       if (!createForm || createSubmitting) {
         return;
@@ -962,14 +1011,75 @@
       }
     }
 
+    function buildFilesPageUrl(endpoint, offset) {
+      const separator = endpoint.includes('?') ? '&' : '?';
+      return `${endpoint}${separator}limit=${FILES_PAGE_SIZE}&offset=${offset}`;
+    }
+
+    function fetchFilesPage(endpoint, offset) {
+      return fetch(buildFilesPageUrl(endpoint, offset), { headers: { Accept: 'application/json' } })
+        .then(async (response) => {
+          const payload = await response.json().catch(() => ({}));
+          if (!response.ok || payload.success === false) {
+            const message = (payload && payload.error) || 'No se pudieron cargar los archivos de la carpeta.';
+            throw new Error(message);
+          }
+          return payload;
+        });
+    }
+
+    function updateLoadMore(endpoint, pagination) {
+      if (!gridElement) {
+        return;
+      }
+
+      const nextOffset = pagination && pagination.has_more ? pagination.next_offset : null;
+      if (typeof nextOffset !== 'number') {
+        if (loadMoreButton) {
+          loadMoreButton.classList.add('hidden');
+        }
+        return;
+      }
+
+      if (!loadMoreButton) {
+        loadMoreButton = document.createElement('button');
+        loadMoreButton.type = 'button';
+        loadMoreButton.className = 'ios-load-more-btn';
+        gridElement.insertAdjacentElement('afterend', loadMoreButton);
+      }
+
+      loadMoreButton.textContent = 'Cargar más archivos';
+      loadMoreButton.disabled = false;
+      loadMoreButton.classList.remove('hidden');
+      loadMoreButton.onclick = () => {
+        loadMoreButton.disabled = true;
+        loadMoreButton.textContent = 'Cargando...';
+        fetchFilesPage(endpoint, nextOffset)
+          .then((payload) => {
+            if (endpoint !== activeFilesEndpoint) {
+              return;
+            }
+            appendFiles(Array.isArray(payload.files) ? payload.files : []);
+            updateLoadMore(endpoint, payload.pagination);
+          })
+          .catch((error) => {
+            setStatus('error', error.message || 'No se pudieron cargar los archivos de la carpeta.');
+            updateLoadMore(endpoint, pagination);
+          });
+      };
+    }
+
     function renderFiles(files) {
       if (!gridElement) {
         return;
       }
 
       gridElement.innerHTML = '';
+      appendFiles(files);
+    }
 
-      if (!Array.isArray(files) || files.length === 0) {
+    function appendFiles(files) {
+      if (!gridElement || !Array.isArray(files) || files.length === 0) {
         return;
       }
 
@@ -1041,6 +1151,10 @@
       return card;
     }
 
+    function buildMediaUrl(url) {
+      return typeof window.__buildMediaUrl === 'function' ? window.__buildMediaUrl(url) : url;
+    }
+
     function buildFilePreview(file, category = inferFileCategory(file)) {
       if (!file || !file.url) {
         return null;
@@ -1051,7 +1165,14 @@
         wrapper.className = 'ios-file-preview';
 
         const image = document.createElement('img');
-        image.src = file.url;
+        if (file.thumbnail_url) {
+          // thumbnail_url puede traer ya la versión (?v=)
+          const separator = file.thumbnail_url.includes('?') ? '&' : '?';
+          image.src = `${file.thumbnail_url}${separator}s=${THUMBNAIL_SIZE}`;
+          image.srcset = `${image.src} 1x, ${file.thumbnail_url}${separator}s=${THUMBNAIL_SIZE * 2} 2x`;
+        } else {
+          image.src = file.url;
+        }
         image.alt = file.display_name || file.name || 'Previsualización de archivo';
         image.loading = 'lazy';
         wrapper.appendChild(image);
@@ -1063,7 +1184,7 @@
         wrapper.className = 'ios-file-preview video';
 
         const video = document.createElement('video');
-        video.src = file.url;
+        video.src = buildMediaUrl(file.url);
         video.controls = true;
         video.preload = 'metadata';
         wrapper.appendChild(video);
@@ -1075,7 +1196,7 @@
         wrapper.className = 'ios-file-preview audio';
 
         const audio = document.createElement('audio');
-        audio.src = file.url;
+        audio.src = buildMediaUrl(file.url);
         audio.controls = true;
         audio.preload = 'metadata';
         wrapper.appendChild(audio);
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Entorno de pruebas: backend HTTP local y variables obligatorias de configuración.
+
+El backend se levanta antes de importar `app`, porque la configuración se lee
+al importar el módulo.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _BackendHandler(BaseHTTPRequestHandler):
+    """Backend mínimo.
+
+    `/api/gzjson` responde JSON comprimido con gzip tras una pausa;
+    `/api/needs-refresh` responde 401 salvo con el token que entrega `/auth/refresh`.
+    """
+
+    calls = 0
+    refreshes = 0
+
+    def _send_json(self, status, payload, extra_headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path == '/auth/refresh':
+            type(self).refreshes += 1
+            self._send_json(200, {'success': True}, [('Set-Cookie', 'auth_token=fresh-token; Path=/')])
+            return
+        self._send_json(404, {'success': False})
+
+    def do_GET(self):
+        if self.path.startswith('/api/needs-refresh'):
+            type(self).calls += 1
+            if self.headers.get('Authorization') != 'Bearer fresh-token':
+                time.sleep(0.3)
+                self._send_json(401, {'success': False})
+                return
+            self._send_json(200, {'success': True, 'data': ['ok']})
+            return
+        if self.path.startswith('/api/gzjson'):
+            type(self).calls += 1
+            time.sleep(0.3)
+            body = gzip.compress(json.dumps({'success': True, 'data': ['y' * 10] * 50}).encode('utf-8'))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self._send_json(200, {'success': True})
+
+    def log_message(self, format, *args):
+        pass
+
+
+_backend = ThreadingHTTPServer(('127.0.0.1', 0), _BackendHandler)
+threading.Thread(target=_backend.serve_forever, daemon=True).start()
+_backend_url = f'http://127.0.0.1:{_backend.server_address[1]}'
+_tmp_dir = tempfile.mkdtemp(prefix='rescue-tests-')
+
+os.environ.update({
+    'BACKEND_API_URL': _backend_url,
+    'IMAGES_SERVICE_BASE_URL': _backend_url,
+    'WEBSOCKET_URL': 'ws://127.0.0.1:1',
+    'PROXY_PREFIX': '/proxy',
+    'SECRET_KEY': 'test-secret',
+    'SESSION_LIFETIME': '3600',
+    'DEBUG': 'false',
+    'CORS_ORIGINS': 'http://localhost',
+    'PROXY_CACHE_ENABLED': 'false',
+    'METRICS_ENABLED': 'false',
+    'STATIC_PRECOMPRESS_ENABLED': 'false',
+    'TEMPLATE_PRECOMPILE': 'false',
+    'JINJA_BYTECODE_CACHE_DIR': '',
+    'TMPDIR': _tmp_dir,
+})
+tempfile.tempdir = None
+
+
+@pytest.fixture
+def backend():
+    _BackendHandler.calls = 0
+    _BackendHandler.refreshes = 0
+    return _BackendHandler
+
+
+@pytest.fixture
+def client():
+    import app
+
+    return app.app.test_client()
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from utils.empresa_stats import empresa_stats_cache
+
+
+def test_statistics_snapshot_is_scoped_to_the_auth_token(client, monkeypatch):
+    """Otro usuario con el mismo `empresa_id` en la sesión no recibe el snapshot cacheado."""
+    import app
+
+    loads = []
+
+    def fake_load(self, empresa_id, background=False):
+        loads.append(app.request.cookies.get('auth_token'))
+        return {'raw': {'owner': app.request.cookies.get('auth_token')}}
+
+    monkeypatch.setattr(app.APIClient, '_load_empresa_statistics', fake_load)
+    empresa_stats_cache.invalidate(('42', app.APIClient._auth_scope({'auth_token': 'token-a'})))
+    empresa_stats_cache.invalidate(('42', app.APIClient._auth_scope({'auth_token': 'token-b'})))
+
+    for token in ('token-a', 'token-a', 'token-b'):
+        with app.app.test_request_context('/', headers={'Cookie': f'auth_token={token}'}):
+            snapshot = app.backend_client.get_empresa_statistics_snapshot('42')
+            assert snapshot['raw']['owner'] == token
+
+    assert loads == ['token-a', 'token-b']
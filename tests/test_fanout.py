@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from utils.config import FANOUT_MAX_WORKERS
+
+
+def test_get_many_cancels_calls_still_queued_at_the_deadline(client, monkeypatch):
+    import app
+
+    started = []
+    lock = threading.Lock()
+
+    def slow_get(self, endpoint, **kwargs):
+        with lock:
+            started.append((endpoint, kwargs['timeout']))
+        time.sleep(0.6)
+        raise RuntimeError('backend lento')
+
+    monkeypatch.setattr(app.APIClient, 'get', slow_get)
+    calls = {
+        f'call-{index}': {'endpoint': f'/api/slow/{index}', 'timeout': 0.2, 'fallback': 'fallback'}
+        for index in range(FANOUT_MAX_WORKERS + 4)
+    }
+
+    with app.app.test_request_context('/'):
+        began = time.monotonic()
+        results = app.backend_client.get_many(calls)
+        elapsed = time.monotonic() - began
+
+    assert elapsed < 0.5
+    assert set(results.values()) == {'fallback'}
+    # Las que seguían en cola no llegan a ejecutarse al liberarse el pool
+    time.sleep(0.8)
+    assert len(started) == FANOUT_MAX_WORKERS
+    assert all(timeout <= 0.2 for _, timeout in started)
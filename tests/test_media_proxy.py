@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from utils.media_proxy import is_relayable_media_type
+
+
+@pytest.mark.parametrize('content_type', ['image/png', 'image/webp', 'audio/mpeg', 'video/mp4', 'video/webm; codecs=vp9'])
+def test_relays_raster_images_audio_and_video(content_type):
+    assert is_relayable_media_type(content_type)
+
+
+@pytest.mark.parametrize('content_type', ['image/svg+xml', 'text/html', 'application/javascript', None, ''])
+def test_rejects_scriptable_or_unknown_types(content_type):
+    assert not is_relayable_media_type(content_type)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import threading
+
+
+def _get_gzjson(client, results):
+    client.set_cookie('auth_token', 'token-a')
+    response = client.get('/proxy/api/gzjson', headers={'Accept-Encoding': 'gzip'})
+    results.append(response)
+
+
+def _decoded_body(response):
+    body = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def test_coalesced_get_relayed_with_gzip_keeps_body(client, backend):
+    """El líder de la coalescencia ya leyó el cuerpo: no se relaya `raw` vacío."""
+    results = []
+    threads = [threading.Thread(target=_get_gzjson, args=(client, results)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.calls == 1
+    assert len(results) == 3
+    for response in results:
+        assert response.status_code == 200
+        assert len(response.get_data()) > 0
+        if response.headers.get('Content-Length') is not None:
+            assert int(response.headers['Content-Length']) == len(response.get_data())
+        assert _decoded_body(response)['success'] is True
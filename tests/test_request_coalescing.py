@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import threading
+
+
+def test_waiters_get_refreshed_cookies_and_their_own_response(client, backend):
+    """Un refresh hecho por el líder llega también a las peticiones coalescidas."""
+    results = []
+
+    def get():
+        with client.application.test_client() as own_client:
+            own_client.set_cookie('auth_token', 'stale-token')
+            own_client.set_cookie('refresh_token', 'refresh-a')
+            results.append(own_client.get('/proxy/api/needs-refresh'))
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.refreshes == 1
+    # Una sola llamada coalescida (401) y su reintento tras el refresh
+    assert backend.calls == 2
+    assert len(results) == 3
+    for response in results:
+        assert response.status_code == 200
+        assert response.get_json()['data'] == ['ok']
+        cookies = response.headers.getlist('Set-Cookie')
+        assert any(cookie.startswith('auth_token=fresh-token') for cookie in cookies)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Imágenes de tipos de alerta servidas por referencia.
+
+El backend entrega `imagen_base64` dentro de cada tipo de alerta. En los
+listados se sustituye por una URL `/media/alert-images/<hash>`: el contenido se
+decodifica una sola vez, se guarda en disco bajo su hash (tipos de alerta con
+la misma imagen comparten archivo) y el endpoint lo sirve como binario con
+ETag y caché inmutable.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.config import ALERT_IMAGE_CACHE_DIR, ALERT_IMAGE_CACHE_MAX_BYTES
+from utils.disk_cache import atomic_write, evict_lru, touch
+
+IMAGE_HASH_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Firmas de los formatos habituales (el resto se sirve como binario genérico)
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+def sniff_mimetype(head: bytes) -> str:
+    for signature, mimetype in _SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.lstrip()[:5] in (b'<svg ', b'<?xml'):
+        return 'image/svg+xml'
+    return 'application/octet-stream'
+
+
+def _base64_payload(value: Any) -> Optional[str]:
+    """Parte base64 de un data URL o de un base64 plano; `None` si el valor es una URL."""
+    if not isinstance(value, str) or not value:
+        return None
+    if value.startswith('data:'):
+        header, _, payload = value.partition(',')
+        return payload if header.endswith(';base64') and payload else None
+    if value.startswith(('http://', 'https://', '/')) or len(value) < 64:
+        return None
+    return value
+
+
+class AlertImageStore:
+    """Imágenes decodificadas en disco, direccionadas por hash de contenido."""
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+        self.registered = 0
+        self.decoded = 0
+        self.invalid = 0
+        self.evictions = 0
+
+    def path(self, image_hash: str) -> Optional[str]:
+        if not IMAGE_HASH_PATTERN.fullmatch(image_hash or ''):
+            return None
+        return os.path.join(self.directory, image_hash[:2], image_hash)
+
+    def register(self, value: Any) -> Optional[str]:
+        """Guarda la imagen si aún no existe y devuelve su hash (`None` si no es base64)."""
+        payload = _base64_payload(value)
+        if payload is None:
+            return None
+
+        image_hash = hashlib.sha256(payload.encode('ascii', 'ignore')).hexdigest()[:32]
+        path = self.path(image_hash)
+        with self._lock:
+            self.registered += 1
+        if os.path.exists(path):
+            touch(path)
+            return image_hash
+
+        try:
+            # Algunos clientes parten el base64 en líneas
+            data = base64.b64decode(''.join(payload.split()), validate=True)
+        except (binascii.Error, ValueError):
+            with self._lock:
+                self.invalid += 1
+            return None
+
+        try:
+            atomic_write(path, data)
+        except OSError as exc:
+            print(f"⚠️ No se pudo guardar la imagen del tipo de alerta: {exc}")
+            return None
+
+        with self._lock:
+            self.decoded += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data)
+            needs_eviction = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if needs_eviction:
+            total, evicted = evict_lru(self.directory, self.max_bytes)
+            with self._lock:
+                self._approx_bytes = total
+                self.evictions += evicted
+        return image_hash
+
+    def open(self, image_hash: str) -> Optional[Tuple[str, str]]:
+        """Ruta y tipo MIME de una imagen guardada."""
+        path = self.path(image_hash)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as handle:
+                head = handle.read(16)
+        except OSError:
+            return None
+        touch(path)
+        return path, sniff_mimetype(head)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'bytes': self._approx_bytes,
+                'max_bytes': self.max_bytes,
+                'registered': self.registered,
+                'decoded': self.decoded,
+                'invalid': self.invalid,
+                'evictions': self.evictions,
+            }
+
+
+def reference_alert_images(items: Iterable[Any], build_url: Callable[[str], str]) -> None:
+    """Sustituye el base64 de cada tipo de alerta por la URL de su imagen."""
+    for item in items:
+        image_hash = alert_image_store.register(item.image)
+        if image_hash:
+            item.image_hash = image_hash
+            item.image = build_url(image_hash)
+
+
+# Imágenes compartidas por los workers a través del disco
+alert_image_store = AlertImageStore(ALERT_IMAGE_CACHE_DIR, ALERT_IMAGE_CACHE_MAX_BYTES)
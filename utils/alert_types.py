@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo compacto de tipos de alerta.
+
+`AlertType` reemplaza el diccionario que se armaba por elemento en cada
+listado: usa `__slots__`, comparte la tabla de severidades y las fechas
+normalizadas (memoizadas), y se serializa con `to_dict()` a la misma forma que
+consumen las plantillas y los endpoints JSON.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# Color del backend (`tipo_alerta`) -> severidad del frontend
+SEVERITY_BY_COLOR = {
+    'ROJO': 'critica',
+    'NARANJA': 'alta',
+    'AMARILLO': 'media',
+    'VERDE': 'baja',
+}
+
+
+def map_severity(raw_value: Optional[str]) -> str:
+    if not raw_value:
+        return 'desconocida'
+    normalized = str(raw_value).strip().upper()
+    return SEVERITY_BY_COLOR.get(normalized, normalized.lower())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_date_text(value: str) -> str:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        return value
+
+
+def normalize_date(value: Any) -> str:
+    """Fecha ISO 8601 normalizada (memoizada: los listados repiten las mismas fechas)."""
+    if not value:
+        return ''
+    return _normalize_date_text(str(value))
+
+
+def _company_name(raw: Dict[str, Any]) -> str:
+    company_reference = raw.get('empresa') or raw.get('company') or {}
+    if isinstance(company_reference, dict):
+        return company_reference.get('nombre') or company_reference.get('name') or ''
+    return raw.get('empresa_nombre') or raw.get('nombre_empresa') or ''
+
+
+class AlertType:
+    """Tipo de alerta mapeado desde `/api/tipos-alarma`."""
+
+    __slots__ = (
+        'id',
+        'name',
+        'description',
+        'severity',
+        'color',
+        'image',
+        'image_hash',
+        'sound',
+        'recommendations',
+        'equipment',
+        'company_id',
+        'company_name',
+        'scope',
+        'active',
+        'sla_minutes',
+        'created_at',
+        'updated_at',
+    )
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        color_value = raw.get('color_alerta')
+        empresa_id = raw.get('empresa_id')
+
+        self.id = str(raw.get('_id', ''))
+        self.name = raw.get('nombre', '')
+        self.description = raw.get('descripcion', '')
+        self.severity = map_severity(raw.get('tipo_alerta'))
+        self.color = color_value.strip() if isinstance(color_value, str) else ''
+        # Referencia al blob del backend, sin copiarlo
+        self.image = raw.get('imagen_base64')
+        # Se completa cuando la imagen se sirve por referencia (ver utils.alert_images)
+        self.image_hash = None
+        self.sound = raw.get('sonido_link')
+        self.recommendations = raw.get('recomendaciones', []) or []
+        self.equipment = raw.get('implementos_necesarios', []) or []
+        self.company_id = empresa_id
+        self.company_name = _company_name(raw)
+        self.scope = 'empresa' if empresa_id else 'global'
+        self.active = bool(raw.get('activo', True))
+        self.sla_minutes = raw.get('sla_minutos') or raw.get('sla') or 0
+        self.created_at = normalize_date(raw.get('fecha_creacion'))
+        self.updated_at = normalize_date(raw.get('fecha_actualizacion'))
+
+    # Acceso tipo diccionario para plantillas y código que espera `item.get(...)`
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
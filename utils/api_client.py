@@ -6,10 +6,44 @@ Un cliente API simplificado que maneja la autenticación y las llamadas
 más comunes al backend de forma consistente y reutilizable.
 """
 
+import hashlib
+import time
 import requests
-from typing import Dict, Any, Optional, List
-from flask import request, g
-from datetime import datetime
+from requests.structures import CaseInsensitiveDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, List, Tuple, Union
+from flask import request, g, copy_current_request_context, url_for
+
+from utils.alert_images import reference_alert_images
+from utils.alert_types import AlertType, normalize_date
+from utils.config import FANOUT_DEFAULT_TIMEOUT, PROXY_BUFFER_LIMIT, REQUEST_COALESCING_ENABLED
+from utils.empresa_stats import build_statistics_snapshot, empresa_stats_cache
+from utils.fanout import get_fanout_executor
+from utils.http_pool import get_backend_session
+from utils.metrics import UpstreamTimer, token_refreshes
+from utils.proxy_stream import should_buffer_response
+from utils.request_coalescer import endpoint_template, request_coalescer
+from utils.structured_log import get_logger
+from utils.token_refresh import refresh_coordinator
+
+logger = get_logger('api_client')
+
+
+def _copy_response(response: requests.Response) -> requests.Response:
+    """Copia independiente (estado, cabeceras, cookies y cuerpo ya cargado) de una respuesta compartida."""
+    copy = requests.Response()
+    copy.status_code = response.status_code
+    copy.reason = response.reason
+    copy.url = response.url
+    copy.encoding = response.encoding
+    copy.elapsed = response.elapsed
+    copy.request = response.request
+    copy.history = list(response.history)
+    copy.headers = CaseInsensitiveDict(response.headers)
+    copy.cookies = response.cookies.copy()
+    copy._content = response.content
+    copy._content_consumed = True
+    return copy
 
 
 class APIClient:
@@ -17,6 +51,11 @@ class APIClient:
     
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
+
+    @property
+    def session(self) -> requests.Session:
+        """Sesión keep-alive compartida por todas las instancias del proceso"""
+        return get_backend_session()
     
     def _get_auth_cookies(self) -> Dict[str, str]:
         """Obtiene las cookies de autenticación considerando tokens refrescados"""
@@ -29,12 +68,7 @@ class APIClient:
         return auth_cookies
 
     def _normalize_date(self, value: Any) -> str:
-        if not value:
-            return ''
-        try:
-            return datetime.fromisoformat(str(value).replace('Z', '+00:00')).isoformat()
-        except (ValueError, TypeError):
-            return str(value)
+        return normalize_date(value)
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Hace una petición HTTP con autenticación automática"""
@@ -64,11 +98,7 @@ class APIClient:
         request_kwargs['cookies'] = cookies
         request_kwargs['headers'] = headers
 
-        response = requests.request(
-            method=method,
-            url=url,
-            **request_kwargs
-        )
+        response = self._send(method, url, request_kwargs)
 
         if (
             response.status_code == 401
@@ -76,6 +106,8 @@ class APIClient:
         ):
             refreshed_cookies = self._refresh_token(cookies)
             if refreshed_cookies:
+                # Libera la conexión de la respuesta 401 (puede venir en modo stream)
+                response.close()
                 retry_headers = dict(headers)
                 new_auth_token = refreshed_cookies.get('auth_token')
                 if new_auth_token:
@@ -86,11 +118,7 @@ class APIClient:
                 retry_kwargs = dict(raw_kwargs)
                 retry_kwargs['cookies'] = refreshed_cookies
                 retry_kwargs['headers'] = retry_headers
-                response = requests.request(
-                    method=method,
-                    url=url,
-                    **retry_kwargs
-                )
+                response = self._send(method, url, retry_kwargs)
             else:
                 # Limpia tokens cacheados si el refresh falla para evitar bucles
                 if hasattr(g, 'cached_auth_cookies'):
@@ -98,6 +126,21 @@ class APIClient:
 
         return response
 
+    def _send(self, method: str, url: str, request_kwargs: Dict[str, Any]) -> requests.Response:
+        """Petición al backend con métricas por plantilla de ruta"""
+        timer = UpstreamTimer(method, url, 'sync')
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                **request_kwargs
+            )
+        except Exception:
+            timer.finish(None)
+            raise
+        timer.finish(response.status_code)
+        return response
+
     def _should_attempt_refresh(self, endpoint: str, retry_attempted: bool, cookies: Dict[str, str]) -> bool:
         if retry_attempted:
             return False
@@ -109,18 +152,18 @@ class APIClient:
         refresh_token = cookies.get('refresh_token') or request.cookies.get('refresh_token')
         return bool(refresh_token)
 
-    def _store_refreshed_cookies(self, cookie_jar) -> None:
-        if not cookie_jar:
+    def _store_refreshed_cookies(self, new_cookies: Dict[str, str]) -> None:
+        if not new_cookies:
             return
 
         cached = dict(getattr(g, 'cached_auth_cookies', {}))
         stored: List[Dict[str, str]] = list(getattr(g, 'backend_refreshed_cookies', []))
 
-        for cookie in cookie_jar:
-            if not cookie.value:
+        for name, value in new_cookies.items():
+            if not value:
                 continue
-            cached[cookie.name] = cookie.value
-            stored.append({'name': cookie.name, 'value': cookie.value})
+            cached[name] = value
+            stored.append({'name': name, 'value': value})
 
         g.cached_auth_cookies = cached
         g.backend_refreshed_cookies = stored
@@ -130,6 +173,25 @@ class APIClient:
         if not refresh_token:
             return None
 
+        # Peticiones concurrentes con el mismo refresh token comparten un único refresh
+        new_cookies = refresh_coordinator.run(
+            refresh_token,
+            lambda: self._request_token_refresh(cookies)
+        )
+
+        if new_cookies is None:
+            # Si el backend reporta sesión inválida, limpia la caché local
+            if hasattr(g, 'cached_auth_cookies'):
+                g.cached_auth_cookies.clear()
+            return None
+
+        refreshed = dict(cookies)
+        refreshed.update(new_cookies)
+        self._store_refreshed_cookies(new_cookies)
+        return refreshed
+
+    def _request_token_refresh(self, cookies: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Llama a /auth/refresh y devuelve las cookies nuevas (no toca `g`)"""
         refresh_url = f"{self.base_url}/auth/refresh"
         headers = {'Content-Type': 'application/json'}
 
@@ -137,27 +199,23 @@ class APIClient:
             headers['Authorization'] = f"Bearer {cookies['auth_token']}"
 
         try:
-            refresh_response = requests.post(
+            refresh_response = self.session.post(
                 refresh_url,
                 cookies=cookies,
                 headers=headers
             )
         except Exception as exc:  # noqa: BLE001
+            token_refreshes.labels(result='error').inc()
             print(f"❌ Error refreshing token: {exc}")
             return None
 
+        token_refreshes.labels(result='success' if refresh_response.ok else 'rejected').inc()
         if refresh_response.ok:
-            refreshed = dict(cookies)
-            for cookie in refresh_response.cookies:
-                if cookie.value:
-                    refreshed[cookie.name] = cookie.value
-
-            self._store_refreshed_cookies(refresh_response.cookies)
-            return refreshed
-
-        # Si el backend reporta sesión inválida, limpia la caché local
-        if hasattr(g, 'cached_auth_cookies'):
-            g.cached_auth_cookies.clear()
+            return {
+                cookie.name: cookie.value
+                for cookie in refresh_response.cookies
+                if cookie.value
+            }
 
         try:
             error_payload = refresh_response.json()
@@ -167,14 +225,147 @@ class APIClient:
 
         return None
 
+    @staticmethod
+    def _normalize_params(params: Any) -> Tuple[Tuple[str, str], ...]:
+        if not params:
+            return ()
+        if hasattr(params, 'items'):
+            try:
+                items = params.items(multi=True)
+            except TypeError:
+                items = params.items()
+        else:
+            items = params
+        return tuple(sorted((str(key), str(value)) for key, value in items))
+
+    def _coalesce_key(self, endpoint: str, kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Clave de coalescencia: ruta, query ordenada, cabeceras y ámbito de autenticación"""
+        cookies = self._get_auth_cookies()
+        cookies.update(kwargs.get('cookies') or {})
+        auth_scope = self._auth_scope(cookies)
+        headers = tuple(sorted((kwargs.get('headers') or {}).items()))
+        return (
+            'GET',
+            endpoint,
+            self._normalize_params(kwargs.get('params')),
+            headers,
+            auth_scope,
+            bool(kwargs.get('stream')),
+        )
+
+    @staticmethod
+    def _auth_scope(cookies: Dict[str, str]) -> str:
+        """Huella del token de la petición: separa datos cacheados entre usuarios"""
+        auth_token = cookies.get('auth_token') or ''
+        return hashlib.sha256(auth_token.encode('utf-8')).hexdigest()
+
+    def _coalesced_get(self, endpoint: str, **kwargs) -> requests.Response:
+        """GET que comparte una única llamada al backend entre peticiones idénticas en vuelo"""
+        if not REQUEST_COALESCING_ENABLED:
+            return self._make_request('GET', endpoint, **kwargs)
+
+        if not endpoint.startswith(('http://', 'https://', '/')):
+            endpoint = f'/{endpoint}'
+
+        def leader():
+            refreshed_before = len(getattr(g, 'backend_refreshed_cookies', []))
+            response = self._make_request('GET', endpoint, **kwargs)
+            if kwargs.get('stream') and not should_buffer_response(response, PROXY_BUFFER_LIMIT):
+                # Respuestas en streaming no se comparten: se leen una sola vez
+                return (response, []), False
+            response.content  # noqa: B018 - carga el cuerpo para compartirlo
+            # Cookies de un refresh hecho por el líder: también deben llegar a los navegadores en espera
+            refreshed = list(getattr(g, 'backend_refreshed_cookies', []))[refreshed_before:]
+            return (response, refreshed), True
+
+        def share(result):
+            # Se ejecuta en el hilo de cada espera: cookies en su `g` y respuesta propia
+            response, refreshed = result
+            self._store_refreshed_cookies({cookie['name']: cookie['value'] for cookie in refreshed})
+            return _copy_response(response), refreshed
+
+        response, _ = request_coalescer.run(
+            self._coalesce_key(endpoint, kwargs),
+            endpoint_template(endpoint),
+            leader,
+            lambda: (self._make_request('GET', endpoint, **kwargs), []),
+            share
+        )
+        return response
+
     def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Permite realizar peticiones con método dinámico"""
+        if method.upper() == 'GET':
+            return self._coalesced_get(endpoint, **kwargs)
         return self._make_request(method.upper(), endpoint, **kwargs)
     
     def get(self, endpoint: str, **kwargs) -> requests.Response:
         """GET request con autenticación"""
-        return self._make_request('GET', endpoint, **kwargs)
+        return self._coalesced_get(endpoint, **kwargs)
     
+    def get_many(self, calls: Dict[str, Union[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Ejecuta varios GET en paralelo sobre un pool de hilos acotado.
+
+        Cada llamada se describe con un endpoint o con un dict con las claves
+        `endpoint`, `params`, `timeout`, `fallback` y `transform`. Devuelve un
+        dict con la misma clave y, como valor, la respuesta (o `transform(resp)`)
+        o el `fallback` si la llamada falla o excede su timeout. La latencia
+        total queda en max(latencias) en lugar de la suma.
+
+        El timeout es un plazo desde la llamada a `get_many`: una petición que
+        espera hilo libre solo dispone del tiempo restante, y las que siguen en
+        cola al vencer el plazo se cancelan para no ocupar el pool compartido.
+        """
+        parent_cookies = dict(getattr(g, 'cached_auth_cookies', {}))
+        executor = get_fanout_executor()
+        futures = {}
+        specs = {}
+
+        for key, call in calls.items():
+            spec = {'endpoint': call} if isinstance(call, str) else dict(call)
+            spec.setdefault('timeout', FANOUT_DEFAULT_TIMEOUT)
+            specs[key] = spec
+
+            deadline = time.monotonic() + spec['timeout']
+
+            # Cada hilo trabaja sobre una copia del contexto con las cookies de la petición
+            @copy_current_request_context
+            def run_call(spec=spec, deadline=deadline):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Esperó en cola más que su plazo: quien la pidió ya usó el fallback
+                    raise FutureTimeoutError()
+                g.cached_auth_cookies = dict(parent_cookies)
+                response = self.get(spec['endpoint'], params=spec.get('params'), timeout=remaining)
+                transform = spec.get('transform')
+                value = transform(response) if transform else response
+                return value, list(getattr(g, 'backend_refreshed_cookies', []))
+
+            futures[key] = (executor.submit(run_call), deadline)
+
+        results: Dict[str, Any] = {}
+        refreshed: List[Dict[str, str]] = []
+        for key, (future, deadline) in futures.items():
+            spec = specs[key]
+            try:
+                value, call_refreshed = future.result(timeout=max(deadline - time.monotonic(), 0))
+                results[key] = value
+                refreshed.extend(call_refreshed)
+            except FutureTimeoutError:
+                # Si aún no empezó, libera su turno en el pool
+                future.cancel()
+                print(f"⚠️ Timeout loading {spec['endpoint']}")
+                results[key] = spec.get('fallback')
+            except Exception as exc:  # noqa: BLE001
+                print(f"⚠️ Error loading {spec['endpoint']}: {exc}")
+                results[key] = spec.get('fallback')
+
+        # Propaga al navegador los tokens refrescados dentro de los hilos
+        if refreshed:
+            self._store_refreshed_cookies({cookie['name']: cookie['value'] for cookie in refreshed})
+
+        return results
+
     def post(self, endpoint: str, **kwargs) -> requests.Response:
         """POST request con autenticación"""
         return self._make_request('POST', endpoint, **kwargs)
@@ -199,8 +390,13 @@ class APIClient:
             response = self.get(f"/api/users/empresa/{empresa_id}")
             if response.ok:
                 data = response.json()
-                print(f"DEBUG: Usuarios response data: {data}")
-                print(f"DEBUG: Usuarios response data type: {type(data)}")
+                logger.debug(
+                    'backend_payload',
+                    endpoint='/api/users/empresa/{empresa_id}',
+                    empresa_id=empresa_id,
+                    payload_type=type(data).__name__,
+                    payload=data
+                )
                 
                 if data.get('success'):
                     backend_data = data.get('data', {})
@@ -226,14 +422,18 @@ class APIClient:
                     elif isinstance(backend_data, dict):
                         return backend_data
                     else:
-                        print(f"WARNING: Unexpected usuarios data format: {type(backend_data)}")
+                        logger.warning(
+                            'unexpected_payload_format',
+                            endpoint='/api/users/empresa/{empresa_id}',
+                            data_type=type(backend_data).__name__
+                        )
                         raise Exception(f"Unexpected data format: {type(backend_data)}")
                 else:
                     raise Exception(f"Backend error: {data.get('errors', [])}")
             else:
                 raise Exception(f"HTTP {response.status_code}: {response.text}")
         except Exception as e:
-            print(f"Error getting usuarios data: {e}")
+            logger.error('backend_call_failed', endpoint='/api/users/empresa/{empresa_id}', error=str(e))
             return {
                 'usuarios': [],
                 'usuarios_stats': {
@@ -251,8 +451,12 @@ class APIClient:
             response = self.get("/api/empresas", params=params)
             if response.ok:
                 data = response.json()
-                print(f"DEBUG: Empresas response data: {data}")
-                print(f"DEBUG: Empresas response data type: {type(data)}")
+                logger.debug(
+                    'backend_payload',
+                    endpoint='/api/empresas',
+                    payload_type=type(data).__name__,
+                    payload=data
+                )
                 
                 if data.get('success'):
                     backend_data = data.get('data', {})
@@ -278,14 +482,18 @@ class APIClient:
                     elif isinstance(backend_data, dict):
                         return backend_data
                     else:
-                        print(f"WARNING: Unexpected data format from backend: {type(backend_data)}")
+                        logger.warning(
+                            'unexpected_payload_format',
+                            endpoint='/api/empresas',
+                            data_type=type(backend_data).__name__
+                        )
                         raise Exception(f"Unexpected data format: {type(backend_data)}")
                 else:
                     raise Exception(f"Backend error: {data.get('errors', [])}")
             else:
                 raise Exception(f"HTTP {response.status_code}: {response.text}")
         except Exception as e:
-            print(f"Error getting empresas data: {e}")
+            logger.error('backend_call_failed', endpoint='/api/empresas', error=str(e))
             return {
                 'empresas': [],
                 'empresas_stats': {
@@ -302,8 +510,12 @@ class APIClient:
             response = self.get("/api/hardware")
             if response.ok:
                 data = response.json()
-                print(f"DEBUG: Hardware response data: {data}")
-                print(f"DEBUG: Hardware response data type: {type(data)}")
+                logger.debug(
+                    'backend_payload',
+                    endpoint='/api/hardware',
+                    payload_type=type(data).__name__,
+                    payload=data
+                )
                 
                 if data.get('success'):
                     backend_data = data.get('data', {})
@@ -331,14 +543,18 @@ class APIClient:
                     elif isinstance(backend_data, dict):
                         return backend_data
                     else:
-                        print(f"WARNING: Unexpected hardware data format: {type(backend_data)}")
+                        logger.warning(
+                            'unexpected_payload_format',
+                            endpoint='/api/hardware',
+                            data_type=type(backend_data).__name__
+                        )
                         raise Exception(f"Unexpected data format: {type(backend_data)}")
                 else:
                     raise Exception(f"Backend error: {data.get('errors', [])}")
             else:
                 raise Exception(f"HTTP {response.status_code}: {response.text}")
         except Exception as e:
-            print(f"Error getting hardware data: {e}")
+            logger.error('backend_call_failed', endpoint='/api/hardware', error=str(e))
             return {
                 'hardware_list': [],
                 'hardware_types': [],
@@ -358,19 +574,6 @@ class APIClient:
         status: str = 'active'
     ) -> Dict[str, Any]:
         """Obtiene tipos de alerta con paginación y filtros por estado"""
-
-        def _map_severity(raw_value: Optional[str]) -> str:
-            if not raw_value:
-                return 'desconocida'
-            normalized = str(raw_value).strip().upper()
-            mapping = {
-                'ROJO': 'critica',
-                'NARANJA': 'alta',
-                'AMARILLO': 'media',
-                'VERDE': 'baja',
-            }
-            return mapping.get(normalized, normalized.lower())
-
         try:
             normalized_status = (status or 'active').strip().lower()
             if normalized_status not in {'active', 'inactive', 'all'}:
@@ -398,53 +601,20 @@ class APIClient:
             raw_items = payload.get('data', []) or []
             pagination = payload.get('pagination', {}) or {}
 
-            mapped_items = []
-            for raw in raw_items:
-                company_reference = raw.get('empresa') or raw.get('company') or {}
-                if isinstance(company_reference, dict):
-                    company_name = (
-                        company_reference.get('nombre')
-                        or company_reference.get('name')
-                        or ''
-                    )
-                else:
-                    company_name = (
-                        raw.get('empresa_nombre')
-                        or raw.get('nombre_empresa')
-                        or ''
-                    )
-                severity = _map_severity(raw.get('tipo_alerta'))
-                color_value = raw.get('color_alerta')
-                if isinstance(color_value, str):
-                    color_value = color_value.strip()
-                else:
-                    color_value = ''
-                mapped_items.append({
-                    'id': str(raw.get('_id', '')),
-                    'name': raw.get('nombre', ''),
-                    'description': raw.get('descripcion', ''),
-                    'severity': severity,
-                    'color': color_value,
-                    'image': raw.get('imagen_base64'),
-                    'sound': raw.get('sonido_link'),
-                    'recommendations': raw.get('recomendaciones', []) or [],
-                    'equipment': raw.get('implementos_necesarios', []) or [],
-                    'company_id': raw.get('empresa_id'),
-                    'company_name': company_name,
-                    'scope': 'global' if not raw.get('empresa_id') else 'empresa',
-                    'active': bool(raw.get('activo', True)),
-                    'sla_minutes': raw.get('sla_minutos') or raw.get('sla') or 0,
-                    'created_at': self._normalize_date(raw.get('fecha_creacion')),
-                    'updated_at': self._normalize_date(raw.get('fecha_actualizacion')),
-                })
+            mapped_items = [AlertType(raw) for raw in raw_items]
+            # El listado lleva la URL de cada imagen en lugar del base64
+            reference_alert_images(
+                mapped_items,
+                lambda image_hash: url_for('alert_type_image', image_hash=image_hash)
+            )
 
             total = pagination.get('total', len(mapped_items))
-            active = sum(1 for item in mapped_items if item.get('active'))
+            active = sum(1 for item in mapped_items if item.active)
             stats = {
                 'total_types': total,
                 'active_types': active,
                 'inactive_types': max(total - active, 0),
-                'critical_types': sum(1 for item in mapped_items if item.get('severity') == 'critica'),
+                'critical_types': sum(1 for item in mapped_items if item.severity == 'critica'),
                 'avg_sla_minutes': 0,
             }
 
@@ -490,18 +660,6 @@ class APIClient:
         if not alert_type_id:
             return {'success': False, 'message': 'ID inválido', 'data': None}
 
-        def _map_severity(raw_value: Optional[str]) -> str:
-            if not raw_value:
-                return 'desconocida'
-            normalized = str(raw_value).strip().upper()
-            mapping = {
-                'ROJO': 'critica',
-                'NARANJA': 'alta',
-                'AMARILLO': 'media',
-                'VERDE': 'baja',
-            }
-            return mapping.get(normalized, normalized.lower())
-
         try:
             response = self.get(f"/api/tipos-alarma/{alert_type_id}")
             if not response.ok:
@@ -512,36 +670,7 @@ class APIClient:
                 raise Exception(payload.get('message') or 'Respuesta sin éxito')
 
             data = payload.get('data') or {}
-            company_reference = data.get('empresa') or data.get('company') or {}
-            if isinstance(company_reference, dict):
-                company_name = (
-                    company_reference.get('nombre')
-                    or company_reference.get('name')
-                    or ''
-                )
-            else:
-                company_name = (
-                    data.get('empresa_nombre')
-                    or data.get('nombre_empresa')
-                    or ''
-                )
-            mapped = {
-                'id': str(data.get('_id', '')),
-                'name': data.get('nombre', ''),
-                'description': data.get('descripcion', ''),
-                'severity': _map_severity(data.get('tipo_alerta')),
-                'color': (data.get('color_alerta') or '').strip(),
-                'image': data.get('imagen_base64'),
-                'recommendations': data.get('recomendaciones', []) or [],
-                'equipment': data.get('implementos_necesarios', []) or [],
-                'sound': data.get('sonido_link'),
-                'company_id': data.get('empresa_id'),
-                'company_name': company_name,
-                'scope': 'global' if not data.get('empresa_id') else 'empresa',
-                'active': bool(data.get('activo', True)),
-                'created_at': self._normalize_date(data.get('fecha_creacion')),
-                'updated_at': self._normalize_date(data.get('fecha_actualizacion')),
-            }
+            mapped = AlertType(data).to_dict()
 
             return {
                 'success': True,
@@ -731,18 +860,46 @@ class APIClient:
                 }
             }
     
+    def _load_empresa_statistics(self, empresa_id: str, background: bool = False) -> Dict[str, Any]:
+        """Descarga y mapea las estadísticas de una empresa"""
+        # En segundo plano no se refresca el token: la respuesta al navegador ya salió
+        request_kwargs = {'_retry_attempted': True} if background else {}
+        response = self._make_request('GET', f"/api/empresas/{empresa_id}/statistics", **request_kwargs)
+        if not response.ok:
+            raise Exception(f"HTTP {response.status_code}: {response.text}")
+        data = response.json()
+        if not data.get('success'):
+            raise Exception(f"Backend error: {data.get('errors', [])}")
+        return build_statistics_snapshot(data.get('data', {}), empresa_id)
+
+    def _submit_background(self, fn) -> None:
+        """Programa `fn` en el pool de fan-out con una copia del contexto actual"""
+        parent_cookies = dict(getattr(g, 'cached_auth_cookies', {}))
+
+        @copy_current_request_context
+        def run():
+            g.cached_auth_cookies = dict(parent_cookies)
+            fn()
+
+        get_fanout_executor().submit(run)
+
+    def get_empresa_statistics_snapshot(self, empresa_id: str) -> Dict[str, Any]:
+        """Snapshot cacheado (stale-while-revalidate) con datos crudos y mapeados.
+
+        La clave incluye el token: `empresa_id` sale de la sesión y no prueba que
+        el backend autorice a quien pide, así que cada token solo ve lo que cargó
+        con sus propias credenciales.
+        """
+        return empresa_stats_cache.get(
+            (str(empresa_id), self._auth_scope(self._get_auth_cookies())),
+            lambda background: self._load_empresa_statistics(empresa_id, background),
+            self._submit_background
+        )
+
     def get_empresa_statistics(self, empresa_id: str) -> Dict[str, Any]:
         """Obtiene estadísticas de una empresa específica"""
         try:
-            response = self.get(f"/api/empresas/{empresa_id}/statistics")
-            if response.ok:
-                data = response.json()
-                if data.get('success'):
-                    return data.get('data', {})
-                else:
-                    raise Exception(f"Backend error: {data.get('errors', [])}")
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
+            return self.get_empresa_statistics_snapshot(empresa_id)['raw']
         except Exception as e:
             print(f"Error getting empresa statistics: {e}")
             return {}
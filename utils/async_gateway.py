@@ -0,0 +1,557 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway ASGI para el modo de servicio asíncrono (`SERVER_MODE=async`).
+
+Las peticiones a `PROXY_PREFIX/<endpoint>` se atienden de forma nativa sobre un
+`httpx.AsyncClient` con pool de conexiones: una llamada lenta al backend solo
+ocupa una corrutina, no un worker completo. El resto de rutas (páginas,
+plantillas y JSON de administración) se delegan a la app Flask existente a
+través de un puente WSGI con un pool de hilos acotado, por lo que siguen
+funcionando sin cambios.
+
+La caché de respuestas, la coalescencia de GET y el refresh single-flight son
+los mismos que usa el modo sync.
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, quote
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+from itsdangerous import BadSignature
+from werkzeug.http import dump_cookie, parse_accept_header, parse_cookie, parse_etags, unquote_etag
+
+from utils.api_client import APIClient
+from utils.compression import accepts_encoding, compress_for, should_compress, weak_etag
+from utils.config import (
+    ASYNC_BACKEND_TIMEOUT,
+    ASYNC_MAX_CONNECTIONS,
+    ASYNC_MAX_KEEPALIVE,
+    ASYNC_WSGI_THREADS,
+    BACKEND_POOL_IDLE_TIMEOUT,
+    CORS_ORIGINS,
+    DEBUG_MODE,
+    PROXY_BUFFER_LIMIT,
+    PROXY_CACHE_ENABLED,
+    PROXY_PREFIX,
+    PROXY_STREAM_CHUNK_SIZE,
+    PROXY_STREAMING_ENABLED,
+    REQUEST_COALESCING_ENABLED,
+    REQUEST_COALESCING_WAIT_TIMEOUT,
+)
+from utils.metrics import UpstreamTimer, http_in_flight, http_request_duration, http_requests, proxy_errors
+from utils.proxy_stream import HOP_BY_HOP_HEADERS, PUBLIC_PROXY_ENDPOINTS, should_buffer_response
+from utils.request_coalescer import endpoint_template, request_coalescer
+from utils.response_cache import CachedResponse, ResponseCache, cache_scope, resource_prefix
+from utils.token_refresh import refresh_coordinator
+
+PROXY_METHODS = frozenset({'GET', 'POST', 'PUT', 'DELETE', 'PATCH'})
+
+# Las mismas cabeceras que añade `after_request` en la app Flask
+_SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+)
+
+# Uvicorn escribe sus propias cabeceras Date/Server
+_UPSTREAM_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {'set-cookie', 'server', 'date'}
+# El cuerpo bufferizado ya viene decodificado por httpx
+_BUFFERED_EXCLUDED_HEADERS = _UPSTREAM_EXCLUDED_HEADERS | {'content-length', 'content-encoding'}
+
+# Etiqueta de métricas del proxy (la misma regla que registra Flask)
+_PROXY_RULE = f'{PROXY_PREFIX}/<path:endpoint>'
+
+Headers = List[Tuple[str, str]]
+
+
+class _Reply:
+    """Respuesta del backend ya leída en memoria (compartible entre peticiones)."""
+
+    __slots__ = ('status', 'headers', 'body', 'cookies', 'etag', 'cache_entry')
+
+    def __init__(self, resp: httpx.Response, body: bytes) -> None:
+        self.status = resp.status_code
+        self.headers = [
+            (name, value)
+            for name, value in resp.headers.multi_items()
+            if name.lower() not in _BUFFERED_EXCLUDED_HEADERS
+        ]
+        self.body = body
+        self.cookies = _backend_cookies(resp)
+        self.etag = resp.headers.get('ETag')
+        self.cache_entry = CachedResponse.from_backend(resp) if resp.status_code == 200 else None
+
+
+class _ProxyRequest:
+    """Datos de la petición entrante que necesita el proxy."""
+
+    def __init__(self, scope: Dict[str, Any]) -> None:
+        self.method = scope['method'].upper()
+        self.headers: Dict[str, str] = {}
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').lower()
+            value = raw_value.decode('latin-1')
+            self.headers[name] = f"{self.headers[name]}, {value}" if name in self.headers else value
+        self.cookies = parse_cookie(self.headers.get('cookie', ''))
+        self.accept_encodings = parse_accept_header(self.headers.get('accept-encoding'))
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = parse_qsl(self.query_string, keep_blank_values=True)
+
+        prefix_length = len(PROXY_PREFIX) + 1
+        self.endpoint = scope['path'][prefix_length:]
+        raw_path = scope.get('raw_path')
+        if raw_path:
+            self.raw_endpoint = raw_path.decode('latin-1').split('?', 1)[0][prefix_length:]
+        else:
+            self.raw_endpoint = quote(self.endpoint)
+
+        length = self.headers.get('content-length')
+        self.content_length = int(length) if length and length.isdigit() else None
+        self.chunked = 'chunked' in self.headers.get('transfer-encoding', '').lower()
+
+
+def _backend_cookies(resp: httpx.Response) -> List[Tuple[str, str]]:
+    return [(cookie.name, cookie.value) for cookie in resp.cookies.jar]
+
+
+def _set_cookie_headers(cookies: List[Tuple[str, str]], secure: bool) -> Headers:
+    return [
+        ('Set-Cookie', dump_cookie(name, value, path='/', secure=secure, httponly=True, samesite='Lax'))
+        for name, value in cookies
+        if value is not None
+    ]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """True si el navegador ya tiene esta versión (equivalente a `make_conditional`)."""
+    if not if_none_match or not etag:
+        return False
+    value, _ = unquote_etag(etag)
+    return parse_etags(if_none_match).contains_weak(value)
+
+
+class AsyncProxyGateway:
+    """Aplicación ASGI: proxy asíncrono nativo y la app Flask detrás de un puente WSGI."""
+
+    def __init__(self, flask_app: Flask, backend_client: APIClient, response_cache: ResponseCache) -> None:
+        self.flask_app = flask_app
+        self.backend_client = backend_client
+        self.response_cache = response_cache
+        self.wsgi = WSGIMiddleware(flask_app, workers=ASYNC_WSGI_THREADS)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente del event loop del worker (se crea tras el fork)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.backend_client.base_url,
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+                    keepalive_expiry=BACKEND_POOL_IDLE_TIMEOUT
+                ),
+                timeout=httpx.Timeout(ASYNC_BACKEND_TIMEOUT),
+                follow_redirects=False
+            )
+        return self._client
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and self._is_proxy_request(scope):
+            await self._proxy(scope, receive, send)
+        elif scope['type'] == 'http':
+            await self.wsgi(scope, receive, send)
+        else:
+            # Sin soporte de websockets en este servidor
+            await receive()
+            await send({'type': 'websocket.close', 'code': 1000})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._client is not None:
+                    await self._client.aclose()
+                    self._client = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _is_proxy_request(scope) -> bool:
+        # OPTIONS (preflight CORS) y métodos no soportados los resuelve Flask
+        return scope['path'].startswith(f'{PROXY_PREFIX}/') and scope['method'].upper() in PROXY_METHODS
+
+    # ------------------------------------------------------------------
+    # Proxy
+    # ------------------------------------------------------------------
+    async def _proxy(self, scope, receive, send) -> None:
+        req = _ProxyRequest(scope)
+
+        if req.endpoint not in PUBLIC_PROXY_ENDPOINTS and not req.cookies.get('auth_token'):
+            await self._send_json(send, req, 401, b'{"error":"No autenticado"}')
+            return
+
+        started = False
+        status = 500
+        began = time.perf_counter()
+
+        async def tracked_send(message):
+            nonlocal started, status
+            if message['type'] == 'http.response.start':
+                started = True
+                status = message['status']
+            await send(message)
+
+        http_in_flight.labels(server='gateway').inc()
+        try:
+            await self._forward(req, receive, tracked_send)
+        except Exception as exc:  # noqa: BLE001
+            print(f"PROXY ERROR: PROXY ERROR en /{req.endpoint}: {exc}")
+            proxy_errors.labels(kind='stream_aborted' if started else 'exception').inc()
+            if started:
+                # La respuesta ya empezó: se corta la conexión
+                raise
+            await self._send_json(send, req, 500, b'{"error":"Error del servidor"}')
+        finally:
+            http_in_flight.labels(server='gateway').dec()
+            # Misma etiqueta que la regla de Flask del proxy en modo sync
+            http_request_duration.labels(endpoint=_PROXY_RULE, method=req.method).observe(time.perf_counter() - began)
+            http_requests.labels(endpoint=_PROXY_RULE, method=req.method, status=str(status)).inc()
+
+    async def _forward(self, req: _ProxyRequest, receive, send) -> None:
+        backend_endpoint = f"/{req.raw_endpoint}"
+        cookies = dict(req.cookies)
+
+        headers = {'Content-Type': 'application/json'}
+        if req.endpoint == 'api/contact/send':
+            headers['User-Agent'] = 'RESCUE-Frontend/1.0'
+
+        body: Union[bytes, Any, None] = None
+        replayable = True
+        if req.method in ('POST', 'PUT', 'PATCH'):
+            if req.headers.get('content-type'):
+                headers['Content-Type'] = req.headers['content-type']
+            if req.content_length is None and not req.chunked:
+                body = await self._read_body(receive)
+            elif req.content_length is not None and req.content_length <= PROXY_BUFFER_LIMIT:
+                body = await self._read_body(receive)
+            else:
+                if req.content_length is not None:
+                    headers['Content-Length'] = str(req.content_length)
+                # Un cuerpo en streaming no se puede reenviar tras un refresh de token
+                body = self._iter_body(receive)
+                replayable = False
+
+        cache_key = None
+        cached_entry = None
+        if req.method == 'GET' and PROXY_CACHE_ENABLED and req.endpoint not in PUBLIC_PROXY_ENDPOINTS:
+            cache_key = self.response_cache.make_key(
+                cache_scope(self._session_user(req.cookies), req.cookies.get('auth_token', '')),
+                backend_endpoint,
+                req.args
+            )
+            cached_entry = self.response_cache.get(cache_key)
+            if cached_entry is not None:
+                headers.update(cached_entry.conditional_headers())
+
+        url = f"{backend_endpoint}?{req.query_string}" if req.query_string else backend_endpoint
+
+        # Lo que el backend ya comprimió se relaya sin decodificar si el navegador lo acepta
+        # (salvo GET cacheables: la caché guarda el cuerpo decodificado)
+        relay_encoded_allowed = cache_key is None
+
+        async def fetch():
+            resp, refreshed = await self._send_upstream(req.method, url, headers, cookies, body, replayable)
+            relay_encoded = relay_encoded_allowed and accepts_encoding(
+                req.accept_encodings,
+                resp.headers.get('content-encoding')
+            )
+            if PROXY_STREAMING_ENABLED and (relay_encoded or not should_buffer_response(resp, PROXY_BUFFER_LIMIT)):
+                return resp, refreshed
+            try:
+                return _Reply(resp, await resp.aread()), refreshed
+            finally:
+                await resp.aclose()
+
+        if req.method == 'GET' and REQUEST_COALESCING_ENABLED:
+            result, refreshed = await self._coalesced(backend_endpoint, req, headers, cookies, fetch)
+        else:
+            result, refreshed = await fetch()
+
+        status = result.status if isinstance(result, _Reply) else result.status_code
+
+        # Cualquier escritura invalida la colección afectada
+        if req.method in ('POST', 'PUT', 'PATCH', 'DELETE') and status < 400:
+            self.response_cache.invalidate_prefix(resource_prefix(backend_endpoint))
+
+        refreshed_headers = _set_cookie_headers(list(refreshed.items()), secure=not DEBUG_MODE)
+
+        if cached_entry is not None:
+            if status == 304:
+                # El backend confirmó que la copia local sigue vigente
+                if not isinstance(result, _Reply):
+                    await result.aclose()
+                    backend_cookies = _backend_cookies(result)
+                else:
+                    backend_cookies = result.cookies
+                self.response_cache.record_revalidated()
+                response_headers = list(cached_entry.headers)
+                response_headers += _set_cookie_headers(backend_cookies, secure=False) + refreshed_headers
+                if _etag_matches(req.headers.get('if-none-match'), cached_entry.etag):
+                    await self._send(send, req, 304, response_headers, b'')
+                else:
+                    await self._send(send, req, 200, response_headers, cached_entry.body)
+                return
+            self.response_cache.discard(cache_key)
+
+        if not isinstance(result, _Reply):
+            # Respuestas binarias o JSON grandes se relayan por bloques
+            response_headers = [
+                (name, value)
+                for name, value in result.headers.multi_items()
+                if name.lower() not in _UPSTREAM_EXCLUDED_HEADERS
+            ]
+            response_headers += _set_cookie_headers(_backend_cookies(result), secure=False) + refreshed_headers
+            await self._stream(send, req, result, response_headers)
+            return
+
+        if cache_key is not None and result.cache_entry is not None and not result.cookies:
+            self.response_cache.put(cache_key, result.cache_entry)
+
+        response_headers = list(result.headers)
+        response_headers += _set_cookie_headers(result.cookies, secure=False) + refreshed_headers
+        if (
+            req.method == 'GET'
+            and result.status == 200
+            and _etag_matches(req.headers.get('if-none-match'), result.etag)
+        ):
+            # 304 sin cuerpo si el navegador ya tiene esta versión
+            await self._send(send, req, 304, response_headers, b'')
+            return
+        await self._send(send, req, result.status, response_headers, result.body)
+
+    async def _send_upstream(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        cookies: Dict[str, str],
+        body: Any,
+        replayable: bool,
+    ) -> Tuple[httpx.Response, Dict[str, str]]:
+        """Envía la petición al backend; ante un 401 refresca el token y reintenta una vez."""
+        resp = await self._timed_send(method, url, headers, cookies, body)
+
+        path = url.split('?', 1)[0]
+        refresh_token = cookies.get('refresh_token')
+        if (
+            resp.status_code != 401
+            or not replayable
+            or not refresh_token
+            or path in ('/auth/login', '/auth/refresh')
+        ):
+            return resp, {}
+
+        # Mismo coordinador que el modo sync: un único refresh por refresh token
+        new_cookies = await asyncio.to_thread(
+            refresh_coordinator.run,
+            refresh_token,
+            lambda: self.backend_client._request_token_refresh(cookies)
+        )
+        if not new_cookies:
+            return resp, {}
+
+        await resp.aclose()
+        retry_cookies = dict(cookies)
+        retry_cookies.update(new_cookies)
+        resp = await self._timed_send(method, url, headers, retry_cookies, body)
+        return resp, new_cookies
+
+    async def _timed_send(self, method, url, headers, cookies, body) -> httpx.Response:
+        timer = UpstreamTimer(method, url, 'async')
+        try:
+            resp = await self.client.send(self._build_request(method, url, headers, cookies, body), stream=True)
+        except BaseException:
+            timer.finish(None)
+            raise
+        timer.finish(resp.status_code)
+        return resp
+
+    def _build_request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        cookies: Dict[str, str],
+        body: Any,
+    ) -> httpx.Request:
+        request_headers = dict(headers)
+        auth_token = cookies.get('auth_token')
+        if auth_token:
+            request_headers['Authorization'] = f'Bearer {auth_token}'
+        if cookies:
+            request_headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in cookies.items())
+        return self.client.build_request(method, url, headers=request_headers, content=body)
+
+    async def _coalesced(self, backend_endpoint, req: _ProxyRequest, headers, cookies, fetch):
+        """Single-flight por event loop para GET idénticos en vuelo."""
+        template = endpoint_template(backend_endpoint)
+        key = (
+            backend_endpoint,
+            tuple(sorted(req.args)),
+            tuple(sorted(headers.items())),
+            hashlib.sha256(cookies.get('auth_token', '').encode('utf-8')).hexdigest(),
+        )
+        request_coalescer.record(template, 'requests')
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight), REQUEST_COALESCING_WAIT_TIMEOUT)
+            except Exception:  # noqa: BLE001
+                result = None
+            if result is not None and isinstance(result[0], _Reply):
+                return result
+            request_coalescer.record(template, 'upstream')
+            return await fetch()
+
+        flight = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = flight
+        request_coalescer.record(template, 'upstream')
+        try:
+            result = await fetch()
+            # Las respuestas en streaming solo se pueden leer una vez
+            flight.set_result(result if isinstance(result[0], _Reply) else None)
+            return result
+        except BaseException:
+            flight.set_result(None)
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _session_user(self, cookies: Dict[str, str]) -> Dict[str, Any]:
+        """Usuario de la sesión Flask firmada (solo lectura)."""
+        raw_session = cookies.get(self.flask_app.config.get('SESSION_COOKIE_NAME', 'session'))
+        if not raw_session:
+            return {}
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        if serializer is None:
+            return {}
+        try:
+            data = serializer.loads(
+                raw_session,
+                max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+            )
+        except BadSignature:
+            return {}
+        return data.get('user') or {}
+
+    # ------------------------------------------------------------------
+    # E/S ASGI
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _iter_body(receive):
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            if chunk:
+                yield chunk
+            if not message.get('more_body'):
+                return
+
+    @staticmethod
+    def _extra_headers(req: _ProxyRequest) -> Headers:
+        headers = list(_SECURITY_HEADERS)
+        origin = req.headers.get('origin')
+        if origin and (origin in CORS_ORIGINS or '*' in CORS_ORIGINS):
+            headers += [
+                ('Access-Control-Allow-Origin', origin),
+                ('Access-Control-Allow-Credentials', 'true'),
+                ('Vary', 'Origin'),
+            ]
+        if DEBUG_MODE:
+            headers += [
+                ('Cache-Control', 'no-cache, no-store, must-revalidate'),
+                ('Pragma', 'no-cache'),
+                ('Expires', '0'),
+            ]
+        return headers
+
+    @staticmethod
+    def _encode_headers(headers: Headers) -> List[Tuple[bytes, bytes]]:
+        return [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers]
+
+    async def _send(self, send, req: _ProxyRequest, status: int, headers: Headers, body: bytes) -> None:
+        headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+        headers, body = self._compress(req, status, headers, body)
+        headers += self._extra_headers(req)
+        if status != 304:
+            headers.append(('Content-Length', str(len(body))))
+        await send({'type': 'http.response.start', 'status': status, 'headers': self._encode_headers(headers)})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    def _compress(req: _ProxyRequest, status: int, headers: Headers, body: bytes) -> Tuple[Headers, bytes]:
+        """Cuerpos bufferizados (ya decodificados) con la misma política que el hook de Flask."""
+        values = {name.lower(): value for name, value in headers}
+        if not should_compress(
+            status,
+            values.get('content-type'),
+            values.get('content-encoding'),
+            len(body)
+        ):
+            return headers, body
+        if 'no-transform' in values.get('cache-control', ''):
+            return headers, body
+
+        headers = headers + [('Vary', 'Accept-Encoding')]
+        compressed = compress_for(req.accept_encodings, body)
+        if compressed is None:
+            return headers, body
+        encoding, body = compressed
+        headers = [
+            (name, weak_etag(value) if name.lower() == 'etag' else value)
+            for name, value in headers
+        ]
+        headers.append(('Content-Encoding', encoding))
+        return headers, body
+
+    async def _send_json(self, send, req: _ProxyRequest, status: int, body: bytes) -> None:
+        await self._send(send, req, status, [('Content-Type', 'application/json')], body)
+
+    async def _stream(self, send, req: _ProxyRequest, resp: httpx.Response, headers: Headers) -> None:
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': resp.status_code,
+                'headers': self._encode_headers(headers + self._extra_headers(req))
+            })
+            # Bytes sin decodificar: Content-Encoding y Content-Length siguen siendo válidos
+            async for chunk in resp.aiter_raw(PROXY_STREAM_CHUNK_SIZE):
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await resp.aclose()
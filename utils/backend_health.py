@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Monitor de salud del backend en segundo plano.
+
+Un hilo por proceso consulta `/health` periódicamente y guarda el último
+estado conocido. Las rutas solo leen ese estado, de modo que una página nunca
+espera a que el backend responda. El hilo se arranca de forma perezosa y se
+vuelve a crear si cambia el PID, lo que lo hace compatible con el fork de
+gunicorn `--preload` (los hilos no sobreviven al fork).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.http_pool import get_backend_session
+
+STATE_UNKNOWN = 'unknown'
+STATE_UP = 'up'
+STATE_DEGRADED = 'degraded'
+STATE_DOWN = 'down'
+
+
+class BackendHealthMonitor:
+    """Sondea el backend y expone un estado cacheado thread-safe."""
+
+    def __init__(
+        self,
+        base_url: str,
+        interval: float = 10.0,
+        timeout: float = 3.0,
+        degraded_latency: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.health_url = f"{base_url.rstrip('/')}/health"
+        self.interval = interval
+        self.timeout = timeout
+        self.degraded_latency = degraded_latency
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._state = STATE_UNKNOWN
+        self._last_latency: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._last_checked: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._consecutive_failures = 0
+
+    # ---------- Ciclo del hilo ----------
+
+    def ensure_started(self) -> None:
+        """Arranca el hilo en el proceso actual si aún no existe."""
+        pid = os.getpid()
+        if self._thread_pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread_pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread_pid != pid:
+                # Proceso hijo tras fork: el estado heredado no es confiable
+                self._reset_state()
+                self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='backend-health-prober',
+                daemon=True
+            )
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _next_delay(self) -> float:
+        if self._consecutive_failures == 0:
+            return self.interval
+        # Backoff exponencial mientras el backend siga caído
+        return min(self.interval * (2 ** self._consecutive_failures), self.max_backoff)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.probe()
+            self._stop_event.wait(self._next_delay())
+
+    # ---------- Sondeo ----------
+
+    def probe(self) -> str:
+        """Ejecuta un sondeo inmediato y actualiza el estado."""
+        started = time.monotonic()
+        error = None
+        try:
+            response = get_backend_session().get(self.health_url, timeout=self.timeout)
+            latency = time.monotonic() - started
+            response.close()
+            if not response.ok:
+                new_state = STATE_DOWN
+                error = f"HTTP {response.status_code}"
+            elif latency > self.degraded_latency:
+                new_state = STATE_DEGRADED
+            else:
+                new_state = STATE_UP
+        except Exception as exc:  # noqa: BLE001
+            latency = time.monotonic() - started
+            new_state = STATE_DOWN
+            error = str(exc)
+
+        with self._lock:
+            now = time.time()
+            if new_state != self._state:
+                self._last_change = now
+            self._state = new_state
+            self._last_latency = latency
+            self._last_checked = now
+            self._last_error = error
+            self._consecutive_failures = self._consecutive_failures + 1 if new_state == STATE_DOWN else 0
+        return new_state
+
+    # ---------- Lectura desde las rutas ----------
+
+    @property
+    def state(self) -> str:
+        self.ensure_started()
+        return self._state
+
+    def is_available(self) -> bool:
+        """El backend se considera disponible salvo que el último sondeo haya fallado."""
+        return self.state != STATE_DOWN
+
+    def snapshot(self) -> Dict[str, Any]:
+        self.ensure_started()
+        with self._lock:
+            return {
+                'state': self._state,
+                'last_latency_ms': round(self._last_latency * 1000, 1) if self._last_latency is not None else None,
+                'last_change': self._last_change,
+                'last_checked': self._last_checked,
+                'last_error': self._last_error,
+                'consecutive_failures': self._consecutive_failures,
+            }
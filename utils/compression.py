@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Compresión de respuestas (Brotli y gzip).
+
+Se comprimen al vuelo los cuerpos generados en la petición (HTML de
+`render_template`, JSON del proxy ya decodificado) cuando superan
+`COMPRESSION_MIN_BYTES` y su tipo está en `COMPRESSION_MIMETYPES`. Lo que ya
+trae `Content-Encoding` (variantes precomprimidas de `static/`, respuestas
+comprimidas por el backend y relayadas en crudo) no se toca. El nivel de cada
+algoritmo es configurable: más alto ahorra bytes a cambio de CPU.
+"""
+
+import gzip
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.config import (
+    COMPRESSION_BROTLI_LEVEL,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIMETYPES,
+    COMPRESSION_MIN_BYTES,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+# Preferencia del servidor ante calidades iguales en Accept-Encoding
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return tuple(encoding for encoding in ENCODING_PREFERENCE if encoding != 'br' or brotli is not None)
+
+
+def _qualities(accepted: Iterable[Tuple[str, float]]) -> Dict[str, float]:
+    return {value.lower(): quality for value, quality in accepted}
+
+
+def choose_encoding(accepted: Iterable[Tuple[str, float]], offered: Iterable[str]) -> Optional[str]:
+    """Codificación ofrecida con mayor calidad en Accept-Encoding (`None` si ninguna)."""
+    qualities = _qualities(accepted)
+    wildcard = qualities.get('*', 0)
+    offered = set(offered)
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in ENCODING_PREFERENCE:
+        quality = qualities.get(encoding, wildcard)
+        if encoding in offered and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def accepts_encoding(accepted: Iterable[Tuple[str, float]], encoding: Optional[str]) -> bool:
+    """Indica si el cliente acepta una codificación concreta (la del backend)."""
+    if not encoding:
+        return False
+    qualities = _qualities(accepted)
+    return qualities.get(encoding.strip().lower(), qualities.get('*', 0)) > 0
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return mimetype in COMPRESSION_MIMETYPES or mimetype.endswith('+json')
+
+
+def compress_body(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_LEVEL if level is None else level)
+    # mtime=0: la misma entrada produce siempre los mismos bytes
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def weak_etag(etag: str) -> str:
+    """El cuerpo comprimido no es idéntico byte a byte: el ETag pasa a débil."""
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+class _CompressionStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, bytes_in: int, bytes_out: Optional[int]) -> None:
+        with self._lock:
+            if bytes_out is None:
+                self.skipped += 1
+                return
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': COMPRESSION_ENABLED,
+                'encodings': list(available_encodings()),
+                'responses': self.responses,
+                'skipped': self.skipped,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            }
+
+
+_stats = _CompressionStats()
+
+
+def should_compress(status: int, content_type: Optional[str], content_encoding: Optional[str], size: int) -> bool:
+    """Respuesta candidata: 2xx completa, tipo permitido, sin codificar y por encima del umbral."""
+    return (
+        COMPRESSION_ENABLED
+        and 200 <= status < 300
+        and status not in (204, 206)
+        and not content_encoding
+        and size >= COMPRESSION_MIN_BYTES
+        and is_compressible(content_type)
+    )
+
+
+def compress_for(accepted: Iterable[Tuple[str, float]], body: bytes) -> Optional[Tuple[str, bytes]]:
+    """(codificación, cuerpo comprimido) según Accept-Encoding; `None` si no compensa."""
+    encoding = choose_encoding(accepted, available_encodings())
+    if encoding is None:
+        return None
+    data = compress_body(body, encoding)
+    if len(data) >= len(body):
+        _stats.record(len(body), None)
+        return None
+    _stats.record(len(body), len(data))
+    return encoding, data
+
+
+def stats() -> Dict[str, Any]:
+    return _stats.snapshot()
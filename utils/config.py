@@ -5,6 +5,7 @@ Todas las variables de configuración necesarias para el funcionamiento del sist
 """
 
 import os
+import tempfile
 from typing import Optional
 
 from dotenv import load_dotenv, find_dotenv
@@ -32,6 +33,33 @@ _load_environment()
 # ========== CONFIGURACIÓN DE BACKEND - URL ÚNICA ==========
 BACKEND_API_URL = _get_env_var('BACKEND_API_URL', required=True)
 
+# ========== POOL DE CONEXIONES HACIA EL BACKEND ==========
+BACKEND_POOL_CONNECTIONS = int(_get_env_var('BACKEND_POOL_CONNECTIONS', default='10'))
+BACKEND_POOL_MAXSIZE = int(_get_env_var('BACKEND_POOL_MAXSIZE', default='20'))
+BACKEND_POOL_IDLE_TIMEOUT = float(_get_env_var('BACKEND_POOL_IDLE_TIMEOUT', default='30'))
+BACKEND_POOL_BLOCK = _get_env_var('BACKEND_POOL_BLOCK', default='false').lower() in ('true', '1', 'yes', 'on')
+
+# ========== MONITOR DE SALUD DEL BACKEND ==========
+BACKEND_HEALTH_INTERVAL = float(_get_env_var('BACKEND_HEALTH_INTERVAL', default='10'))
+BACKEND_HEALTH_TIMEOUT = float(_get_env_var('BACKEND_HEALTH_TIMEOUT', default='3'))
+BACKEND_HEALTH_DEGRADED_LATENCY = float(_get_env_var('BACKEND_HEALTH_DEGRADED_LATENCY', default='1'))
+BACKEND_HEALTH_MAX_BACKOFF = float(_get_env_var('BACKEND_HEALTH_MAX_BACKOFF', default='60'))
+
+# ========== STREAMING DEL PROXY ==========
+PROXY_STREAMING_ENABLED = _get_env_var('PROXY_STREAMING_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+PROXY_STREAM_CHUNK_SIZE = int(_get_env_var('PROXY_STREAM_CHUNK_SIZE', default='65536'))
+# Cuerpos JSON por debajo de este tamaño (bytes) siguen el camino en memoria
+PROXY_BUFFER_LIMIT = int(_get_env_var('PROXY_BUFFER_LIMIT', default='1048576'))
+
+# ========== MODO DE SERVICIO (SYNC / ASYNC) ==========
+# 'sync': gunicorn + Flask (WSGI); 'async': gateway ASGI con proxy asíncrono
+SERVER_MODE = _get_env_var('SERVER_MODE', default='sync').strip().lower()
+ASYNC_MAX_CONNECTIONS = int(_get_env_var('ASYNC_MAX_CONNECTIONS', default='1000'))
+ASYNC_MAX_KEEPALIVE = int(_get_env_var('ASYNC_MAX_KEEPALIVE', default='100'))
+ASYNC_BACKEND_TIMEOUT = float(_get_env_var('ASYNC_BACKEND_TIMEOUT', default='30'))
+# Hilos para las rutas Flask que siguen corriendo como WSGI dentro del modo async
+ASYNC_WSGI_THREADS = int(_get_env_var('ASYNC_WSGI_THREADS', default='32'))
+
 # ========== CONFIGURACIÓN DE WEBSOCKET ==========
 WEBSOCKET_URL = _get_env_var('WEBSOCKET_URL', required=True)
 
@@ -42,14 +70,171 @@ PROXY_PREFIX = _get_env_var('PROXY_PREFIX', required=True)
 SECRET_KEY = _get_env_var('SECRET_KEY', required=True)
 SESSION_LIFETIME = int(_get_env_var('SESSION_LIFETIME', required=True))
 
+# ========== CACHÉ DE RESPUESTAS DEL PROXY ==========
+PROXY_CACHE_ENABLED = _get_env_var('PROXY_CACHE_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+PROXY_CACHE_MAX_BYTES = int(_get_env_var('PROXY_CACHE_MAX_BYTES', default='33554432'))
+PROXY_CACHE_MAX_ENTRY_BYTES = int(_get_env_var('PROXY_CACHE_MAX_ENTRY_BYTES', default='2097152'))
+
+# ========== COALESCENCIA DE GET CONCURRENTES ==========
+REQUEST_COALESCING_ENABLED = _get_env_var('REQUEST_COALESCING_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+REQUEST_COALESCING_WAIT_TIMEOUT = float(_get_env_var('REQUEST_COALESCING_WAIT_TIMEOUT', default='30'))
+
+# ========== CARGA PARALELA (FAN-OUT) ==========
+FANOUT_MAX_WORKERS = int(_get_env_var('FANOUT_MAX_WORKERS', default='8'))
+FANOUT_DEFAULT_TIMEOUT = float(_get_env_var('FANOUT_DEFAULT_TIMEOUT', default='10'))
+
+# ========== SNAPSHOTS DE ESTADÍSTICAS POR EMPRESA ==========
+EMPRESA_STATS_FRESH_TTL = float(_get_env_var('EMPRESA_STATS_FRESH_TTL', default='30'))
+EMPRESA_STATS_HARD_TTL = float(_get_env_var('EMPRESA_STATS_HARD_TTL', default='300'))
+EMPRESA_STATS_MAX_ENTRIES = int(_get_env_var('EMPRESA_STATS_MAX_ENTRIES', default='1024'))
+
+# ========== CACHÉ DE VALIDACIÓN DE TOKENS ==========
+TOKEN_CACHE_TTL = float(_get_env_var('TOKEN_CACHE_TTL', default='300'))
+TOKEN_CACHE_MAX_ENTRIES = int(_get_env_var('TOKEN_CACHE_MAX_ENTRIES', default='2048'))
+# Lectura local (sin verificar firma) de `exp` y `role` del JWT
+TOKEN_LOCAL_DECODE = _get_env_var('TOKEN_LOCAL_DECODE', default='true').lower() in ('true', '1', 'yes', 'on')
+# Endpoint autenticado que responde 401 con un token inválido o revocado. Con /health (que no
+# comprueba el token) se sigue consultando al backend, pero el resultado no se cachea
+TOKEN_VALIDATION_ENDPOINT = _get_env_var('TOKEN_VALIDATION_ENDPOINT', default='/auth/sessions')
+
+# ========== REFRESH DE TOKENS SINGLE-FLIGHT ==========
+TOKEN_REFRESH_GRACE = float(_get_env_var('TOKEN_REFRESH_GRACE', default='10'))
+TOKEN_REFRESH_WAIT_TIMEOUT = float(_get_env_var('TOKEN_REFRESH_WAIT_TIMEOUT', default='10'))
+# Directorio local para el lock entre workers (vacío = solo dentro del proceso)
+TOKEN_REFRESH_LOCK_DIR = _get_env_var('TOKEN_REFRESH_LOCK_DIR', default='')
+
 # ========== CONFIGURACIÓN DE DEBUG ==========
 DEBUG_MODE = _get_env_var('DEBUG', required=True).lower() in ('true', '1', 'yes', 'on')
 
+# ========== LOGGING ESTRUCTURADO ==========
+LOG_LEVEL = _get_env_var('LOG_LEVEL', default='DEBUG' if DEBUG_MODE else 'INFO').upper()
+# Muestreo por endpoint o evento: "/api/empresas=0.1,login_cookies=1"
+LOG_SAMPLE_RATES = {
+    key.strip(): float(rate)
+    for key, _, rate in (
+        item.partition('=') for item in _get_env_var('LOG_SAMPLE_RATES', default='').split(',') if '=' in item
+    )
+}
+LOG_DEFAULT_SAMPLE_RATE = float(_get_env_var('LOG_DEFAULT_SAMPLE_RATE', default='1.0'))
+LOG_FIELD_MAX_CHARS = int(_get_env_var('LOG_FIELD_MAX_CHARS', default='512'))
+
+# ========== MÉTRICAS (PROMETHEUS) ==========
+METRICS_ENABLED = _get_env_var('METRICS_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+# Directorio compartido por los workers de gunicorn (modo multiproceso de prometheus_client)
+METRICS_MULTIPROC_DIR = _get_env_var(
+    'METRICS_MULTIPROC_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-metrics')
+)
+# Si se define, /internal/metrics exige "Authorization: Bearer <token>"; si no, solo IPs privadas
+METRICS_TOKEN = _get_env_var('METRICS_TOKEN', default='')
+
+# ========== ARCHIVOS ESTÁTICOS ==========
+# Las URLs con huella de contenido (static_url) no cambian mientras no cambie el archivo
+STATIC_IMMUTABLE_MAX_AGE = int(_get_env_var('STATIC_IMMUTABLE_MAX_AGE', default='31536000'))
+# Variantes .br/.gz generadas al arrancar (solo se regeneran si cambia el original)
+STATIC_PRECOMPRESS_ENABLED = _get_env_var('STATIC_PRECOMPRESS_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+STATIC_PRECOMPRESS_DIR = _get_env_var(
+    'STATIC_PRECOMPRESS_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-static-precompressed')
+)
+STATIC_PRECOMPRESS_MIN_BYTES = int(_get_env_var('STATIC_PRECOMPRESS_MIN_BYTES', default='1024'))
+STATIC_BROTLI_QUALITY = int(_get_env_var('STATIC_BROTLI_QUALITY', default='11'))
+STATIC_GZIP_LEVEL = int(_get_env_var('STATIC_GZIP_LEVEL', default='9'))
+
+# ========== COMPRESIÓN DE RESPUESTAS ==========
+COMPRESSION_ENABLED = _get_env_var('COMPRESSION_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+# Por debajo de este tamaño la cabecera y la CPU no compensan el ahorro
+COMPRESSION_MIN_BYTES = int(_get_env_var('COMPRESSION_MIN_BYTES', default='1024'))
+COMPRESSION_MIMETYPES = frozenset(
+    mimetype.strip().lower()
+    for mimetype in _get_env_var(
+        'COMPRESSION_MIMETYPES',
+        default='text/html,application/json,text/plain,text/css,text/javascript,application/javascript,image/svg+xml'
+    ).split(',')
+    if mimetype.strip()
+)
+# Niveles al vuelo: Brotli 0-11, gzip 1-9 (más alto = menos bytes, más CPU)
+COMPRESSION_BROTLI_LEVEL = int(_get_env_var('COMPRESSION_BROTLI_LEVEL', default='4'))
+COMPRESSION_GZIP_LEVEL = int(_get_env_var('COMPRESSION_GZIP_LEVEL', default='6'))
+
+# ========== PLANTILLAS ==========
+# Bytecode de Jinja en disco, compartido entre workers y reinicios (vacío lo desactiva)
+JINJA_BYTECODE_CACHE_DIR = _get_env_var(
+    'JINJA_BYTECODE_CACHE_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-jinja-cache')
+)
+# Compila todas las plantillas al importar la app (con preload_app, una vez en el master)
+TEMPLATE_PRECOMPILE = _get_env_var('TEMPLATE_PRECOMPILE', default='true').lower() in ('true', '1', 'yes', 'on')
+# Caché en memoria de los bloques {% cache %} de las vistas SPA (por worker, desactivada en debug)
+FRAGMENT_CACHE_ENABLED = _get_env_var('FRAGMENT_CACHE_ENABLED', default='true').lower() in ('true', '1', 'yes', 'on')
+FRAGMENT_CACHE_MAX_BYTES = int(_get_env_var('FRAGMENT_CACHE_MAX_BYTES', default=str(8 * 1024 * 1024)))
+FRAGMENT_CACHE_MAX_ENTRY_BYTES = int(_get_env_var('FRAGMENT_CACHE_MAX_ENTRY_BYTES', default=str(512 * 1024)))
+
 # ========== CONFIGURACIÓN DE CORS ==========
 CORS_ORIGINS = [origin.strip() for origin in _get_env_var('CORS_ORIGINS', required=True).split(',') if origin.strip()]
 
 # ========== SERVICIO DE IMÁGENES ==========
 IMAGES_SERVICE_BASE_URL = _get_env_var('IMAGES_SERVICE_BASE_URL', required=True)
+# Índice de carpetas cacheado y compartido entre workers mediante un archivo local
+IMAGE_FOLDER_CACHE_TTL = float(_get_env_var('IMAGE_FOLDER_CACHE_TTL', default='60'))
+IMAGE_FOLDER_CACHE_FILE = _get_env_var(
+    'IMAGE_FOLDER_CACHE_FILE',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-image-folders.json')
+)
+# Listados de archivos por carpeta (normalizados bajo demanda, por worker)
+IMAGE_FILES_CACHE_TTL = float(_get_env_var('IMAGE_FILES_CACHE_TTL', default='60'))
+IMAGE_FILES_CACHE_MAX_FOLDERS = int(_get_env_var('IMAGE_FILES_CACHE_MAX_FOLDERS', default='64'))
+# Generación por carpeta en disco: subir o eliminar invalida el listado en todos los workers
+IMAGE_FILES_GENERATION_DIR = _get_env_var(
+    'IMAGE_FILES_GENERATION_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-image-folder-generations')
+)
+IMAGE_FILES_PAGE_MAX = int(_get_env_var('IMAGE_FILES_PAGE_MAX', default='500'))
+# Subidas en streaming: bloque de lectura, timeout según tamaño y progreso compartido
+IMAGES_UPLOAD_CHUNK_SIZE = int(_get_env_var('IMAGES_UPLOAD_CHUNK_SIZE', default='262144'))
+IMAGES_UPLOAD_MIN_THROUGHPUT = int(_get_env_var('IMAGES_UPLOAD_MIN_THROUGHPUT', default='262144'))
+IMAGES_UPLOAD_MAX_TIMEOUT = float(_get_env_var('IMAGES_UPLOAD_MAX_TIMEOUT', default='900'))
+UPLOAD_PROGRESS_DIR = _get_env_var(
+    'UPLOAD_PROGRESS_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-upload-progress')
+)
+# Subidas por lote (multipart o zip) en paralelo
+IMAGES_BATCH_MAX_WORKERS = int(_get_env_var('IMAGES_BATCH_MAX_WORKERS', default='4'))
+IMAGES_BATCH_MAX_FILES = int(_get_env_var('IMAGES_BATCH_MAX_FILES', default='500'))
+
+# Miniaturas derivadas de los originales (requiere Pillow)
+IMAGE_THUMBNAIL_SIZES = tuple(sorted(
+    int(size) for size in _get_env_var('IMAGE_THUMBNAIL_SIZES', default='160,320,640').split(',') if size.strip()
+))
+IMAGE_THUMBNAIL_QUALITY = int(_get_env_var('IMAGE_THUMBNAIL_QUALITY', default='80'))
+IMAGE_THUMBNAIL_CACHE_DIR = _get_env_var(
+    'IMAGE_THUMBNAIL_CACHE_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-thumbnails')
+)
+IMAGE_THUMBNAIL_CACHE_MAX_BYTES = int(_get_env_var('IMAGE_THUMBNAIL_CACHE_MAX_BYTES', default=str(256 * 1024 * 1024)))
+IMAGE_THUMBNAIL_MAX_SOURCE_BYTES = int(_get_env_var('IMAGE_THUMBNAIL_MAX_SOURCE_BYTES', default=str(25 * 1024 * 1024)))
+IMAGE_THUMBNAIL_MAX_AGE = int(_get_env_var('IMAGE_THUMBNAIL_MAX_AGE', default='604800'))
+
+# ========== PROXY DE MEDIOS (IMÁGENES Y SONIDOS) ==========
+# Orígenes permitidos para /media (separados por coma); por defecto solo el servicio de imágenes
+MEDIA_PROXY_ALLOWED_PREFIXES = tuple(
+    prefix.strip() for prefix in _get_env_var(
+        'MEDIA_PROXY_ALLOWED_PREFIXES',
+        default=IMAGES_SERVICE_BASE_URL or ''
+    ).split(',') if prefix.strip()
+)
+MEDIA_CACHE_DIR = _get_env_var('MEDIA_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'rescue-media'))
+MEDIA_CACHE_MAX_BYTES = int(_get_env_var('MEDIA_CACHE_MAX_BYTES', default=str(512 * 1024 * 1024)))
+MEDIA_CACHE_MAX_ENTRY_BYTES = int(_get_env_var('MEDIA_CACHE_MAX_ENTRY_BYTES', default=str(32 * 1024 * 1024)))
+MEDIA_CACHE_TTL = float(_get_env_var('MEDIA_CACHE_TTL', default='3600'))
+MEDIA_CLIENT_MAX_AGE = int(_get_env_var('MEDIA_CLIENT_MAX_AGE', default='86400'))
+
+# Imágenes base64 de tipos de alerta servidas por hash de contenido
+ALERT_IMAGE_CACHE_DIR = _get_env_var(
+    'ALERT_IMAGE_CACHE_DIR',
+    default=os.path.join(tempfile.gettempdir(), 'rescue-alert-images')
+)
+ALERT_IMAGE_CACHE_MAX_BYTES = int(_get_env_var('ALERT_IMAGE_CACHE_MAX_BYTES', default=str(128 * 1024 * 1024)))
 
 # ========== CONFIGURACIÓN PÚBLICA DE CONTACTO ==========
 # Variables seguras para exponer al frontend
@@ -116,6 +301,9 @@ def validate_config():
     if missing_vars:
         raise ValueError(f"Variables de configuración faltantes: {', '.join(missing_vars)}")
 
+    if SERVER_MODE not in ('sync', 'async'):
+        raise ValueError(f"SERVER_MODE inválido: {SERVER_MODE} (usa 'sync' o 'async')")
+
     return True
 
 # ========== FUNCIÓN DE AYUDA PARA DEBUGGING ==========
@@ -131,6 +319,9 @@ def print_config():
     print(f"🌐 CORS Origins: {', '.join(CORS_ORIGINS) if CORS_ORIGINS else '-'}")
     print(f"🔐 Secret Key: {'***' + SECRET_KEY[-4:] if len(SECRET_KEY) > 4 else '****'}")
     print(f"⏰ Session Lifetime: {SESSION_LIFETIME}s")
+    print(f"⚙️  Server Mode: {SERVER_MODE}")
+    print(f"📝  Log Level: {LOG_LEVEL}")
+    print(f"📊 Metrics: {'enabled' if METRICS_ENABLED else 'disabled'}")
     print("=" * 50)
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades para cachés en disco compartidas entre workers.
+
+Las entradas se escriben de forma atómica (archivo temporal + `os.replace`) y
+se acotan por tamaño total: la fecha de modificación hace de marca de último
+uso y `evict_lru` elimina primero los archivos más antiguos.
+"""
+
+import os
+import threading
+import time
+from typing import Tuple
+
+# Evita reescribir metadatos en cada acierto
+TOUCH_INTERVAL = 60.0
+
+
+def touch(path: str) -> None:
+    """Marca el archivo como usado recientemente."""
+    try:
+        if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def temp_path(path: str) -> str:
+    return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    tmp_path = temp_path(path)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    try:
+        with open(tmp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def evict_lru(directory: str, max_bytes: int, ratio: float = 0.9) -> Tuple[int, int]:
+    """Elimina los archivos menos usados hasta quedar bajo `ratio * max_bytes`.
+
+    Devuelve (bytes restantes, archivos eliminados).
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    evicted = 0
+    if total > max_bytes:
+        target = max_bytes * ratio
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+    return total, evicted
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshots de estadísticas por empresa con stale-while-revalidate.
+
+Las estadísticas de `/api/empresas/{empresa_id}/statistics` se guardan ya
+mapeadas a la estructura que consumen las plantillas. Una entrada fresca se
+sirve directamente; una entrada vencida pero dentro del TTL duro se sirve de
+inmediato mientras se refresca en segundo plano; pasado el TTL duro se vuelve a
+cargar de forma síncrona.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+
+from utils.config import EMPRESA_STATS_FRESH_TTL, EMPRESA_STATS_HARD_TTL, EMPRESA_STATS_MAX_ENTRIES
+
+
+def map_empresa_statistics(backend_data: Dict[str, Any], empresa_id: Any, default_nombre: str = 'Mi Empresa') -> Dict[str, Any]:
+    """Mapea la respuesta del backend a la estructura `empresa_statistics` del frontend."""
+    empresa = backend_data.get('empresa', {})
+    usuarios = backend_data.get('usuarios', {})
+    hardware = backend_data.get('hardware', {})
+    alertas = backend_data.get('alertas', {})
+    por_prioridad = alertas.get('alertas_por_prioridad', {})
+
+    return {
+        'empresa': {
+            'id': empresa.get('id', empresa_id),
+            'nombre': empresa.get('nombre', default_nombre),
+            'activa': empresa.get('activa', True),
+            'fecha_creacion': empresa.get('fecha_creacion', '2024-01-01')
+        },
+        'usuarios': {
+            'total': usuarios.get('total_usuarios', 0),
+            'activos': usuarios.get('usuarios_activos', 0),
+            'inactivos': usuarios.get('usuarios_inactivos', 0)
+        },
+        'hardware': {
+            'total': hardware.get('total_hardware', 0),
+            'activos': hardware.get('hardware_activo', 0),
+            'inactivos': hardware.get('hardware_inactivo', 0),
+            'por_tipo': hardware.get('por_tipo', {
+                'botonera': 0,
+                'semaforo': 0,
+                'televisor': 0,
+                'pantalla': 0
+            })
+        },
+        'alertas': {
+            'total': alertas.get('total_alertas', 0),
+            'activas': alertas.get('alertas_activas', 0),
+            'resueltas': alertas.get('alertas_inactivas', 0),
+            'por_prioridad': {
+                'critica': por_prioridad.get('critica', 0),
+                'alta': por_prioridad.get('alta', 0),
+                'media': por_prioridad.get('media', 0),
+                'baja': por_prioridad.get('baja', 0)
+            }
+        },
+        'actividad_reciente': {
+            'logs_ultimos_30_dias': alertas.get('alertas_recientes_30d', 0),
+            'ultima_actividad': empresa.get('ultima_actividad', '2024-07-20T10:30:00Z')
+        }
+    }
+
+
+def build_statistics_snapshot(backend_data: Dict[str, Any], empresa_id: Any) -> Dict[str, Any]:
+    """Snapshot cacheable: datos crudos, KPIs del dashboard y estructura mapeada."""
+    return {
+        'raw': backend_data,
+        'empresa_nombre': backend_data.get('empresa', {}).get('nombre', 'Mi Empresa'),
+        'kpis': {
+            'usuarios_total': backend_data.get('usuarios', {}).get('total_usuarios', 0),
+            'usuarios_activos': backend_data.get('usuarios', {}).get('usuarios_activos', 0),
+            'hardware_total': backend_data.get('hardware', {}).get('total_hardware', 0),
+            'alertas_activas': backend_data.get('alertas', {}).get('alertas_activas', 0)
+        },
+        'empresa_statistics': map_empresa_statistics(backend_data, empresa_id),
+    }
+
+
+class StaleWhileRevalidateCache:
+    """Caché thread-safe con TTL fresco, TTL duro y refresco en segundo plano."""
+
+    def __init__(self, fresh_ttl: float = 30.0, hard_ttl: float = 300.0, max_entries: int = 1024) -> None:
+        self.fresh_ttl = fresh_ttl
+        self.hard_ttl = max(hard_ttl, fresh_ttl)
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+
+    def get(
+        self,
+        key: Hashable,
+        loader: Callable[[bool], Any],
+        submit: Callable[[Callable[[], None]], None],
+    ) -> Any:
+        """Devuelve el valor cacheado o lo carga.
+
+        `loader(background)` obtiene el valor; `submit(fn)` programa `fn` en
+        segundo plano para los refrescos stale-while-revalidate.
+        """
+        now = time.monotonic()
+        schedule = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.fresh_ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                if age < self.hard_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_served += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        schedule = True
+                    value = entry[1]
+                else:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+
+        if entry is not None:
+            if schedule:
+                try:
+                    submit(lambda: self._background_refresh(key, loader))
+                except Exception as exc:  # noqa: BLE001
+                    print(f"⚠️ No se pudo programar el refresco de {key}: {exc}")
+                    with self._lock:
+                        self._refreshing.discard(key)
+            return value
+
+        value = loader(False)
+        self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _background_refresh(self, key: Hashable, loader: Callable[[bool], Any]) -> None:
+        try:
+            value = loader(True)
+            self._store(key, value)
+            with self._lock:
+                self.background_refreshes += 1
+        except Exception as exc:  # noqa: BLE001
+            # Se conserva la entrada vencida hasta el TTL duro
+            print(f"⚠️ Background refresh failed for {key}: {exc}")
+            with self._lock:
+                self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale_served
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_served': self.stale_served,
+                'background_refreshes': self.background_refreshes,
+                'refresh_failures': self.refresh_failures,
+                'hit_ratio': round((self.hits + self.stale_served) / lookups, 4) if lookups else 0.0,
+                'fresh_ttl': self.fresh_ttl,
+                'hard_ttl': self.hard_ttl,
+            }
+
+
+# Snapshots compartidos por todas las peticiones del proceso
+empresa_stats_cache = StaleWhileRevalidateCache(
+    fresh_ttl=EMPRESA_STATS_FRESH_TTL,
+    hard_ttl=EMPRESA_STATS_HARD_TTL,
+    max_entries=EMPRESA_STATS_MAX_ENTRIES
+)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Pools de hilos acotados para trabajo en paralelo.
+
+`get_fanout_executor()` carga varias llamadas al backend en paralelo;
+`get_upload_executor()` reparte las subidas por lote hacia el servicio de
+imágenes sin competir con el fan-out de las páginas.
+
+Los executors se crean de forma perezosa y por PID, de modo que cada worker de
+gunicorn (incluso con `--preload`) tiene sus propios pools y nunca hereda
+hilos del proceso padre.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from utils.config import FANOUT_MAX_WORKERS, IMAGES_BATCH_MAX_WORKERS
+
+_executor_lock = threading.Lock()
+_executors: Dict[str, Tuple[int, ThreadPoolExecutor]] = {}
+
+
+def _get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    pid = os.getpid()
+    entry = _executors.get(name)
+    if entry is not None and entry[0] == pid:
+        return entry[1]
+
+    with _executor_lock:
+        entry = _executors.get(name)
+        if entry is None or entry[0] != pid:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=name
+            )
+            entry = (pid, executor)
+            _executors[name] = entry
+        return entry[1]
+
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Devuelve el executor de fan-out hacia el backend del proceso actual."""
+    return _get_executor('backend-fanout', FANOUT_MAX_WORKERS)
+
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    """Devuelve el executor de subidas por lote del proceso actual."""
+    return _get_executor('images-upload', IMAGES_BATCH_MAX_WORKERS)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de fragmentos de plantilla para las vistas de las SPA.
+
+La etiqueta `{% cache 'nombre', clave1, clave2 %}...{% endcache %}` guarda el
+HTML renderizado del bloque. La clave combina la plantilla, el nombre del
+fragmento, el ámbito de la petición (el rol del usuario) y los valores de las
+claves declaradas. El marcado común de las vistas se renderiza una vez por
+worker. Lo que depende del usuario (`current_user`, `empresa_id`, datos
+iniciales) queda fuera de los bloques y se sigue renderizando en cada
+petición. La caché es un LRU acotado por bytes; sin caché configurada (modo
+debug) la etiqueta solo renderiza su contenido.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+FragmentKey = Tuple[str, str, str, Tuple[str, ...]]
+
+
+class FragmentCache:
+    """HTML renderizado por clave, con expulsión LRU por tamaño total."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: 'OrderedDict[FragmentKey, Tuple[str, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: FragmentKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: FragmentKey, rendered: str) -> bool:
+        size = len(rendered.encode('utf-8'))
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            self._entries[key] = (rendered, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """Etiqueta `{% cache 'nombre', clave, ... %}` respaldada por `environment.fragment_cache`."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment) -> None:
+        super().__init__(environment)
+        environment.extend(
+            fragment_cache=None,
+            # Ámbito de la petición actual que separa las entradas (p. ej. el rol)
+            fragment_cache_scope=lambda: '',
+        )
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        vary = []
+        while parser.stream.skip_if('comma'):
+            vary.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        args = [nodes.Const(parser.name or ''), name, nodes.List(vary)]
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template_name: str, name: str, vary: list, caller: Callable[[], str]) -> str:
+        cache: Optional[FragmentCache] = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = (template_name, str(name), self.environment.fragment_cache_scope(), tuple(str(value) for value in vary))
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            cache.put(key, rendered)
+        return rendered
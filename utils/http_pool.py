@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de conexiones HTTP compartido hacia el backend.
+
+Cada worker de gunicorn mantiene una única `requests.Session` con conexiones
+keep-alive reutilizables. La sesión se crea de forma perezosa y se regenera si
+el proceso cambia de PID (por ejemplo tras el fork de `--preload`), de modo que
+los sockets nunca se comparten entre procesos.
+"""
+
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.config import (
+    BACKEND_POOL_BLOCK,
+    BACKEND_POOL_CONNECTIONS,
+    BACKEND_POOL_IDLE_TIMEOUT,
+    BACKEND_POOL_MAXSIZE,
+)
+
+
+class _PoolStats:
+    """Contadores thread-safe de uso del pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.acquired = 0
+        self.new_connections = 0
+        self.idle_evictions = 0
+
+    def record_acquire(self) -> None:
+        with self._lock:
+            self.acquired += 1
+
+    def record_new_connection(self) -> None:
+        with self._lock:
+            self.new_connections += 1
+
+    def record_eviction(self) -> None:
+        with self._lock:
+            self.idle_evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            acquired = self.acquired
+            misses = min(self.new_connections, acquired)
+            evictions = self.idle_evictions
+        hits = acquired - misses
+        return {
+            'acquired': acquired,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / acquired, 4) if acquired else 0.0,
+            'idle_evictions': evictions,
+        }
+
+
+_stats = _PoolStats()
+
+
+class _CountingPoolMixin:
+    """Registra cuántas conexiones se toman del pool y cuántas se abren nuevas."""
+
+    def _get_conn(self, timeout=None):
+        _stats.record_acquire()
+        return super()._get_conn(timeout)
+
+    def _new_conn(self):
+        _stats.record_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _BlockAllCookiesPolicy(DefaultCookiePolicy):
+    """Evita que la sesión compartida guarde cookies de un usuario para otro."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Adaptador keep-alive con expulsión de conexiones inactivas."""
+
+    def __init__(self, idle_timeout: float = 30.0, **kwargs) -> None:
+        self.idle_timeout = idle_timeout
+        self._last_used = time.monotonic()
+        self._idle_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def _evict_if_idle(self) -> None:
+        if self.idle_timeout <= 0:
+            return
+        with self._idle_lock:
+            now = time.monotonic()
+            if now - self._last_used > self.idle_timeout:
+                # Las conexiones ociosas probablemente fueron cerradas del otro lado
+                self.poolmanager.clear()
+                _stats.record_eviction()
+            self._last_used = now
+
+    def send(self, request, **kwargs):
+        self._evict_if_idle()
+        return super().send(request, **kwargs)
+
+
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.cookies = RequestsCookieJar(policy=_BlockAllCookiesPolicy())
+    adapter = PooledHTTPAdapter(
+        idle_timeout=BACKEND_POOL_IDLE_TIMEOUT,
+        pool_connections=BACKEND_POOL_CONNECTIONS,
+        pool_maxsize=BACKEND_POOL_MAXSIZE,
+        pool_block=BACKEND_POOL_BLOCK,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def get_backend_session() -> requests.Session:
+    """Devuelve la sesión compartida del proceso actual, creándola si hace falta."""
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            # Tras un fork no se reutilizan los sockets heredados del padre
+            _session = _build_session()
+            _session_pid = pid
+            _stats.reset()
+        return _session
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Estadísticas del pool para dimensionarlo (aciertos, fallos, expulsiones)."""
+    stats = _stats.snapshot()
+    stats.update({
+        'pid': os.getpid(),
+        'pool_connections': BACKEND_POOL_CONNECTIONS,
+        'pool_maxsize': BACKEND_POOL_MAXSIZE,
+        'idle_timeout': BACKEND_POOL_IDLE_TIMEOUT,
+    })
+    return stats
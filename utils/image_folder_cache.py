@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Cachés del servicio de imágenes.
+
+`FolderIndexCache`: índice de carpetas con TTL y escritura directa. El listado
+se guarda en memoria y en un archivo JSON local compartido por los workers de
+gunicorn (protegido con `flock`). Crear, eliminar o subir archivos actualiza
+el índice en el sitio, sin volver a consultar el servicio; cada worker detecta
+los cambios de los demás por la fecha de modificación del archivo.
+
+`FolderFilesCache`: listados de archivos por carpeta (por worker). Las
+entradas se normalizan solo cuando se sirve la página que las contiene y se
+conservan para las páginas siguientes. Cada carpeta tiene un archivo de
+generación compartido: subir o eliminar lo reescribe y los demás workers
+descartan su listado al ver que la generación cambió.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.disk_cache import atomic_write
+
+from utils.config import (
+    IMAGE_FILES_CACHE_MAX_FOLDERS,
+    IMAGE_FILES_CACHE_TTL,
+    IMAGE_FILES_GENERATION_DIR,
+    IMAGE_FOLDER_CACHE_FILE,
+    IMAGE_FOLDER_CACHE_TTL,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sin flock
+    fcntl = None
+
+
+class FolderIndexCache:
+    """Listado de carpetas compartido entre procesos a través de un archivo."""
+
+    def __init__(self, ttl: float = 60.0, path: str = '') -> None:
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.Lock()
+        self._folders: Optional[List[str]] = None
+        self._stored_at = 0.0
+        self._file_mtime: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self) -> Optional[List[str]]:
+        """Devuelve el índice si sigue vigente; `None` si hay que consultar el servicio."""
+        with self._lock:
+            self._sync_from_file()
+            if self._folders is not None and time.time() - self._stored_at < self.ttl:
+                self.hits += 1
+                return list(self._folders)
+            self.misses += 1
+            return None
+
+    def get_stale(self) -> Optional[List[str]]:
+        """Último índice conocido aunque haya vencido (respaldo ante errores)."""
+        with self._lock:
+            return list(self._folders) if self._folders is not None else None
+
+    def store(self, folders: List[str]) -> None:
+        self._update(lambda _: list(folders), refresh=True)
+
+    def add(self, name: str) -> None:
+        self._update(lambda folders: folders if name in folders else folders + [name])
+
+    def remove(self, name: str) -> None:
+        self._update(lambda folders: [folder for folder in folders if folder != name])
+
+    def _update(self, change: Callable[[List[str]], List[str]], refresh: bool = False) -> None:
+        with self._lock:
+            lock_fd = self._acquire_file_lock()
+            try:
+                self._sync_from_file()
+                if self._folders is None and not refresh:
+                    # Sin índice cargado no hay nada que actualizar: la próxima lectura consulta el servicio
+                    return
+                self._folders = change(list(self._folders or []))
+                if refresh:
+                    self._stored_at = time.time()
+                self._write_file()
+                self.writes += 1
+            finally:
+                self._release_file_lock(lock_fd)
+
+    # ---------- Archivo compartido ----------
+
+    def _sync_from_file(self) -> None:
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return
+        folders = payload.get('folders')
+        if isinstance(folders, list):
+            self._folders = [str(folder) for folder in folders]
+            self._stored_at = float(payload.get('stored_at', 0))
+            self._file_mtime = mtime
+
+    def _write_file(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                json.dump({'stored_at': self._stored_at, 'folders': self._folders}, handle)
+            os.replace(tmp_path, self.path)
+            self._file_mtime = os.stat(self.path).st_mtime
+        except OSError as exc:
+            print(f"⚠️ No se pudo compartir el índice de carpetas entre workers: {exc}")
+
+    def _acquire_file_lock(self) -> Optional[int]:
+        if not self.path or fcntl is None:
+            return None
+        try:
+            fd = os.open(f'{self.path}.lock', os.O_CREAT | os.O_RDWR, 0o600)
+        except OSError:
+            return None
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    @staticmethod
+    def _release_file_lock(fd: Optional[int]) -> None:
+        if fd is None:
+            return
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'folders': len(self._folders) if self._folders is not None else None,
+                'age_seconds': round(time.time() - self._stored_at, 1) if self._folders is not None else None,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'shared_file': self.path or None,
+            }
+
+
+class FolderListing:
+    """Listado crudo de una carpeta con normalización perezosa por entrada."""
+
+    def __init__(self, raw_items: List[Any], name_fn: Callable[[Any], str]) -> None:
+        self.raw_items = raw_items
+        self.names = [name_fn(item).lower() for item in raw_items]
+        self.normalized: Dict[int, Dict[str, Any]] = {}
+        self.stored_at = time.monotonic()
+        self.generation = ''
+
+    def page(
+        self,
+        offset: int,
+        limit: Optional[int],
+        prefix: str,
+        normalize_fn: Callable[[Any], Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Devuelve (archivos de la página, total que coincide con el prefijo)."""
+        prefix = prefix.lower()
+        if prefix:
+            indices = [index for index, name in enumerate(self.names) if name.startswith(prefix)]
+        else:
+            indices = range(len(self.raw_items))
+
+        selected = indices[offset:offset + limit] if limit is not None else indices[offset:]
+        files = []
+        for index in selected:
+            entry = self.normalized.get(index)
+            if entry is None:
+                entry = normalize_fn(self.raw_items[index])
+                self.normalized[index] = entry
+            files.append(entry)
+        return files, len(indices)
+
+
+class FolderFilesCache:
+    """Caché LRU de listados de archivos por carpeta con TTL e invalidación entre workers."""
+
+    def __init__(self, ttl: float = 60.0, max_folders: int = 64, generation_dir: str = '') -> None:
+        self.ttl = ttl
+        self.max_folders = max_folders
+        self.generation_dir = generation_dir
+        self._entries: 'OrderedDict[str, FolderListing]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _generation_path(self, folder: str) -> str:
+        digest = hashlib.sha1(folder.encode('utf-8')).hexdigest()
+        return os.path.join(self.generation_dir, f'{digest}.gen')
+
+    def generation(self, folder: str) -> str:
+        """Generación compartida de la carpeta ('' si nunca se modificó o no hay directorio)."""
+        if not self.generation_dir:
+            return ''
+        try:
+            with open(self._generation_path(folder), 'r', encoding='utf-8') as handle:
+                return handle.read()
+        except OSError:
+            return ''
+
+    def get(self, folder: str) -> Optional[FolderListing]:
+        generation = self.generation(folder)
+        with self._lock:
+            listing = self._entries.get(folder)
+            if (
+                listing is not None
+                and listing.generation == generation
+                and time.monotonic() - listing.stored_at < self.ttl
+            ):
+                self._entries.move_to_end(folder)
+                self.hits += 1
+                return listing
+            if listing is not None:
+                del self._entries[folder]
+            self.misses += 1
+            return None
+
+    def put(self, folder: str, listing: FolderListing, generation: str) -> None:
+        """Guarda el listado con la generación leída antes de consultar el servicio."""
+        listing.generation = generation
+        with self._lock:
+            self._entries[folder] = listing
+            self._entries.move_to_end(folder)
+            while len(self._entries) > self.max_folders:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, folder: str) -> None:
+        with self._lock:
+            self._entries.pop(folder, None)
+            self.invalidations += 1
+        if not self.generation_dir:
+            return
+        try:
+            atomic_write(self._generation_path(folder), f'{time.time_ns()}-{os.getpid()}'.encode('utf-8'))
+        except OSError as exc:
+            print(f"⚠️ No se pudo invalidar el listado de {folder} en los demás workers: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'folders': len(self._entries),
+                'files': sum(len(listing.raw_items) for listing in self._entries.values()),
+                'normalized': sum(len(listing.normalized) for listing in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'generation_dir': self.generation_dir or None,
+            }
+
+
+# Índice compartido por todas las rutas del proceso
+folder_index_cache = FolderIndexCache(ttl=IMAGE_FOLDER_CACHE_TTL, path=IMAGE_FOLDER_CACHE_FILE)
+
+# Listados de archivos del proceso (invalidados entre workers por generación)
+folder_files_cache = FolderFilesCache(
+    ttl=IMAGE_FILES_CACHE_TTL,
+    max_folders=IMAGE_FILES_CACHE_MAX_FOLDERS,
+    generation_dir=IMAGE_FILES_GENERATION_DIR
+)
@@ -1,11 +1,15 @@
 """Helpers para consumir el servicio externo de imágenes."""
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote, urljoin
 
 import requests
 
-from utils.config import IMAGES_SERVICE_BASE_URL
+from utils.config import IMAGE_THUMBNAIL_MAX_SOURCE_BYTES, IMAGES_SERVICE_BASE_URL, IMAGES_UPLOAD_CHUNK_SIZE
+from utils.fanout import get_upload_executor
+from utils.image_folder_cache import FolderListing, folder_files_cache, folder_index_cache
+from utils.thumbnails import render_thumbnail, thumbnail_cache
+from utils.upload_stream import StreamingMultipartEncoder, upload_progress, upload_timeout
 
 DEFAULT_TIMEOUT = 6
 
@@ -16,7 +20,7 @@ def build_images_service_url(path: str = "") -> str:
     return urljoin(base, path.lstrip('/'))
 
 
-def _build_file_url(folder_name: str, file_value: str) -> str:
+def build_image_file_url(folder_name: str, file_value: str) -> str:
     """Genera la URL absoluta para un archivo concreto."""
     safe_folder = quote(folder_name.strip('/'))
     clean_file = file_value.split('/')[-1]
@@ -24,14 +28,22 @@ def _build_file_url(folder_name: str, file_value: str) -> str:
     return build_images_service_url(f'folders/{safe_folder}/files/{safe_file}')
 
 
+def _entry_name(entry: Any) -> str:
+    """Nombre de archivo de una entrada cruda (sin normalizarla completa)."""
+    if isinstance(entry, dict):
+        raw_name = entry.get('name') or entry.get('filename') or entry.get('title')
+        raw_path = entry.get('path') or entry.get('url') or entry.get('download_url')
+        return str(raw_name or raw_path or 'archivo').split('/')[-1] or 'archivo'
+    return str(entry).split('/')[-1] or 'archivo'
+
+
 def _normalize_file_entry(entry: Any, folder_name: str) -> Dict[str, Any]:
     """Normaliza la respuesta del servicio a un formato consistente."""
     if isinstance(entry, dict):
         raw_name = entry.get('name') or entry.get('filename') or entry.get('title')
         raw_path = entry.get('path') or entry.get('url') or entry.get('download_url')
 
-        base_value = raw_name or raw_path or 'archivo'
-        file_name = str(base_value).split('/')[-1] or 'archivo'
+        file_name = _entry_name(entry)
 
         url = entry.get('url') or entry.get('download_url') or entry.get('path')
         if url:
@@ -39,7 +51,7 @@ def _normalize_file_entry(entry: Any, folder_name: str) -> Dict[str, Any]:
             if not url.startswith(('http://', 'https://')):
                 url = build_images_service_url(url)
         else:
-            url = _build_file_url(folder_name, file_name)
+            url = build_image_file_url(folder_name, file_name)
 
         metadata = {
             key: value
@@ -60,13 +72,13 @@ def _normalize_file_entry(entry: Any, folder_name: str) -> Dict[str, Any]:
         }
 
     entry_value = str(entry)
-    file_name = entry_value.split('/')[-1] or 'archivo'
+    file_name = _entry_name(entry_value)
     sanitized_display = file_name.replace('_', ' ').replace('-', ' ').strip()
 
     return {
         'name': file_name,
         'display_name': sanitized_display or file_name,
-        'url': _build_file_url(folder_name, entry_value),
+        'url': build_image_file_url(folder_name, entry_value),
         'metadata': {},
     }
 
@@ -74,10 +86,16 @@ def _normalize_file_entry(entry: Any, folder_name: str) -> Dict[str, Any]:
 def fetch_image_folders() -> Tuple[List[str], str, str]:
     """Obtiene la lista de carpetas disponibles en el servicio de imágenes.
 
+    Se sirve desde el índice cacheado mientras siga vigente.
+
     Returns:
         tuple: (folders, error_message, service_url)
     """
     endpoint = build_images_service_url('folders')
+    cached = folder_index_cache.get()
+    if cached is not None:
+        return cached, '', endpoint
+
     try:
         response = requests.get(endpoint, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
@@ -91,11 +109,13 @@ def fetch_image_folders() -> Tuple[List[str], str, str]:
         else:
             folder_names = []
 
+        folder_index_cache.store(folder_names)
         return folder_names, '', endpoint
     except Exception as exc:  # noqa: BLE001
         error_message = 'No fue posible sincronizar las carpetas, intenta nuevamente.'
         print(f"⚠️ Error fetching image folders: {exc}")
-        return [], error_message, endpoint
+        # Se muestra el último índice conocido junto con el aviso de error
+        return folder_index_cache.get_stale() or [], error_message, endpoint
 
 
 
@@ -106,6 +126,7 @@ def create_image_folder(name: str) -> Tuple[bool, str]:
     try:
         response = requests.post(endpoint, json=payload, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
+        folder_index_cache.add(name)
         return True, ''
     except Exception as exc:  # noqa: BLE001
         print(f'⚠️ Error creating image folder: {exc}')
@@ -113,33 +134,90 @@ def create_image_folder(name: str) -> Tuple[bool, str]:
         return False, message
 
 
-def upload_image_file(folder: str, filename: str, file_obj) -> Tuple[bool, str]:
-    """Carga un archivo hacia el servicio externo."""
+def upload_image_file(
+    folder: str,
+    filename: str,
+    file_obj,
+    upload_id: str = '',
+    size: Optional[int] = None,
+) -> Tuple[bool, str]:
+    """Carga un archivo hacia el servicio externo.
+
+    El cuerpo multipart se envía por bloques de `IMAGES_UPLOAD_CHUNK_SIZE` con
+    un timeout proporcional al tamaño; si se indica `upload_id`, el progreso
+    queda disponible para el endpoint de consulta.
+    """
     endpoint = build_images_service_url('upload')
-    files = {
-        'file': (
-            getattr(file_obj, 'filename', filename) or filename,
-            getattr(file_obj, 'stream', file_obj),
-            getattr(file_obj, 'mimetype', 'application/octet-stream')
-        )
-    }
-    data = {
-        'folder': folder,
-        'filename': filename
-    }
+    stream = getattr(file_obj, 'stream', file_obj)
+    progress = {'sent': 0}
+
+    def report(bytes_sent: int, total: Optional[int]) -> None:
+        progress['sent'] = bytes_sent
+        if upload_id:
+            upload_progress.update(upload_id, bytes_sent, total)
 
     try:
         # Reiniciar el cursor del archivo si es posible
-        stream = files['file'][1]
         if hasattr(stream, 'seek'):
             stream.seek(0)
 
-        response = requests.post(endpoint, data=data, files=files, timeout=DEFAULT_TIMEOUT)
+        body = StreamingMultipartEncoder(
+            {'folder': folder, 'filename': filename},
+            'file',
+            getattr(file_obj, 'filename', filename) or filename,
+            stream,
+            getattr(file_obj, 'mimetype', 'application/octet-stream'),
+            IMAGES_UPLOAD_CHUNK_SIZE,
+            on_progress=report,
+            size=size
+        )
+        if upload_id:
+            upload_progress.start(upload_id, body.total)
+
+        response = requests.post(
+            endpoint,
+            data=body,
+            headers={'Content-Type': body.content_type},
+            timeout=(DEFAULT_TIMEOUT, upload_timeout(body.total, DEFAULT_TIMEOUT))
+        )
         response.raise_for_status()
+        # La subida puede crear la carpeta en el servicio
+        folder_index_cache.add(folder)
+        folder_files_cache.invalidate(folder)
+        thumbnail_cache.invalidate(folder, filename)
+        if upload_id:
+            upload_progress.finish(upload_id, True, progress['sent'], body.total)
         return True, ''
     except Exception as exc:  # noqa: BLE001
         print(f'⚠️ Error uploading file {filename} to folder {folder}: {exc}')
-        return False, 'No fue posible cargar el archivo, intenta nuevamente.'
+        message = 'No fue posible cargar el archivo, intenta nuevamente.'
+        if upload_id:
+            upload_progress.finish(upload_id, False, progress['sent'], None, message)
+        return False, message
+
+
+def upload_image_batch(folder: str, items: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    """Sube varios archivos en paralelo con el pool de subidas del proceso.
+
+    `items` contiene pares (nombre base, archivo). Devuelve un resultado por
+    archivo, en el mismo orden.
+    """
+    executor = get_upload_executor()
+    futures = [
+        executor.submit(upload_image_file, folder, filename, file_obj, '', getattr(file_obj, 'size', None))
+        for filename, file_obj in items
+    ]
+
+    results = []
+    for (filename, file_obj), future in zip(items, futures):
+        success, error_message = future.result()
+        results.append({
+            'source': getattr(file_obj, 'filename', filename),
+            'filename': filename,
+            'success': success,
+            'error': error_message or None
+        })
+    return results
 
 
 def delete_image_folder(folder_name: str) -> Tuple[bool, str]:
@@ -149,33 +227,114 @@ def delete_image_folder(folder_name: str) -> Tuple[bool, str]:
     try:
         response = requests.delete(endpoint, timeout=DEFAULT_TIMEOUT)
         response.raise_for_status()
+        folder_index_cache.remove(folder_name)
+        folder_files_cache.invalidate(folder_name)
+        thumbnail_cache.invalidate(folder_name)
         return True, ''
     except Exception as exc:  # noqa: BLE001
         print(f'⚠️ Error deleting image folder {folder_name}: {exc}')
         return False, 'No fue posible eliminar el directorio, intenta nuevamente.'
 
 
-def fetch_folder_files(folder_name: str) -> Tuple[List[Dict[str, Any]], str, str]:
-    """Obtiene los archivos de una carpeta específica del servicio."""
+def _download_original(folder_name: str, file_name: str) -> bytes:
+    """Descarga el original completo respetando `IMAGE_THUMBNAIL_MAX_SOURCE_BYTES`."""
+    endpoint = build_image_file_url(folder_name, file_name)
+    with requests.get(endpoint, timeout=DEFAULT_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > IMAGE_THUMBNAIL_MAX_SOURCE_BYTES:
+            raise ValueError(f'original demasiado grande ({declared} bytes)')
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=IMAGES_UPLOAD_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > IMAGE_THUMBNAIL_MAX_SOURCE_BYTES:
+                raise ValueError('original demasiado grande')
+        return bytes(buffer)
+
+
+def fetch_image_thumbnail(folder_name: str, file_name: str, size: int, fmt: str) -> Tuple[Optional[bytes], str]:
+    """Devuelve la miniatura de un archivo, generándola y guardándola en disco si hace falta."""
+    try:
+        data = thumbnail_cache.get_or_create(
+            folder_name,
+            file_name,
+            size,
+            fmt,
+            lambda: render_thumbnail(_download_original(folder_name, file_name), size, fmt)
+        )
+        return data, ''
+    except Exception as exc:  # noqa: BLE001
+        print(f'⚠️ Error generating thumbnail for {folder_name}/{file_name}: {exc}')
+        return None, 'No fue posible generar la miniatura.'
+
+
+def _load_folder_listing(folder_name: str) -> FolderListing:
+    """Descarga el listado crudo de una carpeta (sin normalizar)."""
     encoded_folder = quote(folder_name, safe='')
     endpoint = build_images_service_url(f'folders/{encoded_folder}/files')
 
-    try:
-        response = requests.get(endpoint, timeout=DEFAULT_TIMEOUT)
-        response.raise_for_status()
-        payload = response.json()
+    response = requests.get(endpoint, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    payload = response.json()
+
+    if isinstance(payload, list):
+        raw_items = payload
+    elif isinstance(payload, dict):
+        data_key = next((key for key in ('files', 'data', 'items') if key in payload), None)
+        raw_items = payload.get(data_key, []) if data_key else []
+    else:
+        raw_items = []
+
+    return FolderListing(list(raw_items), _entry_name)
 
-        if isinstance(payload, list):
-            raw_items = payload
-        elif isinstance(payload, dict):
-            data_key = next((key for key in ('files', 'data', 'items') if key in payload), None)
-            raw_items = payload.get(data_key, []) if data_key else []
-        else:
-            raw_items = []
 
-        files = [_normalize_file_entry(item, folder_name) for item in raw_items]
-        return files, '', endpoint
+def fetch_folder_files_page(
+    folder_name: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    prefix: str = '',
+) -> Tuple[Dict[str, Any], str, str]:
+    """Obtiene una página de archivos de una carpeta, opcionalmente filtrada por prefijo.
+
+    Solo se normalizan las entradas de la página devuelta; el listado queda
+    cacheado por carpeta para las páginas siguientes.
+
+    Returns:
+        tuple: (page, error_message, service_url) donde page incluye
+        `files`, `total`, `offset`, `limit` y `next_offset`.
+    """
+    encoded_folder = quote(folder_name, safe='')
+    endpoint = build_images_service_url(f'folders/{encoded_folder}/files')
+    page: Dict[str, Any] = {'files': [], 'total': 0, 'offset': offset, 'limit': limit, 'next_offset': None}
+
+    try:
+        listing = folder_files_cache.get(folder_name)
+        if listing is None:
+            # Leída antes de consultar: una subida concurrente deja el listado ya vencido
+            generation = folder_files_cache.generation(folder_name)
+            listing = _load_folder_listing(folder_name)
+            folder_files_cache.put(folder_name, listing, generation)
+
+        files, total = listing.page(
+            offset,
+            limit,
+            prefix,
+            lambda item: _normalize_file_entry(item, folder_name)
+        )
+        next_offset = offset + len(files)
+        page.update({
+            'files': files,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None,
+        })
+        return page, '', endpoint
     except Exception as exc:  # noqa: BLE001
         error_message = 'No fue posible obtener los archivos de la carpeta seleccionada.'
         print(f"⚠️ Error fetching files for folder {folder_name}: {exc}")
-        return [], error_message, endpoint
+        return page, error_message, endpoint
+
+
+def fetch_folder_files(folder_name: str) -> Tuple[List[Dict[str, Any]], str, str]:
+    """Obtiene los archivos de una carpeta específica del servicio."""
+    page, error_message, endpoint = fetch_folder_files_page(folder_name)
+    return page['files'], error_message, endpoint
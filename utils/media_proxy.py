@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Relevo de imágenes, sonidos y videos con caché en disco.
+
+`/media?src=<url>` sirve recursos de los orígenes permitidos
+(`MEDIA_PROXY_ALLOWED_PREFIXES`). El primer acceso descarga el archivo completo
+a `MEDIA_CACHE_DIR`; los siguientes se sirven desde disco con `send_file`, que
+resuelve Range, If-None-Match e If-Modified-Since y entrega el archivo al
+servidor WSGI para envío sin copia (sendfile). Pasado `MEDIA_CACHE_TTL` se
+revalida con el origen mediante una petición condicional. Los archivos que
+superan `MEDIA_CACHE_MAX_ENTRY_BYTES` se retransmiten sin guardar, reenviando
+el Range del cliente.
+
+Solo se relevan imágenes rasterizadas, audio y video: un SVG o HTML del origen
+servido desde el dominio de la app podría ejecutar scripts en él. Las
+redirecciones del origen no se siguen, para que no salten la lista de
+prefijos permitidos.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from utils.config import (
+    MEDIA_CACHE_DIR,
+    MEDIA_CACHE_MAX_BYTES,
+    MEDIA_CACHE_MAX_ENTRY_BYTES,
+    MEDIA_CACHE_TTL,
+    MEDIA_PROXY_ALLOWED_PREFIXES,
+    PROXY_STREAM_CHUNK_SIZE,
+)
+from utils.disk_cache import atomic_write, evict_lru, temp_path, touch
+
+MEDIA_CONNECT_TIMEOUT = 6
+MEDIA_READ_TIMEOUT = 60
+
+# Cabeceras del origen que se reenvían en la retransmisión directa
+PASSTHROUGH_HEADERS = (
+    'Content-Type',
+    'Content-Length',
+    'Content-Encoding',
+    'Content-Range',
+    'Accept-Ranges',
+    'ETag',
+    'Last-Modified',
+)
+
+
+def is_allowed_media_source(url: str) -> bool:
+    """Solo URLs http(s) bajo alguno de los prefijos permitidos, sin segmentos `..`."""
+    parsed = urlsplit(url or '')
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return False
+    if '..' in unquote(parsed.path).split('/'):
+        return False
+    for prefix in MEDIA_PROXY_ALLOWED_PREFIXES:
+        allowed = urlsplit(prefix)
+        if (parsed.scheme, parsed.netloc.lower()) != (allowed.scheme, allowed.netloc.lower()):
+            continue
+        base_path = allowed.path.rstrip('/') + '/'
+        if parsed.path.startswith(base_path):
+            return True
+    return False
+
+
+def is_relayable_media_type(content_type: Optional[str]) -> bool:
+    """`image/*` (salvo SVG), `audio/*` y `video/*`; el resto se rechaza con 415."""
+    mimetype = (content_type or '').split(';', 1)[0].strip().lower()
+    if mimetype == 'image/svg+xml':
+        return False
+    return mimetype.startswith(('image/', 'audio/', 'video/'))
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class MediaCache:
+    """Archivos del origen en disco (cuerpo + metadatos JSON) con expulsión LRU."""
+
+    def __init__(self, directory: str, max_bytes: int, max_entry_bytes: int, ttl: float) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._fetching: Dict[str, threading.Lock] = {}
+        self._approx_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.passthrough = 0
+        self.evictions = 0
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest[:2], digest)
+        return base, f'{base}.json'
+
+    def _lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as handle:
+                meta = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            # El cuerpo pudo expulsarse sin sus metadatos
+            return None
+        meta['path'] = body_path
+        return meta
+
+    def _is_fresh(self, meta: Dict[str, Any]) -> bool:
+        return time.time() - float(meta.get('stored_at', 0)) < self.ttl
+
+    def resolve(self, url: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Devuelve ('cached', metadatos), ('passthrough', None) o ('error', {'status': código}).
+
+        Un tipo de contenido no relevable da ('error', {'status': 415}).
+        """
+        meta = self._lookup(url)
+        if meta is not None and self._is_fresh(meta):
+            touch(meta['path'])
+            with self._lock:
+                self.hits += 1
+            return 'cached', meta
+
+        with self._lock:
+            fetch_lock = self._fetching.setdefault(url, threading.Lock())
+        try:
+            with fetch_lock:
+                # Otro hilo pudo completar la descarga mientras se esperaba
+                meta = self._lookup(url)
+                if meta is not None and self._is_fresh(meta):
+                    with self._lock:
+                        self.hits += 1
+                    return 'cached', meta
+                return self._fetch(url, meta)
+        finally:
+            with self._lock:
+                self._fetching.pop(url, None)
+
+    def _fetch(self, url: str, stale: Optional[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        headers = {}
+        if stale is not None:
+            if stale.get('upstream_etag'):
+                headers['If-None-Match'] = stale['upstream_etag']
+            if stale.get('upstream_last_modified'):
+                headers['If-Modified-Since'] = stale['upstream_last_modified']
+
+        try:
+            with requests.get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=(MEDIA_CONNECT_TIMEOUT, MEDIA_READ_TIMEOUT),
+                allow_redirects=False
+            ) as response:
+                if response.status_code == 304 and stale is not None:
+                    stale['stored_at'] = time.time()
+                    self._write_meta(url, stale)
+                    with self._lock:
+                        self.revalidated += 1
+                    return 'cached', stale
+
+                if response.status_code != 200:
+                    if stale is not None:
+                        return self._serve_stale(stale)
+                    return 'error', {'status': response.status_code}
+
+                if not is_relayable_media_type(response.headers.get('Content-Type')):
+                    return 'error', {'status': 415}
+
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and int(declared) > self.max_entry_bytes:
+                    with self._lock:
+                        self.passthrough += 1
+                    return 'passthrough', None
+
+                meta = self._store(url, response)
+                if meta is None:
+                    with self._lock:
+                        self.passthrough += 1
+                    return 'passthrough', None
+                with self._lock:
+                    self.misses += 1
+                return 'cached', meta
+        except requests.RequestException as exc:
+            print(f"⚠️ Error obteniendo medio {url}: {exc}")
+            if stale is not None:
+                return self._serve_stale(stale)
+            return 'error', {'status': 502}
+
+    def _serve_stale(self, stale: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        with self._lock:
+            self.stale_served += 1
+        return 'cached', stale
+
+    def _store(self, url: str, response: requests.Response) -> Optional[Dict[str, Any]]:
+        """Vuelca el cuerpo a disco; `None` si supera el tamaño máximo por entrada."""
+        body_path, _ = self._paths(url)
+        tmp_path = temp_path(body_path)
+        digest = hashlib.sha1()
+        size = 0
+        try:
+            os.makedirs(os.path.dirname(body_path), mode=0o700, exist_ok=True)
+            with open(tmp_path, 'wb') as handle:
+                for chunk in response.iter_content(chunk_size=PROXY_STREAM_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_entry_bytes:
+                        raise OverflowError
+                    digest.update(chunk)
+                    handle.write(chunk)
+            os.replace(tmp_path, body_path)
+        except (OSError, OverflowError) as exc:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if isinstance(exc, OSError):
+                print(f"⚠️ No se pudo guardar el medio en disco: {exc}")
+            return None
+
+        meta = {
+            'url': url,
+            'content_type': response.headers.get('Content-Type', 'application/octet-stream'),
+            'size': size,
+            'etag': digest.hexdigest()[:32],
+            'upstream_etag': response.headers.get('ETag'),
+            'upstream_last_modified': response.headers.get('Last-Modified'),
+            'last_modified': _parse_http_date(response.headers.get('Last-Modified')),
+            'stored_at': time.time(),
+        }
+        self._write_meta(url, meta)
+        meta['path'] = body_path
+
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            needs_eviction = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if needs_eviction:
+            total, evicted = evict_lru(self.directory, self.max_bytes)
+            with self._lock:
+                self._approx_bytes = total
+                self.evictions += evicted
+        return meta
+
+    def _write_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        _, meta_path = self._paths(url)
+        payload = {key: value for key, value in meta.items() if key != 'path'}
+        try:
+            atomic_write(meta_path, json.dumps(payload).encode('utf-8'))
+        except OSError as exc:
+            print(f"⚠️ No se pudieron guardar los metadatos del medio: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidated + self.stale_served
+            return {
+                'bytes': self._approx_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entry_bytes': self.max_entry_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'stale_served': self.stale_served,
+                'passthrough': self.passthrough,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.revalidated) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def open_passthrough(url: str, range_header: Optional[str]) -> requests.Response:
+    """Abre el recurso en el origen reenviando el Range del cliente (sin caché)."""
+    headers = {'Range': range_header} if range_header else {}
+    return requests.get(
+        url,
+        headers=headers,
+        stream=True,
+        timeout=(MEDIA_CONNECT_TIMEOUT, MEDIA_READ_TIMEOUT),
+        allow_redirects=False
+    )
+
+
+# Caché de medios compartida por los workers a través del disco
+media_cache = MediaCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES, MEDIA_CACHE_MAX_ENTRY_BYTES, MEDIA_CACHE_TTL)
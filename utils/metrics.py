@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de latencia en formato Prometheus.
+
+Histogramas por endpoint de Flask y por plantilla de ruta del backend
+(`/api/empresas/{id}/statistics`), secciones internas (`require_role`,
+`validate_backend_connection`) y renderizado de plantillas; contadores de
+refresh de token, respuestas 401 y errores del proxy; y gauges de peticiones en
+curso. Se usa el modo multiproceso de `prometheus_client`: cada worker de
+gunicorn escribe sus valores en archivos mmap de `METRICS_MULTIPROC_DIR` y
+`render_latest()` los agrega al exponerlos en `/internal/metrics`.
+
+Si `prometheus_client` no está instalado o `METRICS_ENABLED` es falso, las
+métricas son objetos vacíos y la instrumentación no hace nada.
+"""
+
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils.config import METRICS_ENABLED, METRICS_MULTIPROC_DIR
+from utils.request_coalescer import endpoint_template
+
+# prometheus_client decide el almacenamiento al importarse: el directorio debe existir antes
+MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', METRICS_MULTIPROC_DIR)
+
+if METRICS_ENABLED:
+    try:
+        os.makedirs(MULTIPROC_DIR, mode=0o700, exist_ok=True)
+        from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+        from prometheus_client import multiprocess
+    except (ImportError, OSError) as exc:  # pragma: no cover - prometheus_client es opcional
+        print(f"⚠️ Métricas deshabilitadas: {exc}")
+        Histogram = None
+else:
+    Histogram = None
+
+# Desde respuestas en caché (milisegundos) hasta el timeout de gunicorn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SECTION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def metrics_available() -> bool:
+    return Histogram is not None
+
+
+class _NoopMetric:
+    """Sustituto sin efecto cuando las métricas están deshabilitadas."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> '_NoopMetric':
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+
+def _histogram(name: str, documentation: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+    if not metrics_available():
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...]):
+    if not metrics_available():
+        return _NoopMetric()
+    return Counter(name, documentation, labels)
+
+
+def _gauge(name: str, documentation: str, labels: Tuple[str, ...]):
+    if not metrics_available():
+        return _NoopMetric()
+    # Suma de los workers vivos: los archivos de un worker terminado se descartan
+    return Gauge(name, documentation, labels, multiprocess_mode='livesum')
+
+
+http_request_duration = _histogram(
+    'rescue_http_request_duration_seconds',
+    'Tiempo de atención de peticiones por endpoint de Flask',
+    ('endpoint', 'method'),
+    LATENCY_BUCKETS,
+)
+http_requests = _counter(
+    'rescue_http_requests_total',
+    'Peticiones atendidas por endpoint y estado',
+    ('endpoint', 'method', 'status'),
+)
+http_in_flight = _gauge(
+    'rescue_http_requests_in_flight',
+    'Peticiones en curso',
+    ('server',),
+)
+upstream_request_duration = _histogram(
+    'rescue_upstream_request_duration_seconds',
+    'Tiempo hasta las cabeceras del backend por plantilla de ruta',
+    ('method', 'path'),
+    LATENCY_BUCKETS,
+)
+upstream_responses = _counter(
+    'rescue_upstream_responses_total',
+    'Respuestas del backend por plantilla de ruta y estado',
+    ('method', 'path', 'status'),
+)
+upstream_in_flight = _gauge(
+    'rescue_upstream_requests_in_flight',
+    'Peticiones al backend en curso',
+    ('client',),
+)
+upstream_unauthorized = _counter(
+    'rescue_upstream_unauthorized_total',
+    'Respuestas 401 del backend por plantilla de ruta',
+    ('path',),
+)
+token_refreshes = _counter(
+    'rescue_token_refresh_total',
+    'Llamadas a /auth/refresh por resultado',
+    ('result',),
+)
+proxy_errors = _counter(
+    'rescue_proxy_errors_total',
+    'Errores del proxy hacia el backend',
+    ('kind',),
+)
+section_duration = _histogram(
+    'rescue_section_duration_seconds',
+    'Tiempo de secciones internas (autorización, estado del backend)',
+    ('section',),
+    SECTION_BUCKETS,
+)
+template_render_duration = _histogram(
+    'rescue_template_render_seconds',
+    'Tiempo de renderizado por plantilla',
+    ('template',),
+    LATENCY_BUCKETS,
+)
+
+
+def upstream_path(url: str) -> str:
+    """Plantilla de ruta de una URL del backend (sin host, query ni identificadores)."""
+    return endpoint_template(urlsplit(url).path or '/')
+
+
+@contextmanager
+def timed(section: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        section_duration.labels(section=section).observe(time.perf_counter() - started)
+
+
+class UpstreamTimer:
+    """Mide una llamada al backend: en curso, duración hasta cabeceras, estado y 401."""
+
+    __slots__ = ('method', 'path', 'client', 'started')
+
+    def __init__(self, method: str, url: str, client: str) -> None:
+        self.method = method.upper()
+        self.path = upstream_path(url)
+        self.client = client
+        self.started = time.perf_counter()
+        upstream_in_flight.labels(client=client).inc()
+
+    def finish(self, status: Optional[int]) -> None:
+        upstream_in_flight.labels(client=self.client).dec()
+        upstream_request_duration.labels(method=self.method, path=self.path).observe(
+            time.perf_counter() - self.started
+        )
+        status_label = str(status) if status is not None else 'error'
+        upstream_responses.labels(method=self.method, path=self.path, status=status_label).inc()
+        if status == 401:
+            upstream_unauthorized.labels(path=self.path).inc()
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Valores agregados de todos los workers en formato de texto de Prometheus."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def reset_multiprocess_dir() -> None:
+    """Vacía los archivos de ejecuciones anteriores (al arrancar el master de gunicorn)."""
+    if not metrics_available():
+        return
+    shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(MULTIPROC_DIR, mode=0o700, exist_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Descarta los gauges de un worker terminado."""
+    if metrics_available():
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades para el modo streaming del proxy hacia el backend.
+
+Permiten reenviar cuerpos de petición y de respuesta por bloques, sin cargar el
+payload completo en la memoria del worker.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import requests
+
+# Cabeceras hop-by-hop que no deben reenviarse entre conexiones (RFC 7230 §6.1)
+HOP_BY_HOP_HEADERS = frozenset({
+    'connection',
+    'keep-alive',
+    'proxy-authenticate',
+    'proxy-authorization',
+    'te',
+    'trailer',
+    'transfer-encoding',
+    'upgrade',
+})
+
+# Endpoints del proxy que se reenvían sin cookie de autenticación
+PUBLIC_PROXY_ENDPOINTS = frozenset({'auth/login', 'api/contact/send'})
+
+
+class RequestBodyStream:
+    """Itera el cuerpo entrante por bloques conservando su Content-Length."""
+
+    def __init__(self, stream, length: Optional[int], chunk_size: int) -> None:
+        self.stream = stream
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __len__(self) -> int:
+        return self.length or 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def build_request_body(stream, length: Optional[int], chunk_size: int):
+    """Cuerpo apto para `requests`: con longitud conocida o en modo chunked."""
+    body = RequestBodyStream(stream, length, chunk_size)
+    # Sin Content-Length, `requests` solo acepta un iterador puro para enviar chunked
+    return body if length else iter(body)
+
+
+def is_json_content_type(content_type: Optional[str]) -> bool:
+    """Indica si el Content-Type corresponde a un cuerpo JSON."""
+    if not content_type:
+        return False
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    return mimetype == 'application/json' or mimetype.endswith('+json')
+
+
+def should_buffer_response(resp: requests.Response, buffer_limit: int) -> bool:
+    """Los JSON pequeños (o sin tamaño declarado) conservan el camino en memoria."""
+    if not is_json_content_type(resp.headers.get('Content-Type')):
+        return False
+    declared_length = resp.headers.get('Content-Length')
+    if declared_length is None:
+        return True
+    try:
+        return int(declared_length) <= buffer_limit
+    except ValueError:
+        return True
+
+
+def passthrough_headers(resp: requests.Response) -> List[Tuple[str, str]]:
+    """Cabeceras del backend aptas para reenviarse tal cual al navegador."""
+    return [
+        (name, value)
+        for name, value in resp.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'set-cookie'
+    ]
+
+
+def decoded_headers(resp: requests.Response) -> List[Tuple[str, str]]:
+    """Cabeceras para reenviar un cuerpo ya decodificado por `requests` (`resp.content`)."""
+    return [
+        (name, value)
+        for name, value in passthrough_headers(resp)
+        if name.lower() not in ('content-encoding', 'content-length')
+    ]
+
+
+def body_consumed(resp: requests.Response) -> bool:
+    """El cuerpo ya se leyó (p. ej. lo cargó el líder de una coalescencia): `raw` está agotado."""
+    return bool(getattr(resp, '_content_consumed', False))
+
+
+def iter_upstream(resp: requests.Response, chunk_size: int) -> Iterator[bytes]:
+    """Relaya los bytes del backend sin decodificarlos y libera la conexión al terminar."""
+    try:
+        # Los bytes viajan tal cual, de modo que Content-Encoding y Content-Length siguen siendo válidos
+        for chunk in resp.raw.stream(chunk_size, decode_content=False):
+            if chunk:
+                yield chunk
+    finally:
+        resp.close()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescencia de GET idénticos en vuelo.
+
+Cuando varias pestañas o widgets piden el mismo recurso al mismo tiempo, solo
+la primera petición (líder) llega al backend; las demás esperan y reciben una
+copia de la respuesta ya cargada en memoria. La clave incluye método, ruta, query
+ordenada y ámbito de autenticación, por lo que nunca se comparten respuestas
+entre usuarios distintos.
+"""
+
+import re
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.config import REQUEST_COALESCING_WAIT_TIMEOUT
+
+_ID_SEGMENT_PATTERN = re.compile(
+    r'^(\d+|[0-9a-fA-F]{24}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$'
+)
+
+
+def endpoint_template(path: str) -> str:
+    """Normaliza una ruta reemplazando identificadores (`/api/empresas/{id}/statistics`)."""
+    path = path.split('?', 1)[0]
+    segments = [
+        '{id}' if _ID_SEGMENT_PATTERN.match(segment) else segment
+        for segment in path.split('/')
+    ]
+    return '/'.join(segments) or '/'
+
+
+class _InFlight:
+    __slots__ = ('event', 'result', 'shareable')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.shareable = False
+
+
+class RequestCoalescer:
+    """Single-flight para peticiones idénticas concurrentes."""
+
+    def __init__(self, wait_timeout: float = 30.0) -> None:
+        self.wait_timeout = wait_timeout
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, template: str, field: str) -> None:
+        counters = self._counters.setdefault(template, {'requests': 0, 'upstream': 0})
+        counters[field] += 1
+
+    def record(self, template: str, field: str) -> None:
+        """Registra peticiones coalescidas fuera de `run` (p. ej. el gateway ASGI)."""
+        with self._lock:
+            self._count(template, field)
+
+    def run(
+        self,
+        key: Hashable,
+        template: str,
+        leader_fn: Callable[[], Tuple[Any, bool]],
+        fallback_fn: Callable[[], Any],
+        share_fn: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Ejecuta `leader_fn` una vez por clave en vuelo.
+
+        `leader_fn` devuelve (resultado, compartible). Si el resultado no se
+        puede compartir (p. ej. una respuesta en streaming), o el líder falla,
+        cada espera ejecuta `fallback_fn` por su cuenta. Con `share_fn`, cada
+        espera recibe `share_fn(resultado)`, ejecutado en su propio hilo (una
+        copia independiente en lugar del objeto del líder).
+        """
+        with self._lock:
+            self._count(template, 'requests')
+            flight = self._in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+                self._count(template, 'upstream')
+
+        if not is_leader:
+            flight.event.wait(self.wait_timeout)
+            if flight.event.is_set() and flight.shareable:
+                return share_fn(flight.result) if share_fn is not None else flight.result
+            with self._lock:
+                self._count(template, 'upstream')
+            return fallback_fn()
+
+        try:
+            result, shareable = leader_fn()
+            flight.result = result if shareable else None
+            flight.shareable = shareable
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Fan-in por endpoint: peticiones recibidas frente a llamadas al backend."""
+        with self._lock:
+            return {
+                template: {
+                    'requests': counters['requests'],
+                    'upstream': counters['upstream'],
+                    'fan_in': round(counters['requests'] / counters['upstream'], 2) if counters['upstream'] else 0.0,
+                }
+                for template, counters in self._counters.items()
+            }
+
+
+# Instancia compartida por APIClient (y por tanto por proxy_api) en el proceso
+request_coalescer = RequestCoalescer(wait_timeout=REQUEST_COALESCING_WAIT_TIMEOUT)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de respuestas GET del proxy con revalidación condicional.
+
+Guarda el cuerpo junto con los validadores del backend (`ETag` /
+`Last-Modified`) y en cada acceso revalida con `If-None-Match` /
+`If-Modified-Since`: si el backend responde 304 se sirve la copia local sin
+volver a transferir el cuerpo. Las entradas están aisladas por usuario y se
+expulsan en orden LRU según el tamaño total en bytes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from utils.proxy_stream import HOP_BY_HOP_HEADERS
+from utils.token_cache import hash_token
+
+# El cuerpo se guarda ya decodificado, así que estas cabeceras dejan de aplicar
+_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {'set-cookie', 'content-length', 'content-encoding'}
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+class CachedResponse:
+    """Copia local de una respuesta 200 del backend."""
+
+    __slots__ = ('body', 'headers', 'etag', 'last_modified', 'size', 'stored_at')
+
+    def __init__(self, body: bytes, headers: List[Tuple[str, str]], etag: Optional[str], last_modified: Optional[str]) -> None:
+        self.body = body
+        self.headers = headers
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = len(body)
+        self.stored_at = time.time()
+
+    @classmethod
+    def from_backend(cls, resp: requests.Response) -> Optional['CachedResponse']:
+        etag = resp.headers.get('ETag')
+        last_modified = resp.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+        headers = [
+            (name, value)
+            for name, value in resp.headers.items()
+            if name.lower() not in _EXCLUDED_HEADERS
+        ]
+        return cls(resp.content, headers, etag, last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Cabeceras para revalidar la entrada contra el backend."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def cache_scope(user: Optional[Dict[str, Any]], auth_token: str) -> str:
+    """Ámbito de caché de un usuario: id de sesión o hash del token."""
+    user = user or {}
+    if user.get('id'):
+        return f"user:{user.get('id')}:{user.get('role', '')}"
+    return f"token:{hash_token(auth_token or '')}"
+
+
+def resource_prefix(path: str) -> str:
+    """Colección a la que pertenece una ruta (`/api/hardware/42/x` -> `/api/hardware`)."""
+    segments = [segment for segment in path.split('/') if segment]
+    return '/' + '/'.join(segments[:2])
+
+
+class ResponseCache:
+    """Caché LRU thread-safe limitada por bytes."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entry_bytes: int = 2 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: 'OrderedDict[CacheKey, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(scope: str, path: str, params: Iterable[Tuple[str, str]]) -> CacheKey:
+        return scope, path, tuple(sorted(params))
+
+    def get(self, key: CacheKey) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def record_revalidated(self) -> None:
+        with self._lock:
+            self.revalidated += 1
+
+    def put(self, key: CacheKey, entry: CachedResponse) -> bool:
+        if entry.size > self.max_entry_bytes:
+            self.discard(key)
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+            self._entries[key] = entry
+            self.current_bytes += entry.size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+        return True
+
+    def discard(self, key: CacheKey) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Elimina, para todos los usuarios, las entradas de una colección."""
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if key[1] == prefix or key[1].startswith(prefix + '/')
+            ]
+            for key in stale:
+                self.current_bytes -= self._entries.pop(key).size
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated_304': self.revalidated,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Variantes precomprimidas (Brotli y gzip) de los archivos estáticos.
+
+Al arrancar, cada archivo comprimible de `static/` se comprime una sola vez a
+`.br` y `.gz` en `STATIC_PRECOMPRESS_DIR`, con el nombre con huella de
+contenido del manifiesto (`utils.static_manifest`): un archivo que no cambió
+reutiliza sus variantes en los reinicios y uno modificado nunca recibe una
+variante antigua. Se descartan las variantes que no ahorran bytes. La vista de estáticos elige la variante según `Accept-Encoding` y la
+envía como archivo, sin comprimir nada por petición.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.compression import available_encodings, choose_encoding, compress_body
+from utils.disk_cache import atomic_write
+from utils.structured_log import get_logger
+
+logger = get_logger('static_compression')
+
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml', '.ico', '.scss',
+})
+
+_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class PrecompressedStatic:
+    """Índice en memoria de las variantes comprimidas de cada archivo estático."""
+
+    def __init__(
+        self,
+        static_folder: str,
+        directory: str,
+        min_bytes: int,
+        brotli_quality: int,
+        gzip_level: int,
+    ) -> None:
+        self.static_folder = static_folder
+        self.directory = directory
+        self.min_bytes = min_bytes
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self._lock = threading.Lock()
+        # filename -> {codificación: ruta de la variante}
+        self._variants: Dict[str, Dict[str, str]] = {}
+        self.compressed = 0
+        self.reused = 0
+        self.skipped = 0
+
+    def build(self, files: Iterable[Tuple[str, str]]) -> int:
+        """Genera las variantes que falten para cada (nombre, nombre con huella); devuelve los archivos indexados."""
+        variants: Dict[str, Dict[str, str]] = {}
+        for filename, fingerprinted in files:
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            try:
+                available = self._prepare(filename, fingerprinted)
+            except OSError as exc:
+                logger.warning('static_precompress_failed', file=filename, error=str(exc))
+                continue
+            if available:
+                variants[filename] = available
+        with self._lock:
+            self._variants = variants
+        return len(variants)
+
+    def _prepare(self, filename: str, fingerprinted: str) -> Dict[str, str]:
+        path = os.path.join(self.static_folder, *filename.split('/'))
+        if os.path.getsize(path) < self.min_bytes:
+            return {}
+
+        data: Optional[bytes] = None
+        available: Dict[str, str] = {}
+        base = os.path.join(self.directory, *fingerprinted.split('/'))
+        for encoding in available_encodings():
+            variant_path = base + _SUFFIXES[encoding]
+            skipped_path = variant_path + '.skip'
+            if os.path.exists(skipped_path):
+                # Una compresión anterior del mismo contenido no ahorró bytes
+                self._count('skipped')
+                continue
+            if os.path.exists(variant_path):
+                available[encoding] = variant_path
+                self._count('reused')
+                continue
+
+            if data is None:
+                with open(path, 'rb') as handle:
+                    data = handle.read()
+            level = self.brotli_quality if encoding == 'br' else self.gzip_level
+            body = compress_body(data, encoding, level)
+            if len(body) >= len(data):
+                atomic_write(skipped_path, b'')
+                self._count('skipped')
+                continue
+            atomic_write(variant_path, body)
+            available[encoding] = variant_path
+            self._count('compressed')
+        return available
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def has_variants(self, filename: str) -> bool:
+        return filename in self._variants
+
+    def negotiate(self, filename: str, accepted: Iterable[Tuple[str, float]]) -> Optional[Tuple[str, str]]:
+        """(codificación, ruta) de la mejor variante aceptada por el cliente, o `None`."""
+        variants = self._variants.get(filename)
+        if not variants:
+            return None
+        encoding = choose_encoding(accepted, variants)
+        return (encoding, variants[encoding]) if encoding is not None else None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                'files': len(self._variants),
+                'encodings': list(available_encodings()),
+                'compressed': self.compressed,
+                'reused': self.reused,
+                'skipped': self.skipped,
+            }
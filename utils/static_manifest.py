@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Manifiesto de archivos estáticos con huella de contenido.
+
+Al arrancar se calcula el hash de cada archivo de `static/` y `static_url()`
+devuelve URLs con la huella en el nombre (`css/output.3f9c1a2b7d.css`). Como la
+URL cambia solo cuando cambia el contenido, esas respuestas se sirven con
+`Cache-Control: public, max-age=31536000, immutable` y las visitas siguientes
+no vuelven a pedirlas. La huella va en el nombre y no en el query string para
+que las rutas relativas (`@import url('./forms.css')`) sigan resolviendo en el
+mismo directorio.
+
+En modo debug cada consulta comprueba la fecha de modificación del archivo y
+recalcula su hash si cambió, para no tener que reiniciar al editar estáticos.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DIGEST_LENGTH = 10
+
+
+def _fingerprinted_name(filename: str, digest: str) -> str:
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{digest}{ext}'
+
+
+def _file_digest(path: str, length: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+class StaticManifest:
+    """Nombre original <-> nombre con huella de cada archivo estático."""
+
+    def __init__(self, static_folder: str, check_mtime: bool = False, digest_length: int = DIGEST_LENGTH) -> None:
+        self.static_folder = static_folder
+        self.check_mtime = check_mtime
+        self.digest_length = digest_length
+        self._lock = threading.Lock()
+        # filename -> (nombre con huella, mtime)
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._originals: Dict[str, str] = {}
+
+    def build(self) -> int:
+        """Recorre `static/` y calcula todas las huellas; devuelve el número de archivos."""
+        entries: Dict[str, Tuple[str, float]] = {}
+        for root, _dirs, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                entry = self._hash_entry(path, filename)
+                if entry is not None:
+                    entries[filename] = entry
+        with self._lock:
+            self._entries = entries
+            self._originals = {hashed: filename for filename, (hashed, _mtime) in entries.items()}
+        return len(entries)
+
+    def _hash_entry(self, path: str, filename: str) -> Optional[Tuple[str, float]]:
+        try:
+            mtime = os.stat(path).st_mtime
+            digest = _file_digest(path, self.digest_length)
+        except OSError:
+            return None
+        return _fingerprinted_name(filename, digest), mtime
+
+    def _refresh(self, filename: str) -> Optional[str]:
+        """Recalcula la huella si el archivo cambió (solo en modo debug)."""
+        path = os.path.join(self.static_folder, *filename.split('/'))
+        entry = self._entries.get(filename)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        if entry is not None and entry[1] == mtime:
+            return entry[0]
+        entry = self._hash_entry(path, filename)
+        if entry is None:
+            return None
+        with self._lock:
+            previous = self._entries.get(filename)
+            if previous is not None:
+                self._originals.pop(previous[0], None)
+            self._entries[filename] = entry
+            self._originals[entry[0]] = filename
+        return entry[0]
+
+    def fingerprinted(self, filename: str) -> Optional[str]:
+        """Nombre con huella de un archivo, o `None` si no está en el manifiesto."""
+        if self.check_mtime:
+            return self._refresh(filename)
+        entry = self._entries.get(filename)
+        return entry[0] if entry is not None else None
+
+    def original(self, filename: str) -> Optional[str]:
+        """Nombre real de una URL con huella; `None` si no corresponde a una huella vigente."""
+        return self._originals.get(filename)
+
+    def items(self) -> List[Tuple[str, str]]:
+        """Pares (nombre, nombre con huella) de todos los archivos."""
+        return [(filename, entry[0]) for filename, entry in self._entries.items()]
+
+    def stats(self) -> Dict[str, object]:
+        return {'files': len(self._entries), 'check_mtime': self.check_mtime}
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Logging estructurado en líneas JSON.
+
+Cada evento se emite como un objeto JSON por línea en stdout, con nivel,
+nombre del logger, pid y los campos del evento. El nivel se comprueba antes de
+hacer cualquier trabajo; después se aplica el muestreo (por `endpoint` o por
+nombre de evento, según `LOG_SAMPLE_RATES`) y solo entonces se serializan los
+campos, truncados a `LOG_FIELD_MAX_CHARS` con un `repr` acotado que no recorre
+payloads completos.
+"""
+
+import json
+import logging
+import os
+import random
+import reprlib
+import sys
+import time
+from typing import Any, Dict
+
+from utils.config import LOG_DEFAULT_SAMPLE_RATE, LOG_FIELD_MAX_CHARS, LOG_LEVEL, LOG_SAMPLE_RATES
+
+_field_repr = reprlib.Repr()
+_field_repr.maxstring = LOG_FIELD_MAX_CHARS
+_field_repr.maxother = LOG_FIELD_MAX_CHARS
+_field_repr.maxdict = 20
+_field_repr.maxlist = 20
+_field_repr.maxlevel = 3
+
+
+def _truncate(value: Any) -> Any:
+    """Valor apto para JSON con tamaño acotado."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= LOG_FIELD_MAX_CHARS:
+            return value
+        return f'{value[:LOG_FIELD_MAX_CHARS]}…(+{len(value) - LOG_FIELD_MAX_CHARS})'
+    text = _field_repr.repr(value)
+    return text if len(text) <= LOG_FIELD_MAX_CHARS else f'{text[:LOG_FIELD_MAX_CHARS]}…'
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+            'pid': os.getpid(),
+        }
+        payload.update(getattr(record, 'fields', {}))
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class StructuredLogger:
+    """Envoltorio sobre `logging` con campos, muestreo y truncado."""
+
+    def __init__(self, name: str) -> None:
+        self._logger = logging.getLogger(f'rescue.{name}')
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = LOG_SAMPLE_RATES.get(fields.get('endpoint'), LOG_SAMPLE_RATES.get(event, LOG_DEFAULT_SAMPLE_RATE))
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            fields['sample_rate'] = rate
+        self._logger.log(level, event, extra={'fields': {key: _truncate(value) for key, value in fields.items()}})
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+
+def _configure_root() -> None:
+    root = logging.getLogger('rescue')
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonLineFormatter())
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # Las líneas JSON no se duplican en el logger raíz de la aplicación
+    root.propagate = False
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+_configure_root()
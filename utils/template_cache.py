@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Compilación anticipada de plantillas Jinja.
+
+Sin esto cada worker compila `admin/spa_dashboard.html`, `empresa/dashboard.html`
+y sus parciales en la primera petición que los usa, y vuelve a hacerlo tras
+cada reciclado por `max_requests`. El bytecode compilado se guarda en
+`JINJA_BYTECODE_CACHE_DIR` (Jinja lo invalida por checksum del fuente) y
+`precompile_templates()` carga todas las plantillas al importar la app: con
+`preload_app` ocurre una vez en el master de gunicorn y los workers heredan
+las plantillas ya compiladas en la caché en memoria del entorno.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, TemplateError
+
+TEMPLATE_EXTENSIONS = ('.html',)
+
+
+def build_bytecode_cache(directory: str) -> Optional[FileSystemBytecodeCache]:
+    """Caché de bytecode en disco; `None` si no hay directorio o no se puede crear."""
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    except OSError as exc:
+        print(f"⚠️ Caché de bytecode de plantillas deshabilitada: {exc}")
+        return None
+    return FileSystemBytecodeCache(directory, pattern='rescue-%s.cache')
+
+
+def precompile_templates(env: Environment) -> Dict[str, Any]:
+    """Carga (y compila) todas las plantillas; devuelve el resumen para /health."""
+    started = time.perf_counter()
+    compiled = 0
+    failed = []
+    for name in env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_EXTENSIONS)):
+        try:
+            env.get_template(name)
+            compiled += 1
+        except TemplateError as exc:
+            # La plantilla seguirá fallando al usarse; no impide arrancar
+            failed.append(name)
+            print(f"⚠️ No se pudo precompilar la plantilla {name}: {exc}")
+    return {
+        'precompiled': compiled,
+        'failed': failed,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
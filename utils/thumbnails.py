@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Miniaturas de imágenes con caché en disco.
+
+El original se descarga una sola vez por miniatura, se reduce con Pillow a uno
+de los tamaños fijos de `IMAGE_THUMBNAIL_SIZES` (WebP si el navegador lo
+acepta, JPEG en otro caso) y se guarda en `IMAGE_THUMBNAIL_CACHE_DIR`. La caché
+se comparte entre workers y se acota por bytes: al superar el límite se
+eliminan las miniaturas usadas hace más tiempo (cada acierto actualiza la
+fecha de modificación del archivo).
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from utils.config import (
+    IMAGE_THUMBNAIL_CACHE_DIR,
+    IMAGE_THUMBNAIL_CACHE_MAX_BYTES,
+    IMAGE_THUMBNAIL_QUALITY,
+    IMAGE_THUMBNAIL_SIZES,
+)
+from utils.disk_cache import atomic_write, evict_lru, touch
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow es opcional
+    Image = None
+    ImageOps = None
+    features = None
+
+THUMBNAIL_MIMETYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+def thumbnails_available() -> bool:
+    return Image is not None
+
+
+def pick_size(requested: Optional[int]) -> int:
+    """Tamaño fijo más pequeño que cubre el solicitado."""
+    if not requested:
+        return IMAGE_THUMBNAIL_SIZES[len(IMAGE_THUMBNAIL_SIZES) // 2]
+    for size in IMAGE_THUMBNAIL_SIZES:
+        if size >= requested:
+            return size
+    return IMAGE_THUMBNAIL_SIZES[-1]
+
+
+def pick_format(accept_webp: bool) -> str:
+    if accept_webp and features is not None and features.check('webp'):
+        return 'webp'
+    return 'jpeg'
+
+
+def render_thumbnail(data: bytes, size: int, fmt: str, quality: int = IMAGE_THUMBNAIL_QUALITY) -> bytes:
+    """Reduce la imagen para que quepa en un cuadrado de `size` píxeles."""
+    with Image.open(io.BytesIO(data)) as source:
+        # En JPEG decodifica directamente a una escala reducida
+        source.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        if fmt == 'jpeg':
+            if has_alpha:
+                rgba = image.convert('RGBA')
+                background = Image.new('RGB', rgba.size, (255, 255, 255))
+                background.paste(rgba, mask=rgba.getchannel('A'))
+                image = background
+            elif image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        output = io.BytesIO()
+        if fmt == 'webp':
+            image.save(output, format='WEBP', quality=quality, method=4)
+        else:
+            image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+        return output.getvalue()
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:24]
+
+
+class ThumbnailCache:
+    """Miniaturas en disco con expulsión LRU por tamaño total."""
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._generating: Dict[str, threading.Lock] = {}
+        self._approx_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _folder_dir(self, folder: str) -> str:
+        return os.path.join(self.directory, _digest(folder))
+
+    def _path(self, folder: str, name: str, size: int, fmt: str) -> str:
+        # El prefijo por nombre base permite invalidar todas las variantes de un archivo
+        stem = os.path.splitext(name)[0]
+        return os.path.join(self._folder_dir(folder), f'{_digest(stem)}.{_digest(name)}-{size}.{fmt}')
+
+    def get_or_create(
+        self,
+        folder: str,
+        name: str,
+        size: int,
+        fmt: str,
+        loader: Callable[[], bytes],
+    ) -> bytes:
+        """Devuelve la miniatura; si no existe la genera con `loader` una sola vez por proceso."""
+        path = self._path(folder, name, size, fmt)
+        data = self._read(path)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+            return data
+
+        with self._lock:
+            self.misses += 1
+            generation_lock = self._generating.setdefault(path, threading.Lock())
+        try:
+            with generation_lock:
+                data = self._read(path)
+                if data is None:
+                    data = loader()
+                    self._write(path, data)
+            return data
+        finally:
+            with self._lock:
+                self._generating.pop(path, None)
+
+    def invalidate(self, folder: str, stem: Optional[str] = None) -> None:
+        """Elimina las miniaturas de una carpeta o de un nombre base dentro de ella."""
+        folder_dir = self._folder_dir(folder)
+        if stem is None:
+            shutil.rmtree(folder_dir, ignore_errors=True)
+            return
+        prefix = f'{_digest(stem)}.'
+        try:
+            entries = os.listdir(folder_dir)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.startswith(prefix):
+                try:
+                    os.unlink(os.path.join(folder_dir, entry))
+                except OSError:
+                    continue
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        touch(path)
+        return data
+
+    def _write(self, path: str, data: bytes) -> None:
+        try:
+            atomic_write(path, data)
+        except OSError as exc:
+            print(f"⚠️ No se pudo guardar la miniatura en disco: {exc}")
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data)
+            needs_eviction = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if needs_eviction:
+            self._evict()
+
+    def _evict(self) -> None:
+        total, evicted = evict_lru(self.directory, self.max_bytes)
+        with self._lock:
+            self._approx_bytes = total
+            self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'available': thumbnails_available(),
+                'sizes': list(IMAGE_THUMBNAIL_SIZES),
+                'bytes': self._approx_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Miniaturas compartidas por todos los workers a través del disco
+thumbnail_cache = ThumbnailCache(IMAGE_THUMBNAIL_CACHE_DIR, IMAGE_THUMBNAIL_CACHE_MAX_BYTES)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de validación de tokens para `require_role`.
+
+Evita consultar al backend en cada navegación cuando la petición trae la cookie
+`auth_token` pero no hay sesión Flask. Las entradas se indexan por el hash del
+token (nunca por el token en claro) y su vigencia queda acotada por el claim
+`exp` del JWT.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def hash_token(token: str) -> str:
+    """Hash estable del token para usarlo como clave sin guardarlo en claro."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def decode_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Decodifica el payload de un JWT sin verificar la firma.
+
+    Solo se usa para leer expiración y rol de forma local; la autorización real
+    la sigue haciendo el backend en cada llamada.
+    """
+    try:
+        parts = token.split('.')
+        if len(parts) != 3:
+            return None
+        payload = parts[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')))
+        return claims if isinstance(claims, dict) else None
+    except (ValueError, UnicodeError):
+        return None
+
+
+def extract_role(claims: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Obtiene el rol desde los claims, directo o anidado en `user`."""
+    if not claims:
+        return None
+    role = claims.get('role')
+    if not role and isinstance(claims.get('user'), dict):
+        role = claims['user'].get('role')
+    return str(role) if role else None
+
+
+class TokenValidationCache:
+    """Caché LRU thread-safe de tokens ya validados por el backend."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 2048, local_decode: bool = True) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.local_decode = local_decode
+        self._entries: 'OrderedDict[str, Tuple[float, Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.local_rejections = 0
+        self.backend_validations = 0
+
+    def _entry_expiry(self, claims: Optional[Dict[str, Any]], now: float) -> float:
+        expires_at = now + self.ttl
+        exp = claims.get('exp') if claims else None
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        return expires_at
+
+    def lookup(self, token: str) -> Tuple[str, Optional[str]]:
+        """Resuelve el token sin red.
+
+        Returns:
+            tuple: (estado, rol) donde estado es 'valid', 'expired' o 'unknown'.
+        """
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return 'valid', entry[1]
+            if entry:
+                del self._entries[key]
+
+        claims = decode_token_claims(token) if self.local_decode else None
+        exp = claims.get('exp') if claims else None
+        if isinstance(exp, (int, float)) and exp <= now:
+            with self._lock:
+                self.local_rejections += 1
+            return 'expired', extract_role(claims)
+
+        with self._lock:
+            self.misses += 1
+        return 'unknown', extract_role(claims)
+
+    def store(self, token: str) -> None:
+        """Registra un token validado por el backend."""
+        claims = decode_token_claims(token) if self.local_decode else None
+        now = time.time()
+        expires_at = self._entry_expiry(claims, now)
+        if expires_at <= now:
+            return
+        key = hash_token(token)
+        with self._lock:
+            self.backend_validations += 1
+            self._entries[key] = (expires_at, extract_role(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: Optional[str]) -> None:
+        if not token:
+            return
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.local_rejections
+            avoided = self.hits + self.local_rejections
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'local_rejections': self.local_rejections,
+                'backend_validations': self.backend_validations,
+                'avoided_round_trips': avoided,
+                'hit_ratio': round(avoided / lookups, 4) if lookups else 0.0,
+            }
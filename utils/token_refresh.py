@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Coordinador single-flight para el refresh de tokens.
+
+Cuando varias peticiones reciben 401 a la vez con el mismo refresh token, solo
+una llama a `/auth/refresh`; el resto espera y reutiliza su resultado, que
+además se conserva durante una ventana de gracia corta. Opcionalmente, un lock
+de archivo (`flock`) en un directorio local colapsa también los refresh entre
+los workers de gunicorn.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.config import TOKEN_REFRESH_GRACE, TOKEN_REFRESH_LOCK_DIR, TOKEN_REFRESH_WAIT_TIMEOUT
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sin flock
+    fcntl = None
+
+RefreshResult = Optional[Dict[str, str]]
+
+
+class _Flight:
+    """Refresh en curso (o recién terminado) para un refresh token."""
+
+    __slots__ = ('event', 'result', 'finished_at')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: RefreshResult = None
+        self.finished_at: Optional[float] = None
+
+
+class RefreshCoordinator:
+    """Garantiza un único refresh por token y proceso (y opcionalmente por host)."""
+
+    def __init__(self, grace: float = 10.0, wait_timeout: float = 10.0, lock_dir: str = '') -> None:
+        self.grace = grace
+        self.wait_timeout = wait_timeout
+        self.lock_dir = lock_dir if (lock_dir and fcntl is not None) else ''
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.coalesced = 0
+        self.grace_hits = 0
+        self.cross_worker_reuses = 0
+
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+
+    def run(self, refresh_token: str, refresh_fn: Callable[[], RefreshResult]) -> RefreshResult:
+        """Ejecuta `refresh_fn` una sola vez por token y comparte su resultado."""
+        key = hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+        now = time.monotonic()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.finished_at is not None:
+                if now - flight.finished_at <= self.grace:
+                    self.grace_hits += 1
+                    return flight.result
+                flight = None
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            flight.event.wait(self.wait_timeout)
+            return flight.result
+
+        result: RefreshResult = None
+        try:
+            if self.lock_dir:
+                result = self._run_cross_worker(key, refresh_fn)
+            else:
+                result = self._call(refresh_fn)
+        finally:
+            flight.result = result
+            flight.finished_at = time.monotonic()
+            flight.event.set()
+            self._prune()
+        return result
+
+    def _call(self, refresh_fn: Callable[[], RefreshResult]) -> RefreshResult:
+        with self._lock:
+            self.refreshes += 1
+        return refresh_fn()
+
+    def _prune(self) -> None:
+        limit = time.monotonic() - self.grace
+        with self._lock:
+            stale = [
+                key for key, flight in self._flights.items()
+                if flight.finished_at is not None and flight.finished_at < limit
+            ]
+            for key in stale:
+                del self._flights[key]
+
+    # ---------- Coordinación entre workers ----------
+
+    def _run_cross_worker(self, key: str, refresh_fn: Callable[[], RefreshResult]) -> RefreshResult:
+        lock_path = os.path.join(self.lock_dir, f'{key}.lock')
+        result_path = os.path.join(self.lock_dir, f'{key}.json')
+
+        fd = self._lock_file(lock_path)
+        try:
+            shared = self._read_shared_result(result_path)
+            if shared is not None:
+                with self._lock:
+                    self.cross_worker_reuses += 1
+                return shared
+
+            result = self._call(refresh_fn)
+            if result:
+                self._write_shared_result(result_path, result)
+            return result
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    @staticmethod
+    def _lock_file(lock_path: str) -> int:
+        """Lock exclusivo sobre el archivo que sigue enlazado en `lock_path`.
+
+        La limpieza puede borrar un lock libre entre el `open` y el `flock`; en ese
+        caso el descriptor apunta a un archivo ya desenlazado y se vuelve a abrir,
+        para que todos los workers se serialicen sobre el mismo archivo.
+        """
+        while True:
+            fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read_shared_result(self, path: str) -> RefreshResult:
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(payload.get('stored_at', 0)) > self.grace:
+            return None
+        cookies = payload.get('cookies')
+        return cookies if isinstance(cookies, dict) else None
+
+    def _write_shared_result(self, path: str, cookies: Dict[str, str]) -> None:
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                json.dump({'stored_at': time.time(), 'cookies': cookies}, handle)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"⚠️ No se pudo compartir el refresh entre workers: {exc}")
+        self._prune_shared_files()
+
+    def _prune_shared_files(self) -> None:
+        # Los resultados compartidos contienen tokens: no se dejan en disco más de lo necesario
+        limit = time.time() - max(self.grace * 6, 60)
+        try:
+            entries = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in entries:
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) >= limit:
+                    continue
+                if name.endswith('.lock'):
+                    # flock no actualiza el mtime: un lock antiguo puede estar tomado
+                    self._unlink_idle_lock(path)
+                else:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _unlink_idle_lock(path: str) -> None:
+        """Borra un archivo de lock solo si nadie lo tiene tomado (se desenlaza con el lock en mano)."""
+        fd = os.open(path, os.O_RDWR)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                os.unlink(path)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'refreshes': self.refreshes,
+                'coalesced_waiters': self.coalesced,
+                'grace_hits': self.grace_hits,
+                'cross_worker_reuses': self.cross_worker_reuses,
+                'cross_worker_lock': bool(self.lock_dir),
+            }
+
+
+# Coordinador compartido por todas las instancias de APIClient del proceso
+refresh_coordinator = RefreshCoordinator(
+    grace=TOKEN_REFRESH_GRACE,
+    wait_timeout=TOKEN_REFRESH_WAIT_TIMEOUT,
+    lock_dir=TOKEN_REFRESH_LOCK_DIR
+)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Subidas en streaming hacia el servicio de imágenes.
+
+`StreamingMultipartEncoder` genera el cuerpo multipart por bloques de tamaño
+fijo a partir del archivo recibido (que Werkzeug ya volcó a disco), de modo
+que la memoria del worker no depende del tamaño del archivo. El progreso se
+publica en `UploadProgressStore`, un directorio local que leen todos los
+workers para responder al endpoint de consulta.
+"""
+
+import json
+import mimetypes
+import os
+import re
+import time
+import uuid
+import zipfile
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.config import IMAGES_UPLOAD_MAX_TIMEOUT, IMAGES_UPLOAD_MIN_THROUGHPUT, UPLOAD_PROGRESS_DIR
+
+UPLOAD_ID_PATTERN = re.compile(r'^[\w-]{8,64}$')
+
+
+def _stream_size(stream) -> Optional[int]:
+    """Tamaño restante del stream si es posicionable."""
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+        return size - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _quote_param(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', ' ').replace('\n', ' ')
+
+
+class StreamingMultipartEncoder:
+    """Cuerpo multipart/form-data iterable con Content-Length conocido."""
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        file_field: str,
+        filename: str,
+        stream,
+        content_type: str,
+        chunk_size: int,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote_param(name)}"\r\n\r\n'
+                f'{value}\r\n'
+            )
+        parts.append(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{_quote_param(file_field)}"; filename="{_quote_param(filename)}"\r\n'
+            f'Content-Type: {content_type or "application/octet-stream"}\r\n\r\n'
+        )
+        self._preamble = ''.join(parts).encode('utf-8')
+        self._epilogue = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self.file_size = size if size is not None else _stream_size(stream)
+        self.total = (
+            len(self._preamble) + self.file_size + len(self._epilogue)
+            if self.file_size is not None else None
+        )
+
+    def __len__(self) -> int:
+        # 0 hace que requests use Transfer-Encoding: chunked
+        return self.total or 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        sent = len(self._preamble)
+        yield self._preamble
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+            sent += len(chunk)
+            if self.on_progress is not None:
+                self.on_progress(sent, self.total)
+            yield chunk
+        sent += len(self._epilogue)
+        yield self._epilogue
+        if self.on_progress is not None:
+            self.on_progress(sent, self.total)
+
+
+ZIP_MIMETYPES = frozenset({'application/zip', 'application/x-zip-compressed'})
+
+
+def is_zip_upload(file_storage) -> bool:
+    filename = (getattr(file_storage, 'filename', '') or '').lower()
+    return filename.endswith('.zip') or getattr(file_storage, 'mimetype', '') in ZIP_MIMETYPES
+
+
+class ZipMemberUpload:
+    """Miembro de un zip con la interfaz mínima de `FileStorage` (se abre al leerlo)."""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+        self.archive = archive
+        self.info = info
+        self.filename = os.path.basename(info.filename)
+        self.mimetype = mimetypes.guess_type(self.filename)[0] or 'application/octet-stream'
+        self.size = info.file_size
+        self._stream = None
+
+    @property
+    def stream(self):
+        if self._stream is None:
+            self._stream = self.archive.open(self.info)
+        return self._stream
+
+
+def zip_members(archive: zipfile.ZipFile) -> List[ZipMemberUpload]:
+    """Archivos de un zip, sin directorios ni metadatos ocultos."""
+    members = []
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+            continue
+        members.append(ZipMemberUpload(archive, info))
+    return members
+
+
+def upload_timeout(size: Optional[int], base_timeout: float) -> float:
+    """Timeout de lectura proporcional al tamaño (mínimo `base_timeout`)."""
+    if not size:
+        return IMAGES_UPLOAD_MAX_TIMEOUT
+    return min(max(base_timeout, base_timeout + size / IMAGES_UPLOAD_MIN_THROUGHPUT), IMAGES_UPLOAD_MAX_TIMEOUT)
+
+
+class UploadProgressStore:
+    """Progreso de subidas en archivos JSON compartidos entre workers."""
+
+    def __init__(self, directory: str, min_interval: float = 0.5, retention: float = 3600.0) -> None:
+        self.directory = directory
+        self.min_interval = min_interval
+        self.retention = retention
+        self._last_write: Dict[str, float] = {}
+
+    def _path(self, upload_id: str) -> Optional[str]:
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id or ''):
+            return None
+        return os.path.join(self.directory, f'{upload_id}.json')
+
+    def _write(self, upload_id: str, payload: Dict[str, Any]) -> None:
+        path = self._path(upload_id)
+        if path is None:
+            return
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                json.dump(payload, handle)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"⚠️ No se pudo registrar el progreso de la subida {upload_id}: {exc}")
+
+    def start(self, upload_id: str, total: Optional[int]) -> None:
+        self._prune()
+        self._last_write[upload_id] = time.monotonic()
+        self._write(upload_id, {
+            'state': 'uploading',
+            'bytes_sent': 0,
+            'total': total,
+            'percent': 0.0,
+            'updated_at': time.time(),
+        })
+
+    def update(self, upload_id: str, bytes_sent: int, total: Optional[int]) -> None:
+        now = time.monotonic()
+        if now - self._last_write.get(upload_id, 0.0) < self.min_interval:
+            return
+        self._last_write[upload_id] = now
+        self._write(upload_id, {
+            'state': 'uploading',
+            'bytes_sent': bytes_sent,
+            'total': total,
+            'percent': round(bytes_sent * 100.0 / total, 1) if total else None,
+            'updated_at': time.time(),
+        })
+
+    def finish(self, upload_id: str, success: bool, bytes_sent: int, total: Optional[int], error: str = '') -> None:
+        self._last_write.pop(upload_id, None)
+        self._write(upload_id, {
+            'state': 'done' if success else 'error',
+            'bytes_sent': bytes_sent,
+            'total': total,
+            'percent': 100.0 if success else (round(bytes_sent * 100.0 / total, 1) if total else None),
+            'error': error or None,
+            'updated_at': time.time(),
+        })
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(upload_id)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self) -> None:
+        limit = time.time() - self.retention
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in entries:
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+
+# Progreso de subidas visible desde cualquier worker
+upload_progress = UploadProgressStore(UPLOAD_PROGRESS_DIR)